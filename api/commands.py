@@ -10,17 +10,19 @@ from werkzeug.exceptions import NotFound
 
 from configs import dify_config
 from constants.languages import languages
+from core.helper.provider_configurations_cache import ProviderConfigurationsCache
 from core.rag.datasource.vdb.vector_factory import Vector
 from core.rag.datasource.vdb.vector_type import VectorType
 from core.rag.models.document import Document
 from events.app_event import app_was_created
 from extensions.ext_database import db
 from extensions.ext_redis import redis_client
+from extensions.ext_storage import storage
 from libs.helper import email as email_validate
 from libs.password import hash_password, password_pattern, valid_password
 from libs.rsa import generate_key_pair
 from models import Tenant
-from models.dataset import Dataset, DatasetCollectionBinding, DocumentSegment
+from models.dataset import Dataset, DatasetCollectionBinding, DatasetKeywordTable, DocumentSegment
 from models.dataset import Document as DatasetDocument
 from models.model import Account, App, AppAnnotationSetting, AppMode, Conversation, MessageAnnotation
 from models.provider import Provider, ProviderModel
@@ -128,6 +130,7 @@ def reset_encrypt_key_pair():
         db.session.query(Provider).filter(Provider.provider_type == "custom", Provider.tenant_id == tenant.id).delete()
         db.session.query(ProviderModel).filter(ProviderModel.tenant_id == tenant.id).delete()
         db.session.commit()
+        ProviderConfigurationsCache(tenant.id).delete()
 
         click.echo(
             click.style(
@@ -414,6 +417,66 @@ def migrate_knowledge_vector_database():
     )
 
 
+@click.command("migrate-keyword-table", help="Migrate keyword tables to the jieba inverted index.")
+@click.option("--delete-source", is_flag=True, default=False, help="Delete the legacy keyword table after migration.")
+def migrate_keyword_table(delete_source: bool):
+    """
+    Convert the serialized dataset keyword tables to keyword postings.
+    """
+    from core.rag.datasource.keyword.jieba.jieba_inverted_index import JiebaInvertedIndex
+
+    click.echo(click.style("Starting keyword table migration.", fg="green"))
+    migrated_count = 0
+    skipped_count = 0
+    total_count = 0
+    last_id = None
+    while True:
+        # keyset pagination, migrated tables may be deleted while iterating
+        query = DatasetKeywordTable.query.order_by(DatasetKeywordTable.id)
+        if last_id:
+            query = query.filter(DatasetKeywordTable.id > last_id)
+        keyword_tables = query.limit(50).all()
+        if not keyword_tables:
+            break
+
+        last_id = keyword_tables[-1].id
+        for keyword_table in keyword_tables:
+            total_count = total_count + 1
+            click.echo(
+                f"Processing the {total_count} keyword table of dataset {keyword_table.dataset_id}. "
+                f"{migrated_count} migrated, {skipped_count} skipped."
+            )
+            try:
+                dataset = db.session.query(Dataset).filter(Dataset.id == keyword_table.dataset_id).first()
+                keyword_table_dict = keyword_table.keyword_table_dict
+                if not dataset or not keyword_table_dict:
+                    skipped_count = skipped_count + 1
+                    continue
+
+                JiebaInvertedIndex(dataset).import_keyword_table(keyword_table_dict["__data__"]["table"])
+                if delete_source:
+                    data_source_type = keyword_table.data_source_type
+                    db.session.delete(keyword_table)
+                    db.session.commit()
+                    if data_source_type != "database":
+                        storage.delete("keyword_files/" + dataset.tenant_id + "/" + dataset.id + ".txt")
+                click.echo(f"Successfully migrated keyword table of dataset {dataset.id}.")
+                migrated_count += 1
+            except Exception as e:
+                db.session.rollback()
+                click.echo(
+                    click.style("Error migrating keyword table: {} {}".format(e.__class__.__name__, str(e)), fg="red")
+                )
+                continue
+
+    click.echo(
+        click.style(
+            f"Migration complete. Migrated {migrated_count} keyword tables. Skipped {skipped_count} keyword tables.",
+            fg="green",
+        )
+    )
+
+
 @click.command("convert-to-agent-apps", help="Convert Agent Assistant to Agent App.")
 def convert_to_agent_apps():
     """
@@ -530,6 +593,44 @@ def add_qdrant_doc_id_index(field: str):
     click.echo(click.style(f"Index creation complete. Created {create_count} collection indexes.", fg="green"))
 
 
+@click.command("add-pgvector-full-text-index", help="Add full-text search index to PGVector collections.")
+def add_pgvector_full_text_index():
+    click.echo(click.style("Starting PGVector full-text index creation.", fg="green"))
+    if dify_config.VECTOR_STORE != VectorType.PGVECTOR:
+        click.echo(click.style("This command only supports PGVector vector store.", fg="red"))
+        return
+    create_count = 0
+
+    from core.rag.datasource.vdb.pgvector.pgvector import PGVector, PGVectorConfig
+
+    config = PGVectorConfig(
+        host=dify_config.PGVECTOR_HOST or "localhost",
+        port=dify_config.PGVECTOR_PORT,
+        user=dify_config.PGVECTOR_USER or "postgres",
+        password=dify_config.PGVECTOR_PASSWORD or "",
+        database=dify_config.PGVECTOR_DATABASE or "postgres",
+        min_connection=dify_config.PGVECTOR_MIN_CONNECTION,
+        max_connection=dify_config.PGVECTOR_MAX_CONNECTION,
+        text_search_config=dify_config.PGVECTOR_TEXT_SEARCH_CONFIG,
+    )
+    with PGVector("", config)._get_cursor() as cur:
+        cur.execute(
+            "SELECT table_name FROM information_schema.tables"
+            " WHERE table_schema = current_schema() AND table_name LIKE 'embedding\\_%'"
+        )
+        table_names = [record[0] for record in cur]
+
+    for table_name in table_names:
+        try:
+            # adding the generated column rewrites the table, collections are upgraded one at a time
+            PGVector(table_name.removeprefix("embedding_"), config).upgrade_full_text_index()
+            create_count += 1
+        except Exception as e:
+            click.echo(click.style(f"Failed to create full-text index for collection: {table_name}. {e}", fg="red"))
+
+    click.echo(click.style(f"Index creation complete. Created {create_count} collection indexes.", fg="green"))
+
+
 @click.command("create-tenant", help="Create account and tenant.")
 @click.option("--email", prompt=True, help="Tenant account email.")
 @click.option("--name", prompt=True, help="Workspace name.")
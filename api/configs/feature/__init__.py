@@ -47,6 +47,26 @@ class SecurityConfig(BaseSettings):
         default=None,
     )
 
+    TENANT_PRIVATE_KEY_CACHE_TTL: NonNegativeInt = Field(
+        description="Maximum age in seconds of workspace private keys cached in process memory, 0 to disable",
+        default=300,
+    )
+
+    TENANT_PRIVATE_KEY_CACHE_SIZE: PositiveInt = Field(
+        description="Maximum number of workspace private keys cached in process memory",
+        default=1000,
+    )
+
+    DECRYPTED_TOKEN_CACHE_TTL: NonNegativeInt = Field(
+        description="Maximum age in seconds of decrypted credentials cached in process memory, 0 to disable",
+        default=60,
+    )
+
+    DECRYPTED_TOKEN_CACHE_SIZE: PositiveInt = Field(
+        description="Maximum number of decrypted credentials cached in process memory",
+        default=10000,
+    )
+
 
 class AppExecutionConfig(BaseSettings):
     """
@@ -61,6 +81,11 @@ class AppExecutionConfig(BaseSettings):
         description="Maximum number of concurrent active requests per app (0 for unlimited)",
         default=0,
     )
+    APP_QUEUE_MODEL_CHECK_ENABLED: bool = Field(
+        description="Check every event published to the app queue for SQLAlchemy model instances,"
+        " intended for debugging and tests",
+        default=False,
+    )
 
 
 class CodeExecutionSandboxConfig(BaseSettings):
@@ -93,6 +118,50 @@ class CodeExecutionSandboxConfig(BaseSettings):
         default=10.0,
     )
 
+    CODE_EXECUTION_POOL_MAX_CONNECTIONS: PositiveInt = Field(
+        description="Maximum number of concurrent connections to the code execution service",
+        default=100,
+    )
+
+    CODE_EXECUTION_POOL_MAX_KEEPALIVE_CONNECTIONS: NonNegativeInt = Field(
+        description="Maximum number of idle keep-alive connections to the code execution service",
+        default=20,
+    )
+
+    CODE_EXECUTION_POOL_KEEPALIVE_EXPIRY: PositiveFloat = Field(
+        description="Time in seconds after which idle keep-alive connections to the code execution service are closed",
+        default=5.0,
+    )
+
+    CODE_EXECUTION_BATCH_SIZE: NonNegativeInt = Field(
+        description="Number of items of an iteration whose body is a single code node executed in one request"
+        " to the code execution service, 0 to execute every item in its own request. Items failing within a batch"
+        " are executed a second time on their own, so code with side effects may run twice for them",
+        default=0,
+    )
+
+    CODE_EXECUTION_JINJA2_IN_PROCESS: bool = Field(
+        description="Render Jinja2 templates in a sandboxed environment of the API process"
+        " instead of sending them to the code execution service, rendering time and value lengths are limited"
+        " but memory is not isolated, only enable when template authors are trusted",
+        default=False,
+    )
+
+    CODE_EXECUTION_JINJA2_TEMPLATE_CACHE_SIZE: NonNegativeInt = Field(
+        description="Maximum number of compiled Jinja2 templates cached in each process, 0 to disable the cache",
+        default=1000,
+    )
+
+    CODE_EXECUTION_JINJA2_TIMEOUT: PositiveFloat = Field(
+        description="Maximum time in seconds to render a Jinja2 template in process",
+        default=10.0,
+    )
+
+    CODE_EXECUTION_JINJA2_MAX_OUTPUT_LENGTH: PositiveInt = Field(
+        description="Maximum length of the output of a Jinja2 template rendered in process",
+        default=1000000,
+    )
+
     CODE_MAX_NUMBER: PositiveInt = Field(
         description="Maximum allowed numeric value in code execution",
         default=9223372036854775807,
@@ -314,6 +383,31 @@ class HttpConfig(BaseSettings):
         default=5,
     )
 
+    SSRF_DEFAULT_MAX_RESPONSE_SIZE: PositiveInt = Field(
+        description="The default maximum size in bytes of a response body streamed by network requests (SSRF)",
+        default=100 * 1024 * 1024,
+    )
+
+    SSRF_POOL_MAX_CONNECTIONS: PositiveInt = Field(
+        description="Maximum number of connections of the connection pool for network requests (SSRF)",
+        default=100,
+    )
+
+    SSRF_POOL_MAX_KEEPALIVE_CONNECTIONS: NonNegativeInt = Field(
+        description="Maximum number of idle keep-alive connections of the connection pool for network requests (SSRF)",
+        default=20,
+    )
+
+    SSRF_POOL_KEEPALIVE_EXPIRY: PositiveFloat = Field(
+        description="Time in seconds after which idle keep-alive connections for network requests are closed (SSRF)",
+        default=5.0,
+    )
+
+    SSRF_HTTP2_ENABLED: bool = Field(
+        description="Enable HTTP/2 for network requests (SSRF), requires the h2 package",
+        default=False,
+    )
+
     RESPECT_XFORWARD_HEADERS_ENABLED: bool = Field(
         description="Enable or disable the X-Forwarded-For Proxy Fix middleware from Werkzeug"
         " to respect X-* headers to redirect clients",
@@ -389,6 +483,33 @@ class ModelLoadBalanceConfig(BaseSettings):
     )
 
 
+class ProviderConfigurationsCacheConfig(BaseSettings):
+    """
+    Configuration for the in-process cache of tenant model provider configurations
+    """
+
+    PROVIDER_CONFIGURATIONS_CACHE_TTL: NonNegativeInt = Field(
+        description="Maximum age in seconds of provider configurations cached in process memory, 0 to disable",
+        default=60,
+    )
+
+    PROVIDER_CONFIGURATIONS_CACHE_SIZE: PositiveInt = Field(
+        description="Maximum number of tenants whose provider configurations are cached in process memory",
+        default=1000,
+    )
+
+
+class OpsTraceConfig(BaseSettings):
+    """
+    Configuration for ops tracing of apps
+    """
+
+    TRACE_INSTANCE_CACHE_SIZE: PositiveInt = Field(
+        description="Maximum number of apps whose trace instances are cached in process memory",
+        default=1000,
+    )
+
+
 class BillingConfig(BaseSettings):
     """
     Configuration for platform billing features
@@ -441,6 +562,11 @@ class WorkflowConfig(BaseSettings):
         default=200 * 1024,
     )
 
+    WORKFLOW_GRAPH_CACHE_SIZE: NonNegativeInt = Field(
+        description="Maximum number of initialized workflow graphs cached per process, 0 to disable the cache",
+        default=1000,
+    )
+
 
 class WorkflowNodeExecutionConfig(BaseSettings):
     """
@@ -452,6 +578,27 @@ class WorkflowNodeExecutionConfig(BaseSettings):
         default=100,
     )
 
+    WORKFLOW_NODE_EXECUTION_WRITE_BEHIND_ENABLED: bool = Field(
+        description="Buffer workflow node execution records and persist them in batches instead of one by one",
+        default=False,
+    )
+
+    WORKFLOW_NODE_EXECUTION_FLUSH_INTERVAL: PositiveFloat = Field(
+        description="Maximum time in seconds buffered workflow node execution records wait before being persisted",
+        default=1.0,
+    )
+
+    WORKFLOW_NODE_EXECUTION_FLUSH_BATCH_SIZE: PositiveInt = Field(
+        description="Maximum number of workflow node execution records buffered before being persisted",
+        default=100,
+    )
+
+    WORKFLOW_NODE_EXECUTION_MAX_PAYLOAD_SIZE: NonNegativeInt = Field(
+        description="Maximum size in characters of the inputs, process data and outputs persisted for a buffered"
+        " workflow node execution, larger payloads are truncated, 0 for no limit",
+        default=1024 * 1024,
+    )
+
 
 class AuthConfig(BaseSettings):
     """
@@ -655,6 +802,29 @@ class DataSetConfig(BaseSettings):
         default=30,
     )
 
+    RETRIEVAL_STATISTICS_BUFFER_ENABLED: bool = Field(
+        description="Buffer segment hit counts and dataset queries of retrievals in Redis and persist them"
+        " periodically with a Celery beat task instead of during the request",
+        default=False,
+    )
+
+    RETRIEVAL_STATISTICS_FLUSH_INTERVAL: PositiveInt = Field(
+        description="Interval in seconds for persisting buffered retrieval statistics",
+        default=60,
+    )
+
+    RETRIEVAL_EXECUTOR_MAX_WORKERS: PositiveInt = Field(
+        description="Maximum number of threads per process searching datasets concurrently, the same number of"
+        " threads runs the search methods of each dataset",
+        default=32,
+    )
+
+    RETRIEVAL_TIMEOUT: NonNegativeInt = Field(
+        description="Maximum time in seconds a retrieval waits for its datasets and search methods, slower ones"
+        " are skipped with a warning and keep their worker until they finish, 0 for no limit",
+        default=60,
+    )
+
 
 class WorkspaceConfig(BaseSettings):
     """
@@ -682,6 +852,16 @@ class IndexingConfig(BaseSettings):
         default=50,
     )
 
+    QUERY_EMBEDDING_CACHE_TTL: PositiveInt = Field(
+        description="Time-to-live in seconds of query embeddings cached in Redis",
+        default=600,
+    )
+
+    QUERY_EMBEDDING_LOCAL_CACHE_SIZE: NonNegativeInt = Field(
+        description="Maximum number of query embeddings cached in process memory, 0 to disable",
+        default=1000,
+    )
+
 
 class MultiModalTransferConfig(BaseSettings):
     MULTIMODAL_SEND_FORMAT: Literal["base64", "url"] = Field(
@@ -805,7 +985,9 @@ class FeatureConfig(
     ModelLoadBalanceConfig,
     ModerationConfig,
     MultiModalTransferConfig,
+    OpsTraceConfig,
     PositionConfig,
+    ProviderConfigurationsCacheConfig,
     RagEtlConfig,
     SecurityConfig,
     ToolConfig,
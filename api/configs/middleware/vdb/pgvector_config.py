@@ -1,6 +1,6 @@
 from typing import Optional
 
-from pydantic import Field, PositiveInt
+from pydantic import Field, NonNegativeInt, PositiveInt
 from pydantic_settings import BaseSettings
 
 
@@ -43,3 +43,15 @@ class PGVectorConfig(BaseSettings):
         description="Max connection of the PostgreSQL database",
         default=5,
     )
+
+    PGVECTOR_HNSW_EF_SEARCH: NonNegativeInt = Field(
+        description="Size of the candidate list of HNSW index scans, higher values trade speed for recall,"
+        " 0 to use the server setting",
+        default=0,
+    )
+
+    PGVECTOR_TEXT_SEARCH_CONFIG: str = Field(
+        description="Text search configuration of the full-text index (e.g., 'english', 'simple'),"
+        " collections keep the configuration they were created or upgraded with",
+        default="english",
+    )
@@ -145,7 +145,7 @@ class AdvancedChatAppRunner(WorkflowBasedAppRunner):
             )
 
             # init graph
-            graph = self._init_graph(graph_config=workflow.graph_dict)
+            graph = self._init_graph(graph_config=workflow.graph_dict, graph_hash=workflow.graph_hash)
 
         db.session.close()
 
@@ -1,4 +1,5 @@
 import queue
+import threading
 import time
 from abc import abstractmethod
 from enum import Enum
@@ -7,17 +8,24 @@ from typing import Any
 from sqlalchemy.orm import DeclarativeMeta
 
 from configs import dify_config
+from core.app.apps.task_stop_watcher import TaskStopWatcher
 from core.app.entities.app_invoke_entities import InvokeFrom
 from core.app.entities.queue_entities import (
     AppQueueEvent,
     MessageQueueMessage,
+    QueueAgentMessageEvent,
     QueueErrorEvent,
+    QueueLLMChunkEvent,
     QueuePingEvent,
     QueueStopEvent,
+    QueueTextChunkEvent,
     WorkflowQueueMessage,
 )
 from extensions.ext_redis import redis_client
 
+# high-frequency streaming events, their typed fields can never hold SQLAlchemy models
+CHUNK_EVENT_TYPES = (QueueLLMChunkEvent, QueueTextChunkEvent, QueueAgentMessageEvent)
+
 
 class PublishFrom(Enum):
     APPLICATION_MANAGER = 1
@@ -42,6 +50,9 @@ class AppQueueManager:
 
         self._q = q
 
+        self._stopped = threading.Event()
+        TaskStopWatcher.register(self._task_id, self._on_stopped)
+
     def listen(self):
         """
         Listen to queue
@@ -51,33 +62,41 @@ class AppQueueManager:
         listen_timeout = dify_config.APP_MAX_EXECUTION_TIME
         start_time = time.time()
         last_ping_time: int | float = 0
-        while True:
-            try:
-                message = self._q.get(timeout=1)
-                if message is None:
-                    break
-
-                yield message
-            except queue.Empty:
-                continue
-            finally:
-                elapsed_time = time.time() - start_time
-                if elapsed_time >= listen_timeout or self._is_stopped():
-                    # publish two messages to make sure the client can receive the stop signal
-                    # and stop listening after the stop signal processed
-                    self.publish(
-                        QueueStopEvent(stopped_by=QueueStopEvent.StopBy.USER_MANUAL), PublishFrom.TASK_PIPELINE
-                    )
-
-                if elapsed_time // 10 > last_ping_time:
-                    self.publish(QueuePingEvent(), PublishFrom.TASK_PIPELINE)
-                    last_ping_time = elapsed_time // 10
+        try:
+            while True:
+                try:
+                    message = self._q.get(timeout=1)
+                    if message is None:
+                        break
+
+                    yield message
+                except queue.Empty:
+                    continue
+                finally:
+                    elapsed_time = time.time() - start_time
+                    if elapsed_time >= listen_timeout or self._is_stopped():
+                        # publish two messages to make sure the client can receive the stop signal
+                        # and stop listening after the stop signal processed
+                        self.publish(
+                            QueueStopEvent(stopped_by=QueueStopEvent.StopBy.USER_MANUAL), PublishFrom.TASK_PIPELINE
+                        )
+
+                    if elapsed_time // 10 > last_ping_time:
+                        self.publish(QueuePingEvent(), PublishFrom.TASK_PIPELINE)
+                        last_ping_time = elapsed_time // 10
+                        # stop requests the task stop watcher missed, e.g. on a stalled subscription,
+                        # are still picked up from the stop flag
+                        if not self._is_stopped() and self._is_stop_flag_set():
+                            self._on_stopped()
+        finally:
+            TaskStopWatcher.unregister(self._task_id)
 
     def stop_listen(self) -> None:
         """
         Stop listen to queue
         :return:
         """
+        TaskStopWatcher.unregister(self._task_id)
         self._q.put(None)
 
     def publish_error(self, e, pub_from: PublishFrom) -> None:
@@ -96,7 +115,8 @@ class AppQueueManager:
         :param pub_from:
         :return:
         """
-        self._check_for_sqlalchemy_models(event.model_dump())
+        if dify_config.APP_QUEUE_MODEL_CHECK_ENABLED and not isinstance(event, CHUNK_EVENT_TYPES):
+            self._check_for_sqlalchemy_models(event.model_dump())
         self._publish(event, pub_from)
 
     @abstractmethod
@@ -125,18 +145,30 @@ class AppQueueManager:
 
         stopped_cache_key = cls._generate_stopped_cache_key(task_id)
         redis_client.setex(stopped_cache_key, 600, 1)
+        TaskStopWatcher.notify(task_id)
+
+    def _on_stopped(self) -> None:
+        """
+        Called by the task stop watcher when the task is stopped
+        :return:
+        """
+        self._stopped.set()
+        # wake up the listener immediately instead of waiting for the next queue timeout
+        self.publish(QueueStopEvent(stopped_by=QueueStopEvent.StopBy.USER_MANUAL), PublishFrom.TASK_PIPELINE)
 
     def _is_stopped(self) -> bool:
         """
         Check if task is stopped
         :return:
         """
-        stopped_cache_key = AppQueueManager._generate_stopped_cache_key(self._task_id)
-        result = redis_client.get(stopped_cache_key)
-        if result is not None:
-            return True
+        return self._stopped.is_set()
 
-        return False
+    def _is_stop_flag_set(self) -> bool:
+        """
+        Check if the stop flag of the task is set
+        :return:
+        """
+        return redis_client.get(AppQueueManager._generate_stopped_cache_key(self._task_id)) is not None
 
     @classmethod
     def _generate_task_belong_cache_key(cls, task_id: str) -> str:
@@ -0,0 +1,110 @@
+import logging
+import os
+import threading
+import time
+import weakref
+from collections.abc import Callable
+from typing import Optional
+
+from extensions.ext_redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+
+class TaskStopWatcher:
+    """
+    Process-wide watcher of task stop notifications.
+
+    A single Redis pub/sub subscription per process is multiplexed over all tasks listened to locally,
+    so a stop request reaches the right listener as soon as it is published. Listeners still check the stop flag
+    of their task every ping interval, in case the subscription stalls.
+    """
+
+    CHANNEL = "generate_task_stopped"
+
+    _lock = threading.Lock()
+    _callbacks: dict[str, weakref.WeakMethod] = {}
+    _thread: Optional[threading.Thread] = None
+    _pid: Optional[int] = None
+
+    @classmethod
+    def register(cls, task_id: str, callback: Callable[[], None]) -> None:
+        """
+        Register the stop callback of a task, the watcher only keeps a weak reference to it
+        :param task_id: task id
+        :param callback: bound method called once when the task is stopped
+        :return:
+        """
+        with cls._lock:
+            cls._ensure_started()
+            cls._callbacks[task_id] = weakref.WeakMethod(callback)  # type: ignore[arg-type]
+
+    @classmethod
+    def unregister(cls, task_id: str) -> None:
+        with cls._lock:
+            cls._callbacks.pop(task_id, None)
+
+    @classmethod
+    def notify(cls, task_id: str) -> None:
+        """
+        Notify the watchers of all processes that a task is stopped
+        :param task_id: task id
+        :return:
+        """
+        redis_client.publish(cls.CHANNEL, task_id)
+
+    @classmethod
+    def _ensure_started(cls) -> None:
+        # the watcher thread does not survive a fork, start a new one in the child process
+        if cls._thread is not None and cls._pid == os.getpid() and cls._thread.is_alive():
+            return
+        if cls._pid != os.getpid():
+            cls._callbacks = {}
+        cls._pid = os.getpid()
+        cls._thread = threading.Thread(target=cls._watch, name="task-stop-watcher", daemon=True)
+        cls._thread.start()
+
+    @classmethod
+    def _watch(cls) -> None:
+        while True:
+            try:
+                pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(cls.CHANNEL)
+                # stop requests published while not subscribed are recovered from the stop flags
+                cls._check_stop_flags()
+                for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    data = message["data"]
+                    cls._trigger(data.decode("utf-8") if isinstance(data, bytes) else str(data))
+            except Exception:
+                logger.exception("Task stop watcher disconnected, resubscribing")
+            time.sleep(1)
+
+    @classmethod
+    def _check_stop_flags(cls) -> None:
+        from core.app.apps.base_app_queue_manager import AppQueueManager
+
+        with cls._lock:
+            # drop the callbacks of listeners garbage collected without unregistering
+            for task_id in [task_id for task_id, callback_ref in cls._callbacks.items() if callback_ref() is None]:
+                del cls._callbacks[task_id]
+            task_ids = list(cls._callbacks.keys())
+        if not task_ids:
+            return
+        results = redis_client.mget([AppQueueManager._generate_stopped_cache_key(task_id) for task_id in task_ids])
+        for task_id, result in zip(task_ids, results):
+            if result is not None:
+                cls._trigger(task_id)
+
+    @classmethod
+    def _trigger(cls, task_id: str) -> None:
+        with cls._lock:
+            callback_ref = cls._callbacks.pop(task_id, None)
+        callback = callback_ref() if callback_ref else None
+        if callback is None:
+            return
+        try:
+            callback()
+        except Exception:
+            logger.exception(f"Failed to stop task {task_id}")
@@ -61,9 +61,9 @@ class WorkflowBasedAppRunner(AppRunner):
     def __init__(self, queue_manager: AppQueueManager):
         self.queue_manager = queue_manager
 
-    def _init_graph(self, graph_config: Mapping[str, Any]) -> Graph:
+    def _init_graph(self, graph_config: Mapping[str, Any], graph_hash: Optional[str] = None) -> Graph:
         """
-        Init graph
+        Init graph, the graph is shared with other runs of the same graph when its hash is given
         """
         if "nodes" not in graph_config or "edges" not in graph_config:
             raise ValueError("nodes or edges not found in workflow graph")
@@ -74,7 +74,7 @@ class WorkflowBasedAppRunner(AppRunner):
         if not isinstance(graph_config.get("edges"), list):
             raise ValueError("edges in workflow graph must be a list")
         # init graph
-        graph = Graph.init(graph_config=graph_config)
+        graph = Graph.init_cached(graph_config=graph_config, graph_hash=graph_hash)
 
         if not graph:
             raise ValueError("graph not found in workflow")
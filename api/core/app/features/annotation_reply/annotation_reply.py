@@ -2,6 +2,12 @@ import logging
 from typing import Optional
 
 from core.app.entities.app_invoke_entities import InvokeFrom
+from core.app.features.annotation_reply.annotation_reply_cache import (
+    AnnotationReplyCache,
+    AnnotationReplySetting,
+    hash_question,
+    normalize_question,
+)
 from core.rag.datasource.vdb.vector_factory import Vector
 from extensions.ext_database import db
 from models.dataset import Dataset
@@ -25,17 +31,84 @@ class AnnotationReplyFeature:
         :param invoke_from: invoke from
         :return:
         """
-        annotation_setting = (
-            db.session.query(AppAnnotationSetting).filter(AppAnnotationSetting.app_id == app_record.id).first()
-        )
+        try:
+            annotation_setting = self._get_annotation_setting(app_record.id)
+            if not annotation_setting["enabled"]:
+                return None
 
-        if not annotation_setting:
+            # questions matching an annotation verbatim are answered without embedding the query
+            annotation = self._query_by_question(app_record.id, query)
+            score = 1.0
+
+            if not annotation:
+                dataset = Dataset(
+                    id=app_record.id,
+                    tenant_id=app_record.tenant_id,
+                    indexing_technique="high_quality",
+                    embedding_model_provider=annotation_setting["embedding_provider_name"],
+                    embedding_model=annotation_setting["embedding_model_name"],
+                    collection_binding_id=annotation_setting["collection_binding_id"],
+                )
+
+                vector = Vector(dataset, attributes=["doc_id", "annotation_id", "app_id"])
+
+                documents = vector.search_by_vector(
+                    query=query,
+                    top_k=1,
+                    score_threshold=annotation_setting["score_threshold"],
+                    filter={"group_id": [dataset.id]},
+                )
+
+                if documents and documents[0].metadata:
+                    annotation_id = documents[0].metadata["annotation_id"]
+                    score = documents[0].metadata["score"]
+                    annotation = AppAnnotationService.get_annotation_by_id(annotation_id)
+
+            if annotation:
+                if invoke_from in {InvokeFrom.SERVICE_API, InvokeFrom.WEB_APP}:
+                    from_source = "api"
+                else:
+                    from_source = "console"
+
+                # insert annotation history
+                AppAnnotationService.add_annotation_history(
+                    annotation.id,
+                    app_record.id,
+                    annotation.question,
+                    annotation.content,
+                    query,
+                    user_id,
+                    message.id,
+                    from_source,
+                    score,
+                )
+
+                return annotation
+        except Exception as e:
+            logger.warning(f"Query annotation failed, exception: {str(e)}.")
             return None
 
-        collection_binding_detail = annotation_setting.collection_binding_detail
+        return None
 
-        try:
-            score_threshold = annotation_setting.score_threshold or 1
+    def _get_annotation_setting(self, app_id: str) -> AnnotationReplySetting:
+        """
+        Get the annotation reply setting of the app with its resolved collection binding
+        :param app_id: app id
+        :return:
+        """
+        annotation_reply_cache = AnnotationReplyCache(app_id)
+        cached_setting = annotation_reply_cache.get_setting()
+        if cached_setting is not None:
+            return cached_setting
+
+        annotation_setting = (
+            db.session.query(AppAnnotationSetting).filter(AppAnnotationSetting.app_id == app_id).first()
+        )
+        setting: AnnotationReplySetting
+        if not annotation_setting:
+            setting = {"enabled": False}
+        else:
+            collection_binding_detail = annotation_setting.collection_binding_detail
             embedding_provider_name = collection_binding_detail.provider_name
             embedding_model_name = collection_binding_detail.model_name
 
@@ -43,47 +116,52 @@ class AnnotationReplyFeature:
                 embedding_provider_name, embedding_model_name, "annotation"
             )
 
-            dataset = Dataset(
-                id=app_record.id,
-                tenant_id=app_record.tenant_id,
-                indexing_technique="high_quality",
-                embedding_model_provider=embedding_provider_name,
-                embedding_model=embedding_model_name,
-                collection_binding_id=dataset_collection_binding.id,
-            )
+            setting = {
+                "enabled": True,
+                "score_threshold": annotation_setting.score_threshold or 1,
+                "embedding_provider_name": embedding_provider_name,
+                "embedding_model_name": embedding_model_name,
+                "collection_binding_id": dataset_collection_binding.id,
+            }
 
-            vector = Vector(dataset, attributes=["doc_id", "annotation_id", "app_id"])
+        annotation_reply_cache.set_setting(setting)
+        return setting
+
+    def _query_by_question(self, app_id: str, query: str) -> Optional[MessageAnnotation]:
+        """
+        Query the app annotation whose question matches the query once normalized
+        :param app_id: app id
+        :param query: query
+        :return:
+        """
+        if not normalize_question(query):
+            return None
 
-            documents = vector.search_by_vector(
-                query=query, top_k=1, score_threshold=score_threshold, filter={"group_id": [dataset.id]}
+        annotation_reply_cache = AnnotationReplyCache(app_id)
+        cached, annotation_id = annotation_reply_cache.get_annotation_id(query)
+        if not cached:
+            annotations = (
+                db.session.query(MessageAnnotation.id, MessageAnnotation.question)
+                .filter(MessageAnnotation.app_id == app_id)
+                .order_by(MessageAnnotation.created_at.asc())
+                .all()
             )
+            # the latest annotation wins when several have the same question
+            question_index = {
+                hash_question(question): annotation_id for annotation_id, question in annotations if question
+            }
+            annotation_reply_cache.set_question_index(question_index)
+            annotation_id = question_index.get(hash_question(query))
 
-            if documents and documents[0].metadata:
-                annotation_id = documents[0].metadata["annotation_id"]
-                score = documents[0].metadata["score"]
-                annotation = AppAnnotationService.get_annotation_by_id(annotation_id)
-                if annotation:
-                    if invoke_from in {InvokeFrom.SERVICE_API, InvokeFrom.WEB_APP}:
-                        from_source = "api"
-                    else:
-                        from_source = "console"
-
-                    # insert annotation history
-                    AppAnnotationService.add_annotation_history(
-                        annotation.id,
-                        app_record.id,
-                        annotation.question,
-                        annotation.content,
-                        query,
-                        user_id,
-                        message.id,
-                        from_source,
-                        score,
-                    )
-
-                    return annotation
-        except Exception as e:
-            logger.warning(f"Query annotation failed, exception: {str(e)}.")
+        if not annotation_id:
             return None
 
-        return None
+        annotation = AppAnnotationService.get_annotation_by_id(annotation_id)
+        # the index may be stale, so the annotation is checked against the query before replying with it
+        if (
+            not annotation
+            or annotation.app_id != app_id
+            or normalize_question(annotation.question or "") != normalize_question(query)
+        ):
+            return None
+        return annotation
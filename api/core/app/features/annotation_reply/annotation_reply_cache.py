@@ -0,0 +1,118 @@
+import hashlib
+import json
+import unicodedata
+from json import JSONDecodeError
+from typing import Optional, Required, TypedDict, cast
+
+from extensions.ext_redis import redis_client
+
+# entries are deleted whenever annotations or the annotation setting of the app change,
+# the expiry only bounds how long an index rebuilt concurrently with a change may be stale
+ANNOTATION_REPLY_CACHE_EXPIRY = 3600
+
+# field of the question index marking that the index has been built, so apps without annotations are cached too
+_QUESTION_INDEX_BUILT_FIELD = "_built"
+
+
+def normalize_question(question: str) -> str:
+    """
+    Normalize a question for near-exact matching: compatibility normalized, case folded,
+    punctuation removed and whitespace collapsed.
+
+    :param question: question
+    :return: normalized question
+    """
+    question = unicodedata.normalize("NFKC", question).casefold()
+    question = "".join(" " if unicodedata.category(char).startswith("P") else char for char in question)
+    return " ".join(question.split())
+
+
+def hash_question(question: str) -> str:
+    """
+    Hash a question after normalizing it.
+
+    :param question: question
+    :return: hex digest of the normalized question
+    """
+    return hashlib.sha256(normalize_question(question).encode()).hexdigest()
+
+
+class AnnotationReplySetting(TypedDict, total=False):
+    """
+    Annotation reply setting of an app, only `enabled` is set when annotation reply is disabled.
+    """
+
+    enabled: Required[bool]
+    score_threshold: float
+    embedding_provider_name: str
+    embedding_model_name: str
+    collection_binding_id: str
+
+
+class AnnotationReplyCache:
+    """
+    Cache of the annotation reply setting of an app and the index of its annotations by normalized question.
+    """
+
+    def __init__(self, app_id: str):
+        self.setting_cache_key = f"annotation_reply_setting:app_id:{app_id}"
+        self.question_index_cache_key = f"annotation_reply_questions:app_id:{app_id}"
+
+    def get_setting(self) -> Optional[AnnotationReplySetting]:
+        """
+        Get cached annotation reply setting.
+
+        :return: the setting, `{"enabled": False}` when annotation reply is disabled, None when not cached
+        """
+        cached_setting = redis_client.get(self.setting_cache_key)
+        if cached_setting:
+            try:
+                return cast(AnnotationReplySetting, json.loads(cached_setting.decode("utf-8")))
+            except JSONDecodeError:
+                return None
+        return None
+
+    def set_setting(self, setting: AnnotationReplySetting) -> None:
+        """
+        Cache annotation reply setting.
+
+        :param setting: setting
+        :return:
+        """
+        redis_client.setex(self.setting_cache_key, ANNOTATION_REPLY_CACHE_EXPIRY, json.dumps(setting))
+
+    def get_annotation_id(self, question: str) -> tuple[bool, Optional[str]]:
+        """
+        Get the id of the annotation matching a question.
+
+        :param question: question
+        :return: whether the question index is cached, and the id of the matching annotation
+        """
+        built, annotation_id = redis_client.hmget(
+            self.question_index_cache_key, [_QUESTION_INDEX_BUILT_FIELD, hash_question(question)]
+        )
+        if not built:
+            return False, None
+        return True, annotation_id.decode("utf-8") if annotation_id else None
+
+    def set_question_index(self, question_index: dict[str, str]) -> None:
+        """
+        Cache the question index of the app.
+
+        :param question_index: annotation ids by question hash
+        :return:
+        """
+        mapping = {**question_index, _QUESTION_INDEX_BUILT_FIELD: "1"}
+        pipeline = redis_client.pipeline()
+        pipeline.delete(self.question_index_cache_key)
+        pipeline.hset(self.question_index_cache_key, mapping=mapping)
+        pipeline.expire(self.question_index_cache_key, ANNOTATION_REPLY_CACHE_EXPIRY)
+        pipeline.execute()
+
+    def delete(self) -> None:
+        """
+        Delete cached annotation reply setting and question index.
+
+        :return:
+        """
+        redis_client.delete(self.setting_cache_key, self.question_index_cache_key)
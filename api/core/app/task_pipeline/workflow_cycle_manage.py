@@ -5,9 +5,11 @@ from datetime import UTC, datetime
 from typing import Any, Optional, Union, cast
 from uuid import uuid4
 
-from sqlalchemy import func, select
+from sqlalchemy import func, insert, select, update
+from sqlalchemy import inspect as sa_inspect
 from sqlalchemy.orm import Session
 
+from configs import dify_config
 from core.app.entities.app_invoke_entities import AdvancedChatAppGenerateEntity, InvokeFrom, WorkflowAppGenerateEntity
 from core.app.entities.queue_entities import (
     QueueIterationCompletedEvent,
@@ -72,6 +74,11 @@ class WorkflowCycleManage:
         self._application_generate_entity = application_generate_entity
         self._workflow_system_variables = workflow_system_variables
 
+        # write-behind buffer of workflow node executions, keyed by workflow node execution id
+        self._pending_workflow_node_executions: dict[str, WorkflowNodeExecution] = {}
+        self._persisted_workflow_node_execution_ids: set[str] = set()
+        self._workflow_node_executions_flushed_at = time.perf_counter()
+
     def _handle_workflow_run_start(
         self,
         *,
@@ -164,6 +171,8 @@ class WorkflowCycleManage:
         workflow_run.total_steps = total_steps
         workflow_run.finished_at = datetime.now(UTC).replace(tzinfo=None)
 
+        self.flush_workflow_node_executions(session=session)
+
         if trace_manager:
             trace_manager.add_trace_task(
                 TraceTask(
@@ -200,6 +209,8 @@ class WorkflowCycleManage:
         workflow_run.finished_at = datetime.now(UTC).replace(tzinfo=None)
         workflow_run.exceptions_count = exceptions_count
 
+        self.flush_workflow_node_executions(session=session)
+
         if trace_manager:
             trace_manager.add_trace_task(
                 TraceTask(
@@ -246,6 +257,9 @@ class WorkflowCycleManage:
         workflow_run.finished_at = datetime.now(UTC).replace(tzinfo=None)
         workflow_run.exceptions_count = exceptions_count
 
+        # buffered node executions must be persisted to be found as running
+        self.flush_workflow_node_executions(session=session)
+
         stmt = select(WorkflowNodeExecution.node_execution_id).where(
             WorkflowNodeExecution.tenant_id == workflow_run.tenant_id,
             WorkflowNodeExecution.app_id == workflow_run.app_id,
@@ -266,6 +280,10 @@ class WorkflowCycleManage:
             workflow_node_execution.error = error
             workflow_node_execution.finished_at = now
             workflow_node_execution.elapsed_time = (now - workflow_node_execution.created_at).total_seconds()
+            if self._is_workflow_node_execution_write_behind():
+                self._pending_workflow_node_executions[workflow_node_execution.id] = workflow_node_execution
+
+        self.flush_workflow_node_executions(session=session)
 
         if trace_manager:
             trace_manager.add_trace_task(
@@ -306,7 +324,10 @@ class WorkflowCycleManage:
         )
         workflow_node_execution.created_at = datetime.now(UTC).replace(tzinfo=None)
 
-        session.add(workflow_node_execution)
+        if self._is_workflow_node_execution_write_behind():
+            self._buffer_workflow_node_execution(session=session, workflow_node_execution=workflow_node_execution)
+        else:
+            session.add(workflow_node_execution)
 
         self._workflow_node_executions[event.node_execution_id] = workflow_node_execution
         return workflow_node_execution
@@ -336,7 +357,10 @@ class WorkflowCycleManage:
         workflow_node_execution.finished_at = finished_at
         workflow_node_execution.elapsed_time = elapsed_time
 
-        workflow_node_execution = session.merge(workflow_node_execution)
+        if self._is_workflow_node_execution_write_behind():
+            self._buffer_workflow_node_execution(session=session, workflow_node_execution=workflow_node_execution)
+        else:
+            workflow_node_execution = session.merge(workflow_node_execution)
         return workflow_node_execution
 
     def _handle_workflow_node_execution_failed(
@@ -376,7 +400,10 @@ class WorkflowCycleManage:
         workflow_node_execution.elapsed_time = elapsed_time
         workflow_node_execution.execution_metadata = execution_metadata
 
-        workflow_node_execution = session.merge(workflow_node_execution)
+        if self._is_workflow_node_execution_write_behind():
+            self._buffer_workflow_node_execution(session=session, workflow_node_execution=workflow_node_execution)
+        else:
+            workflow_node_execution = session.merge(workflow_node_execution)
         return workflow_node_execution
 
     def _handle_workflow_node_execution_retried(
@@ -427,11 +454,79 @@ class WorkflowCycleManage:
         workflow_node_execution.execution_metadata = execution_metadata
         workflow_node_execution.index = event.node_run_index
 
-        session.add(workflow_node_execution)
+        if self._is_workflow_node_execution_write_behind():
+            self._buffer_workflow_node_execution(session=session, workflow_node_execution=workflow_node_execution)
+        else:
+            session.add(workflow_node_execution)
 
         self._workflow_node_executions[event.node_execution_id] = workflow_node_execution
         return workflow_node_execution
 
+    @staticmethod
+    def _is_workflow_node_execution_write_behind() -> bool:
+        return dify_config.WORKFLOW_NODE_EXECUTION_WRITE_BEHIND_ENABLED
+
+    def _buffer_workflow_node_execution(
+        self, *, session: Session, workflow_node_execution: WorkflowNodeExecution
+    ) -> None:
+        """
+        Buffer workflow node execution, buffered records are persisted in batches
+        :param session: session the records are flushed with once the buffer is full or old enough
+        :param workflow_node_execution: workflow node execution
+        :return:
+        """
+        self._pending_workflow_node_executions[workflow_node_execution.id] = workflow_node_execution
+        if (
+            len(self._pending_workflow_node_executions) >= dify_config.WORKFLOW_NODE_EXECUTION_FLUSH_BATCH_SIZE
+            or time.perf_counter() - self._workflow_node_executions_flushed_at
+            >= dify_config.WORKFLOW_NODE_EXECUTION_FLUSH_INTERVAL
+        ):
+            self.flush_workflow_node_executions(session=session)
+
+    def flush_workflow_node_executions(self, *, session: Session) -> None:
+        """
+        Persist buffered workflow node executions, committed along with the session
+        :param session: session
+        :return:
+        """
+        self._workflow_node_executions_flushed_at = time.perf_counter()
+        if not self._pending_workflow_node_executions:
+            return
+
+        new_rows = []
+        updated_rows = []
+        for workflow_node_execution_id, workflow_node_execution in self._pending_workflow_node_executions.items():
+            row = self._workflow_node_execution_to_row(workflow_node_execution)
+            if workflow_node_execution_id in self._persisted_workflow_node_execution_ids:
+                updated_rows.append(row)
+            else:
+                new_rows.append(row)
+
+        if new_rows:
+            session.execute(insert(WorkflowNodeExecution), new_rows)
+        if updated_rows:
+            session.execute(update(WorkflowNodeExecution), updated_rows)
+
+        self._persisted_workflow_node_execution_ids.update(self._pending_workflow_node_executions.keys())
+        self._pending_workflow_node_executions.clear()
+
+    @staticmethod
+    def _workflow_node_execution_to_row(workflow_node_execution: WorkflowNodeExecution) -> dict[str, Any]:
+        row = {
+            column.key: getattr(workflow_node_execution, column.key)
+            for column in sa_inspect(WorkflowNodeExecution).column_attrs
+        }
+        max_payload_size = dify_config.WORKFLOW_NODE_EXECUTION_MAX_PAYLOAD_SIZE
+        if max_payload_size:
+            for key in ("inputs", "process_data", "outputs"):
+                payload = row[key]
+                if payload and len(payload) > max_payload_size:
+                    row[key] = json.dumps(
+                        {"truncated": True, "size": len(payload), "preview": payload[:max_payload_size]}
+                    )
+        # unset columns keep their server defaults or stored values
+        return {key: value for key, value in row.items() if value is not None}
+
     #################################################
     #             to stream responses               #
     #################################################
@@ -18,6 +18,7 @@ from core.entities.provider_entities import (
 )
 from core.helper import encrypter
 from core.helper.model_provider_cache import ProviderCredentialsCache, ProviderCredentialsCacheType
+from core.helper.provider_configurations_cache import ProviderConfigurationsCache
 from core.model_runtime.entities.model_entities import FetchFrom, ModelType
 from core.model_runtime.entities.provider_entities import (
     ConfigurateMethod,
@@ -261,6 +262,7 @@ class ProviderConfiguration(BaseModel):
         )
 
         provider_model_credentials_cache.delete()
+        ProviderConfigurationsCache(self.tenant_id).delete()
 
         self.switch_preferred_provider_type(ProviderType.CUSTOM)
 
@@ -294,6 +296,7 @@ class ProviderConfiguration(BaseModel):
             )
 
             provider_model_credentials_cache.delete()
+            ProviderConfigurationsCache(self.tenant_id).delete()
 
     def get_custom_model_credentials(
         self, model_type: ModelType, model: str, obfuscated: bool = False
@@ -418,6 +421,7 @@ class ProviderConfiguration(BaseModel):
         )
 
         provider_model_credentials_cache.delete()
+        ProviderConfigurationsCache(self.tenant_id).delete()
 
     def delete_custom_model_credentials(self, model_type: ModelType, model: str) -> None:
         """
@@ -450,6 +454,7 @@ class ProviderConfiguration(BaseModel):
             )
 
             provider_model_credentials_cache.delete()
+            ProviderConfigurationsCache(self.tenant_id).delete()
 
     def enable_model(self, model_type: ModelType, model: str) -> ProviderModelSetting:
         """
@@ -484,6 +489,8 @@ class ProviderConfiguration(BaseModel):
             db.session.add(model_setting)
             db.session.commit()
 
+        ProviderConfigurationsCache(self.tenant_id).delete()
+
         return model_setting
 
     def disable_model(self, model_type: ModelType, model: str) -> ProviderModelSetting:
@@ -519,6 +526,8 @@ class ProviderConfiguration(BaseModel):
             db.session.add(model_setting)
             db.session.commit()
 
+        ProviderConfigurationsCache(self.tenant_id).delete()
+
         return model_setting
 
     def get_provider_model_setting(self, model_type: ModelType, model: str) -> Optional[ProviderModelSetting]:
@@ -586,6 +595,8 @@ class ProviderConfiguration(BaseModel):
             db.session.add(model_setting)
             db.session.commit()
 
+        ProviderConfigurationsCache(self.tenant_id).delete()
+
         return model_setting
 
     def disable_model_load_balancing(self, model_type: ModelType, model: str) -> ProviderModelSetting:
@@ -621,6 +632,8 @@ class ProviderConfiguration(BaseModel):
             db.session.add(model_setting)
             db.session.commit()
 
+        ProviderConfigurationsCache(self.tenant_id).delete()
+
         return model_setting
 
     def get_provider_instance(self) -> ModelProvider:
@@ -676,6 +689,7 @@ class ProviderConfiguration(BaseModel):
             db.session.add(preferred_model_provider)
 
         db.session.commit()
+        ProviderConfigurationsCache(self.tenant_id).delete()
 
     def extract_secret_variables(self, credential_form_schemas: list[CredentialFormSchema]) -> list[str]:
         """
@@ -1,18 +1,26 @@
+import contextvars
+import hashlib
+import json
 import logging
-from collections.abc import Mapping
+import os
+from collections.abc import Generator, Mapping, Sequence
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
 from enum import StrEnum
 from threading import Lock
 from typing import Any, Optional
 
-from httpx import Timeout, post
+from httpx import Client, Limits, Timeout
+from jinja2.exceptions import SecurityError
 from pydantic import BaseModel
 from yarl import URL
 
 from configs import dify_config
 from core.helper.code_executor.javascript.javascript_transformer import NodeJsTemplateTransformer
+from core.helper.code_executor.jinja2.jinja2_sandbox import Jinja2Sandbox
 from core.helper.code_executor.jinja2.jinja2_transformer import Jinja2TemplateTransformer
 from core.helper.code_executor.python3.python3_transformer import Python3TemplateTransformer
-from core.helper.code_executor.template_transformer import TemplateTransformer
+from core.helper.code_executor.template_transformer import BatchTemplateTransformer, TemplateTransformer
 
 logger = logging.getLogger(__name__)
 
@@ -37,10 +45,20 @@ class CodeLanguage(StrEnum):
     JAVASCRIPT = "javascript"
 
 
+# batches running the executions of each code and inputs, with the index of the execution in its batch
+_prefetched_results: contextvars.ContextVar[Optional[dict[str, list[tuple[Future, int]]]]] = contextvars.ContextVar(
+    "code_executor_prefetched_results", default=None
+)
+
+
 class CodeExecutor:
     dependencies_cache: dict[str, str] = {}
     dependencies_cache_lock = Lock()
 
+    _client: Optional[Client] = None
+    _client_pid: Optional[int] = None
+    _client_lock = Lock()
+
     code_template_transformers: dict[CodeLanguage, type[TemplateTransformer]] = {
         CodeLanguage.PYTHON3: Python3TemplateTransformer,
         CodeLanguage.JINJA2: Jinja2TemplateTransformer,
@@ -55,12 +73,34 @@ class CodeExecutor:
 
     supported_dependencies_languages: set[CodeLanguage] = {CodeLanguage.PYTHON3}
 
+    supported_batch_languages: set[CodeLanguage] = {CodeLanguage.PYTHON3, CodeLanguage.JAVASCRIPT}
+
+    @classmethod
+    def _get_client(cls) -> Client:
+        """
+        Get the client of the code execution service shared in the current process,
+        connections are kept alive between executions
+        """
+        with cls._client_lock:
+            # connections must not be shared with a forked process
+            if cls._client is None or cls._client_pid != os.getpid():
+                cls._client = Client(
+                    limits=Limits(
+                        max_connections=dify_config.CODE_EXECUTION_POOL_MAX_CONNECTIONS,
+                        max_keepalive_connections=dify_config.CODE_EXECUTION_POOL_MAX_KEEPALIVE_CONNECTIONS,
+                        keepalive_expiry=dify_config.CODE_EXECUTION_POOL_KEEPALIVE_EXPIRY,
+                    )
+                )
+                cls._client_pid = os.getpid()
+            return cls._client
+
     @classmethod
-    def execute_code(cls, language: CodeLanguage, preload: str, code: str) -> str:
+    def execute_code(cls, language: CodeLanguage, preload: str, code: str, read_timeout: Optional[float] = None) -> str:
         """
         Execute code
         :param language: code language
         :param code: code
+        :param read_timeout: time in seconds to wait for the result, CODE_EXECUTION_READ_TIMEOUT by default
         :return:
         """
         url = URL(str(dify_config.CODE_EXECUTION_ENDPOINT)) / "v1" / "sandbox" / "run"
@@ -75,13 +115,13 @@ class CodeExecutor:
         }
 
         try:
-            response = post(
+            response = cls._get_client().post(
                 str(url),
                 json=data,
                 headers=headers,
                 timeout=Timeout(
                     connect=dify_config.CODE_EXECUTION_CONNECT_TIMEOUT,
-                    read=dify_config.CODE_EXECUTION_READ_TIMEOUT,
+                    read=read_timeout or dify_config.CODE_EXECUTION_READ_TIMEOUT,
                     write=dify_config.CODE_EXECUTION_WRITE_TIMEOUT,
                     pool=None,
                 ),
@@ -130,6 +170,28 @@ class CodeExecutor:
         if not template_transformer:
             raise CodeExecutionError(f"Unsupported language {language}")
 
+        if language == CodeLanguage.JINJA2 and dify_config.CODE_EXECUTION_JINJA2_IN_PROCESS:
+            try:
+                return {"result": Jinja2Sandbox.render(code, inputs)}
+            except SecurityError as e:
+                # the code execution service runs templates without the restrictions of the sandboxed environment
+                logger.debug(f"Render jinja2 template in code execution service, {str(e)}")
+            except Exception as e:
+                raise CodeExecutionError(str(e))
+
+        prefetched_results = _prefetched_results.get()
+        if prefetched_results is not None:
+            try:
+                batch, index = prefetched_results.get(cls._execution_key(language, code, inputs), []).pop(0)
+            except IndexError:
+                # not prefetched, or taken by a concurrent execution with the same inputs
+                pass
+            else:
+                # failed executions and failed batches are executed again on their own
+                results = batch.result()
+                if results is not None and results[index] is not None:
+                    return results[index]
+
         runner, preload = template_transformer.transform_caller(code, inputs)
 
         try:
@@ -138,3 +200,81 @@ class CodeExecutor:
             raise e
 
         return template_transformer.transform_response(response)
+
+    @classmethod
+    def execute_workflow_code_template_batch(
+        cls, language: CodeLanguage, code: str, inputs_list: Sequence[Mapping[str, Any]]
+    ) -> list[Optional[Mapping[str, Any]]]:
+        """
+        Execute code once for each inputs, in one request to the code execution service
+        :param language: code language
+        :param code: code
+        :param inputs_list: inputs of each execution
+        :return: result of each execution, None for failed executions
+        """
+        template_transformer = cls.code_template_transformers.get(language)
+        if language not in cls.supported_batch_languages or not (
+            template_transformer and issubclass(template_transformer, BatchTemplateTransformer)
+        ):
+            raise CodeExecutionError(f"Unsupported language {language} for batch execution")
+
+        runner, preload = template_transformer.transform_batch_caller(code, inputs_list)
+        # the items of a batch run one after another, each gets the time of a single execution
+        read_timeout = dify_config.CODE_EXECUTION_READ_TIMEOUT
+        response = cls.execute_code(
+            language, preload, runner, read_timeout=read_timeout * len(inputs_list) if read_timeout else None
+        )
+        results = template_transformer.transform_batch_response(response)
+        if len(results) != len(inputs_list):
+            raise CodeExecutionError("Got a result count different from the inputs count")
+        return results
+
+    @classmethod
+    @contextmanager
+    def prefetch_workflow_code_template(
+        cls, language: CodeLanguage, code: str, inputs_list: Sequence[Mapping[str, Any]], max_workers: int = 1
+    ) -> Generator[None, None, None]:
+        """
+        Execute code for many inputs in batches of CODE_EXECUTION_BATCH_SIZE, up to `max_workers` batches at a time.
+        Inside the context `execute_workflow_code_template` waits for the batch of the same code and inputs
+        and returns its result. Failed executions are executed again on their own and report their own error.
+        :param language: code language
+        :param code: code
+        :param inputs_list: inputs of each execution
+        :param max_workers: maximum number of batches executed concurrently
+        """
+        batch_size = dify_config.CODE_EXECUTION_BATCH_SIZE
+        if not batch_size or not inputs_list or language not in cls.supported_batch_languages:
+            yield
+            return
+
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="code-execution-batch")
+        prefetched_results: dict[str, list[tuple[Future, int]]] = {}
+        for i in range(0, len(inputs_list), batch_size):
+            inputs_batch = inputs_list[i : i + batch_size]
+            batch = executor.submit(cls._execute_workflow_code_template_batch, language, code, inputs_batch)
+            for index, inputs in enumerate(inputs_batch):
+                prefetched_results.setdefault(cls._execution_key(language, code, inputs), []).append((batch, index))
+
+        _prefetched_results.set(prefetched_results)
+        try:
+            yield
+        finally:
+            # not reset with a token, the context may be closed from another context than it was entered in
+            _prefetched_results.set(None)
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    @classmethod
+    def _execute_workflow_code_template_batch(
+        cls, language: CodeLanguage, code: str, inputs_list: Sequence[Mapping[str, Any]]
+    ) -> Optional[list[Optional[Mapping[str, Any]]]]:
+        try:
+            return cls.execute_workflow_code_template_batch(language, code, inputs_list)
+        except (CodeExecutionError, ValueError) as e:
+            logger.warning(f"Batch code execution failed, executing its items one by one: {str(e)}")
+            return None
+
+    @staticmethod
+    def _execution_key(language: CodeLanguage, code: str, inputs: Mapping[str, Any]) -> str:
+        execution = json.dumps([language, code, inputs], ensure_ascii=False, sort_keys=True, default=str)
+        return hashlib.sha256(execution.encode()).hexdigest()
@@ -1,9 +1,9 @@
 from textwrap import dedent
 
-from core.helper.code_executor.template_transformer import TemplateTransformer
+from core.helper.code_executor.template_transformer import BatchTemplateTransformer
 
 
-class NodeJsTemplateTransformer(TemplateTransformer):
+class NodeJsTemplateTransformer(BatchTemplateTransformer):
     @classmethod
     def get_runner_script(cls) -> str:
         runner_script = dedent(
@@ -24,3 +24,32 @@ class NodeJsTemplateTransformer(TemplateTransformer):
             """
         )
         return runner_script
+
+    @classmethod
+    def get_batch_runner_script(cls) -> str:
+        runner_script = dedent(
+            f"""
+            // declare main function
+            {cls._code_placeholder}
+            
+            // decode and prepare input objects
+            var inputs_objs = JSON.parse(Buffer.from('{cls._inputs_placeholder}', 'base64').toString('utf-8'))
+            
+            // execute main function for each input object, failed executions output null
+            var output_objs = inputs_objs.map(function (inputs_obj) {{
+                try {{
+                    var output_obj = main(inputs_obj)
+                    JSON.stringify(output_obj)
+                    return output_obj
+                }} catch (e) {{
+                    return null
+                }}
+            }})
+            
+            // convert outputs to json and print
+            var output_json = JSON.stringify(output_objs)
+            var result = `<<RESULT>>${{output_json}}<<RESULT>>`
+            console.log(result)
+            """
+        )
+        return runner_script
@@ -0,0 +1,243 @@
+import contextvars
+import hashlib
+import json
+import operator
+import re
+import string
+import threading
+import time
+import types
+from collections.abc import Iterable, Iterator, Mapping, Sized
+from typing import Any, ClassVar, Optional
+
+from jinja2 import Template, nodes, pass_eval_context
+from jinja2.compiler import CodeGenerator, Frame
+from jinja2.exceptions import SecurityError
+from jinja2.filters import do_center, do_format, do_indent, do_replace, sync_do_join
+from jinja2.sandbox import SandboxedEnvironment
+
+from configs import dify_config
+from core.helper.lru_cache import TTLCache
+
+
+class Jinja2SandboxLimitError(Exception):
+    pass
+
+
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("jinja2_sandbox_deadline", default=None)
+
+_PRINTF_SPEC_PATTERN = re.compile(r"%(?:\([^)]*\))?[-#0 +]*(\*|\d+)?(?:\.(\*|\d+))?")
+
+
+def _check_deadline() -> None:
+    deadline = _deadline.get()
+    if deadline is not None and time.monotonic() > deadline:
+        raise Jinja2SandboxLimitError(
+            f"Template rendering exceeds the time limit of {dify_config.CODE_EXECUTION_JINJA2_TIMEOUT}s"
+        )
+
+
+def _limit_iteration(iterable: Iterable[Any]) -> Iterator[Any]:
+    for value in iterable:
+        _check_deadline()
+        yield value
+
+
+def _check_length(length: int) -> None:
+    max_length = dify_config.CODE_EXECUTION_JINJA2_MAX_OUTPUT_LENGTH
+    if length > max_length:
+        raise Jinja2SandboxLimitError(f"Template output exceeds the maximum length of {max_length}")
+
+
+def _check_width(width: Any) -> None:
+    # padded and formatted values are at least as long as their width or precision
+    if isinstance(width, int):
+        _check_length(width)
+
+
+def _check_printf_format(format_string: str) -> None:
+    for width, precision in _PRINTF_SPEC_PATTERN.findall(format_string):
+        if "*" in (width, precision):
+            raise SecurityError("printf-style widths taken from the arguments are not supported")
+        _check_width(int(width or 0))
+        _check_width(int(precision or 0))
+
+
+def _check_format_string(format_string: str) -> None:
+    for _, _, format_spec, _ in string.Formatter().parse(format_string):
+        if not format_spec:
+            continue
+        if "{" in format_spec:
+            raise SecurityError("format specs taken from the arguments are not supported")
+        for number in re.findall(r"\d+", format_spec):
+            _check_width(int(number))
+
+
+def _check_join(separator: str, items: Any) -> None:
+    if isinstance(items, Sized):
+        _check_length(len(separator) * max(len(items) - 1, 0))
+
+
+def _check_replace(value: str, old: str, new: str, count: Optional[int] = None) -> None:
+    replacements = value.count(old) if old else len(value) + 1
+    if count is not None and count >= 0:
+        replacements = min(replacements, count)
+    _check_length(len(value) + replacements * len(new))
+
+
+def _center(value: str, width: int = 80) -> str:
+    _check_width(width)
+    return do_center(value, width)
+
+
+def _indent(s: str, width: int | str = 4, first: bool = False, blank: bool = False) -> str:
+    indentation = width if isinstance(width, int) else len(width)
+    _check_length(len(str(s)) + (str(s).count("\n") + 1) * indentation)
+    return do_indent(s, width, first, blank)
+
+
+def _format(value: str, *args: Any, **kwargs: Any) -> str:
+    _check_printf_format(str(value))
+    return do_format(value, *args, **kwargs)
+
+
+@pass_eval_context
+def _join(eval_ctx: nodes.EvalContext, value: Any, d: str = "", attribute: Optional[str | int] = None) -> str:
+    _check_join(d, value)
+    return sync_do_join(eval_ctx, value, d, attribute)
+
+
+@pass_eval_context
+def _replace(eval_ctx: nodes.EvalContext, s: str, old: str, new: str, count: Optional[int] = None) -> str:
+    _check_replace(str(s), str(old), str(new), count)
+    return do_replace(eval_ctx, s, old, new, count)
+
+
+def _check_str_method(value: str, name: str, args: tuple, kwargs: dict) -> None:
+    if name in {"center", "ljust", "rjust", "zfill"}:
+        _check_width(args[0] if args else kwargs.get("width"))
+    elif name == "expandtabs":
+        tab_size = args[0] if args else kwargs.get("tabsize", 8)
+        if isinstance(tab_size, int):
+            _check_length(len(value) + value.count("\t") * tab_size)
+    elif name == "replace" and len(args) >= 2 and isinstance(args[0], str) and isinstance(args[1], str):
+        count = args[2] if len(args) > 2 else kwargs.get("count")
+        _check_replace(value, args[0], args[1], count if isinstance(count, int) else None)
+    elif name == "join" and args:
+        _check_join(value, args[0])
+
+
+class _LimitedCodeGenerator(CodeGenerator):
+    def visit_For(self, node: nodes.For, frame: Frame) -> None:  # noqa: N802
+        # loops without output never return to the renderer, so their iterations check the deadline themselves
+        node.iter = nodes.Call(
+            nodes.EnvironmentAttribute("limit_iteration"), [node.iter], [], None, None, lineno=node.iter.lineno
+        )
+        super().visit_For(node, frame)
+
+
+class _LimitedSandboxedEnvironment(SandboxedEnvironment):
+    """
+    Sandboxed environment stopping loops at the deadline and refusing operations building values larger than
+    the output limit
+    """
+
+    code_generator_class = _LimitedCodeGenerator
+    intercepted_binops = frozenset(["*", "**", "%", "+"])
+
+    def __init__(self):
+        super().__init__()
+        self.filters.update(center=_center, indent=_indent, format=_format, join=_join, replace=_replace)
+        self.limit_iteration = _limit_iteration
+
+    def call_binop(self, context, operator_name: str, left: Any, right: Any) -> Any:
+        if operator_name == "*":
+            for sequence, times in ((left, right), (right, left)):
+                if isinstance(sequence, Sized) and isinstance(times, int):
+                    _check_length(len(sequence) * times)
+            return operator.mul(left, right)
+
+        if operator_name == "%":
+            if isinstance(left, str):
+                _check_printf_format(left)
+            return operator.mod(left, right)
+
+        if operator_name == "+":
+            # each operand is within the limit, so the result is checked once it is built
+            result = operator.add(left, right)
+            if isinstance(result, Sized):
+                _check_length(len(result))
+            return result
+
+        # a number of n bits has about 0.3 * n decimal digits
+        if isinstance(left, int) and isinstance(right, int) and right > 0:
+            _check_length(int(right * abs(left).bit_length() * 0.3))
+        return operator.pow(left, right)
+
+    def call(__self, __context, __obj: Any, *args: Any, **kwargs: Any) -> Any:  # noqa: N805
+        if isinstance(__obj, types.BuiltinMethodType) and isinstance(__obj.__self__, str):
+            _check_str_method(__obj.__self__, __obj.__name__, args, kwargs)
+        return super().call(__context, __obj, *args, **kwargs)
+
+    def wrap_str_format(self, value: Any) -> Optional[Any]:
+        wrapper = super().wrap_str_format(value)
+        if wrapper is not None:
+            _check_format_string(value.__self__)
+        return wrapper
+
+
+class Jinja2Sandbox:
+    """
+    Render Jinja2 templates in a sandboxed environment of the current process.
+
+    Compiled templates are cached by the hash of their source, so rendering a template again only costs the rendering.
+    Templates run with the restrictions of Jinja2's `SandboxedEnvironment`, rendering stops when it exceeds
+    the configured time, and operations building values longer than the output limit are refused.
+    Memory is not bounded otherwise, for instance values can still grow by appending to lists in a loop,
+    so templates should only be rendered in process when their authors are trusted.
+    """
+
+    _lock: ClassVar[threading.Lock] = threading.Lock()
+    _environment: ClassVar[Optional[SandboxedEnvironment]] = None
+    _templates: ClassVar[TTLCache] = TTLCache(dify_config.CODE_EXECUTION_JINJA2_TEMPLATE_CACHE_SIZE)
+
+    @classmethod
+    def render(cls, template: str, inputs: Mapping[str, Any]) -> str:
+        """
+        Render template
+        :param template: template
+        :param inputs: inputs
+        :return: rendered template
+        :raises jinja2.exceptions.SecurityError: if the template uses an operation unsafe to run in process
+        :raises Jinja2SandboxLimitError: if rendering exceeds the time or output length limit
+        """
+        compiled_template = cls._get_template(template)
+        # templates only get the JSON data of the inputs, like in the code execution service
+        context = json.loads(json.dumps(inputs, ensure_ascii=False))
+
+        token = _deadline.set(time.monotonic() + dify_config.CODE_EXECUTION_JINJA2_TIMEOUT)
+        try:
+            chunks = []
+            length = 0
+            for chunk in compiled_template.generate(**context):
+                chunks.append(chunk)
+                length += len(chunk)
+                _check_length(length)
+                _check_deadline()
+            return "".join(chunks)
+        finally:
+            _deadline.reset(token)
+
+    @classmethod
+    def _get_template(cls, template: str) -> Template:
+        with cls._lock:
+            if cls._environment is None:
+                cls._environment = _LimitedSandboxedEnvironment()
+            environment = cls._environment
+
+        template_hash = hashlib.sha256(template.encode()).hexdigest()
+        compiled_template: Optional[Template] = cls._templates.get(template_hash)
+        if compiled_template is None:
+            compiled_template = environment.from_string(template)
+            cls._templates.put(template_hash, compiled_template)
+        return compiled_template
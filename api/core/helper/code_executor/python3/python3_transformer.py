@@ -1,9 +1,9 @@
 from textwrap import dedent
 
-from core.helper.code_executor.template_transformer import TemplateTransformer
+from core.helper.code_executor.template_transformer import BatchTemplateTransformer
 
 
-class Python3TemplateTransformer(TemplateTransformer):
+class Python3TemplateTransformer(BatchTemplateTransformer):
     @classmethod
     def get_runner_script(cls) -> str:
         runner_script = dedent(f"""
@@ -25,3 +25,32 @@ class Python3TemplateTransformer(TemplateTransformer):
             print(result)
             """)
         return runner_script
+
+    @classmethod
+    def get_batch_runner_script(cls) -> str:
+        runner_script = dedent(f"""
+            # declare main function
+            {cls._code_placeholder}
+            
+            import json
+            from base64 import b64decode
+            
+            # decode and prepare input dicts
+            inputs_objs = json.loads(b64decode('{cls._inputs_placeholder}').decode('utf-8'))
+            
+            # execute main function for each input dict, failed executions output null
+            output_objs = []
+            for inputs_obj in inputs_objs:
+                try:
+                    output_obj = main(**inputs_obj)
+                    json.dumps(output_obj)
+                except Exception:
+                    output_obj = None
+                output_objs.append(output_obj)
+            
+            # convert outputs to json and print
+            output_json = json.dumps(output_objs, indent=4)
+            result = f'''<<RESULT>>{{output_json}}<<RESULT>>'''
+            print(result)
+            """)
+        return runner_script
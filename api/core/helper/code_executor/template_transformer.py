@@ -2,8 +2,8 @@ import json
 import re
 from abc import ABC, abstractmethod
 from base64 import b64encode
-from collections.abc import Mapping
-from typing import Any
+from collections.abc import Mapping, Sequence
+from typing import Any, Optional
 
 
 class TemplateTransformer(ABC):
@@ -57,7 +57,7 @@ class TemplateTransformer(ABC):
         pass
 
     @classmethod
-    def serialize_inputs(cls, inputs: Mapping[str, Any]) -> str:
+    def serialize_inputs(cls, inputs: Mapping[str, Any] | Sequence[Mapping[str, Any]]) -> str:
         inputs_json_str = json.dumps(inputs, ensure_ascii=False).encode()
         input_base64_encoded = b64encode(inputs_json_str).decode("utf-8")
         return input_base64_encoded
@@ -77,3 +77,50 @@ class TemplateTransformer(ABC):
         Get preload script
         """
         return ""
+
+
+class BatchTemplateTransformer(TemplateTransformer):
+    """
+    Template transformer of a language whose code can be executed for many inputs in one run
+    """
+
+    @classmethod
+    def transform_batch_caller(cls, code: str, inputs_list: Sequence[Mapping[str, Any]]) -> tuple[str, str]:
+        """
+        Transform code to a runner executing it once for each inputs
+        :param code: code
+        :param inputs_list: inputs of each execution
+        :return: runner, preload
+        """
+        script = cls.get_batch_runner_script()
+        script = script.replace(cls._code_placeholder, code)
+        script = script.replace(cls._inputs_placeholder, cls.serialize_inputs(inputs_list))
+
+        return script, cls.get_preload_script()
+
+    @classmethod
+    def transform_batch_response(cls, response: str) -> list[Optional[Mapping[str, Any]]]:
+        """
+        Transform response of a batch runner to dicts
+        :param response: response
+        :return: result of each execution, None for failed executions
+        """
+        try:
+            results = json.loads(cls.extract_result_str_from_response(response))
+        except json.JSONDecodeError:
+            raise ValueError("failed to parse response")
+        if not isinstance(results, list):
+            raise ValueError("result must be a list")
+        return [
+            result if isinstance(result, dict) and all(isinstance(k, str) for k in result) else None
+            for result in results
+        ]
+
+    @classmethod
+    @abstractmethod
+    def get_batch_runner_script(cls) -> str:
+        """
+        Get runner script executing the code once for each inputs of a list,
+        it prints the list of results with None for failed executions
+        """
+        pass
@@ -1,7 +1,13 @@
 import base64
+from typing import Optional
 
+from configs import dify_config
+from core.helper.lru_cache import TTLCache
 from libs import rsa
 
+# decrypted tokens by tenant and token, so credentials used several times in a run only cost one RSA decryption
+_decrypted_token_cache = TTLCache(dify_config.DECRYPTED_TOKEN_CACHE_SIZE, dify_config.DECRYPTED_TOKEN_CACHE_TTL)
+
 
 def obfuscated_token(token: str):
     if not token:
@@ -22,18 +28,39 @@ def encrypt_token(tenant_id: str, token: str):
 
 
 def decrypt_token(tenant_id: str, token: str):
-    return rsa.decrypt(base64.b64decode(token), tenant_id)
+    decrypted_token = _get_cached_decrypted_token(tenant_id, token)
+    if decrypted_token is None:
+        decrypted_token = rsa.decrypt(base64.b64decode(token), tenant_id)
+        _set_cached_decrypted_token(tenant_id, token, decrypted_token)
+    return decrypted_token
 
 
 def batch_decrypt_token(tenant_id: str, tokens: list[str]):
-    rsa_key, cipher_rsa = rsa.get_decrypt_decoding(tenant_id)
+    decrypted_tokens = [_get_cached_decrypted_token(tenant_id, token) for token in tokens]
+    if all(decrypted_token is not None for decrypted_token in decrypted_tokens):
+        return decrypted_tokens
 
-    return [rsa.decrypt_token_with_decoding(base64.b64decode(token), rsa_key, cipher_rsa) for token in tokens]
+    rsa_key, cipher_rsa = rsa.get_decrypt_decoding(tenant_id)
+    for i, token in enumerate(tokens):
+        if decrypted_tokens[i] is None:
+            decrypted_token = rsa.decrypt_token_with_decoding(base64.b64decode(token), rsa_key, cipher_rsa, tenant_id)
+            _set_cached_decrypted_token(tenant_id, token, decrypted_token)
+            decrypted_tokens[i] = decrypted_token
+    return decrypted_tokens
 
 
 def get_decrypt_decoding(tenant_id: str):
     return rsa.get_decrypt_decoding(tenant_id)
 
 
-def decrypt_token_with_decoding(token: str, rsa_key, cipher_rsa):
-    return rsa.decrypt_token_with_decoding(base64.b64decode(token), rsa_key, cipher_rsa)
+def decrypt_token_with_decoding(token: str, rsa_key, cipher_rsa, tenant_id: Optional[str] = None):
+    return rsa.decrypt_token_with_decoding(base64.b64decode(token), rsa_key, cipher_rsa, tenant_id)
+
+
+def _get_cached_decrypted_token(tenant_id: str, token: str) -> Optional[str]:
+    decrypted_token: Optional[str] = _decrypted_token_cache.get((tenant_id, token))
+    return decrypted_token
+
+
+def _set_cached_decrypted_token(tenant_id: str, token: str, decrypted_token: str) -> None:
+    _decrypted_token_cache.put((tenant_id, token), decrypted_token)
@@ -1,5 +1,7 @@
+import threading
+import time
 from collections import OrderedDict
-from typing import Any
+from typing import Any, Optional
 
 
 class LRUCache:
@@ -20,3 +22,53 @@ class LRUCache:
         self.cache[key] = value
         if len(self.cache) > self.capacity:
             self.cache.popitem(last=False)  # pop the first item
+
+    def delete(self, key: Any) -> None:
+        self.cache.pop(key, None)
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries expire a time to live after they were put.
+
+    A capacity or time to live of 0 disables the cache, entries never expire when the time to live is None.
+    """
+
+    def __init__(self, capacity: int, ttl: Optional[float] = None):
+        self.capacity = capacity
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._cache = LRUCache(capacity)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.capacity) and self.ttl != 0
+
+    def get(self, key: Any) -> Any:
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            cached_at, value = entry
+            if self.ttl is not None and time.monotonic() - cached_at > self.ttl:
+                self._cache.delete(key)
+                return None
+        return value
+
+    def put(self, key: Any, value: Any) -> None:
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._cache.put(key, (time.monotonic(), value))
+
+    def delete(self, key: Any) -> None:
+        with self._lock:
+            self._cache.delete(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.cache.clear()
@@ -0,0 +1,91 @@
+from typing import TYPE_CHECKING, Optional
+
+from configs import dify_config
+from core.helper.lru_cache import TTLCache
+from extensions.ext_redis import redis_client
+
+if TYPE_CHECKING:
+    from core.entities.provider_configuration import ProviderConfigurations
+
+
+class ProviderConfigurationsCache:
+    """
+    Per-process cache of the provider configurations assembled for a tenant.
+
+    Entries are tagged with the tenant version stored in Redis, every write to the provider, credential or
+    load balancing records of a tenant bumps that version so all processes rebuild on their next read.
+    """
+
+    _cache = TTLCache(dify_config.PROVIDER_CONFIGURATIONS_CACHE_SIZE, dify_config.PROVIDER_CONFIGURATIONS_CACHE_TTL)
+
+    def __init__(self, tenant_id: str):
+        self.tenant_id = tenant_id
+        self.version_cache_key = f"provider_configurations_version:tenant_id:{tenant_id}"
+
+    def get_version(self) -> int:
+        """
+        Get current version of the tenant provider configurations.
+
+        :return:
+        """
+        version = redis_client.get(self.version_cache_key)
+        return int(version) if version else 0
+
+    def get(self, version: int) -> Optional["ProviderConfigurations"]:
+        """
+        Get cached provider configurations if they were built at the given version.
+
+        :param version: current version of the tenant provider configurations
+        :return:
+        """
+        entry = self._cache.get(self.tenant_id)
+        if not entry:
+            return None
+
+        cached_version, configurations = entry
+        if cached_version != version:
+            return None
+
+        return self._copy(configurations)
+
+    def set(self, version: int, configurations: "ProviderConfigurations") -> None:
+        """
+        Cache provider configurations built at the given version.
+
+        :param version: version read before building the provider configurations
+        :param configurations: provider configurations
+        :return:
+        """
+        if not self._cache.enabled:
+            return
+
+        self._cache.put(self.tenant_id, (version, self._copy(configurations)))
+
+    def delete(self) -> None:
+        """
+        Invalidate cached provider configurations of the tenant in all processes.
+
+        :return:
+        """
+        redis_client.incr(self.version_cache_key)
+        self._cache.delete(self.tenant_id)
+
+    @staticmethod
+    def _copy(configurations: "ProviderConfigurations") -> "ProviderConfigurations":
+        # callers mutate credentials and load balancing configs in place, only the provider schemas are shared
+        return configurations.model_copy(
+            update={
+                "configurations": {
+                    provider_name: configuration.model_copy(
+                        update={
+                            "system_configuration": configuration.system_configuration.model_copy(deep=True),
+                            "custom_configuration": configuration.custom_configuration.model_copy(deep=True),
+                            "model_settings": [
+                                model_setting.model_copy(deep=True) for model_setting in configuration.model_settings
+                            ],
+                        }
+                    )
+                    for provider_name, configuration in configurations.configurations.items()
+                }
+            }
+        )
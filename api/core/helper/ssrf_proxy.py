@@ -3,7 +3,12 @@ Proxy requests to avoid SSRF
 """
 
 import logging
+import os
+import threading
 import time
+from collections.abc import Generator
+from contextlib import contextmanager
+from typing import Any, Optional
 
 import httpx
 
@@ -21,6 +26,80 @@ class MaxRetriesExceededError(ValueError):
     pass
 
 
+class ResponseTooLargeError(ValueError):
+    """Raised when the body of a response exceeds the maximum size."""
+
+    pass
+
+
+_transports_lock = threading.Lock()
+_transports: dict[tuple, dict[str, Any]] = {}
+_transports_pid: Optional[int] = None
+
+
+def _http2_enabled() -> bool:
+    if not dify_config.SSRF_HTTP2_ENABLED:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        logging.warning("SSRF_HTTP2_ENABLED is set but the h2 package is not installed, falling back to HTTP/1.1")
+        return False
+    return True
+
+
+def _create_transports() -> dict[str, Any]:
+    http2 = _http2_enabled()
+    limits = httpx.Limits(
+        max_connections=dify_config.SSRF_POOL_MAX_CONNECTIONS,
+        max_keepalive_connections=dify_config.SSRF_POOL_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=dify_config.SSRF_POOL_KEEPALIVE_EXPIRY,
+    )
+    if dify_config.SSRF_PROXY_ALL_URL:
+        # mounted by scheme so that proxies from the environment do not take precedence
+        transport = httpx.HTTPTransport(proxy=dify_config.SSRF_PROXY_ALL_URL, http2=http2, limits=limits)
+        return {"mounts": {"http://": transport, "https://": transport}}
+    elif dify_config.SSRF_PROXY_HTTP_URL and dify_config.SSRF_PROXY_HTTPS_URL:
+        return {
+            "mounts": {
+                "http://": httpx.HTTPTransport(proxy=dify_config.SSRF_PROXY_HTTP_URL, http2=http2, limits=limits),
+                "https://": httpx.HTTPTransport(proxy=dify_config.SSRF_PROXY_HTTPS_URL, http2=http2, limits=limits),
+            }
+        }
+    else:
+        return {"transport": httpx.HTTPTransport(http2=http2, limits=limits)}
+
+
+def _get_client() -> httpx.Client:
+    """
+    Get a client using the pooled transports of the current proxy configuration, connections are kept alive
+    between requests while cookies are only kept for the request made with the client
+    """
+    global _transports_pid
+
+    key = (
+        dify_config.SSRF_PROXY_ALL_URL,
+        dify_config.SSRF_PROXY_HTTP_URL,
+        dify_config.SSRF_PROXY_HTTPS_URL,
+        dify_config.SSRF_HTTP2_ENABLED,
+        dify_config.SSRF_POOL_MAX_CONNECTIONS,
+        dify_config.SSRF_POOL_MAX_KEEPALIVE_CONNECTIONS,
+        dify_config.SSRF_POOL_KEEPALIVE_EXPIRY,
+    )
+    with _transports_lock:
+        # connections must not be shared with a forked process
+        if _transports_pid != os.getpid():
+            _transports.clear()
+            _transports_pid = os.getpid()
+
+        transports = _transports.get(key)
+        if transports is None:
+            transports = _transports[key] = _create_transports()
+
+    # the client is not closed, closing it would close the shared transports
+    return httpx.Client(**transports)
+
+
 def make_request(method, url, max_retries=SSRF_DEFAULT_MAX_RETRIES, **kwargs):
     if "allow_redirects" in kwargs:
         allow_redirects = kwargs.pop("allow_redirects")
@@ -39,23 +118,21 @@ def make_request(method, url, max_retries=SSRF_DEFAULT_MAX_RETRIES, **kwargs):
     stream = kwargs.pop("stream", False)
     while retries <= max_retries:
         try:
-            if dify_config.SSRF_PROXY_ALL_URL:
-                with httpx.Client(proxy=dify_config.SSRF_PROXY_ALL_URL) as client:
-                    response = client.request(method=method, url=url, **kwargs)
-            elif dify_config.SSRF_PROXY_HTTP_URL and dify_config.SSRF_PROXY_HTTPS_URL:
-                proxy_mounts = {
-                    "http://": httpx.HTTPTransport(proxy=dify_config.SSRF_PROXY_HTTP_URL),
-                    "https://": httpx.HTTPTransport(proxy=dify_config.SSRF_PROXY_HTTPS_URL),
-                }
-                with httpx.Client(mounts=proxy_mounts) as client:
-                    response = client.request(method=method, url=url, **kwargs)
+            client = _get_client()
+            if stream:
+                # the body is not read, the caller reads it from the response and closes the response
+                follow_redirects = kwargs.get("follow_redirects", False)
+                request = client.build_request(
+                    method=method, url=url, **{k: v for k, v in kwargs.items() if k != "follow_redirects"}
+                )
+                response = client.send(request, stream=True, follow_redirects=follow_redirects)
             else:
-                with httpx.Client() as client:
-                    response = client.request(method=method, url=url, **kwargs)
+                response = client.request(method=method, url=url, **kwargs)
 
             if response.status_code not in STATUS_FORCELIST:
                 return response
             else:
+                response.close()
                 logging.warning(f"Received status code {response.status_code} for URL {url} which is in the force list")
 
         except httpx.RequestError as e:
@@ -69,6 +146,48 @@ def make_request(method, url, max_retries=SSRF_DEFAULT_MAX_RETRIES, **kwargs):
     raise MaxRetriesExceededError(f"Reached maximum retries ({max_retries}) for URL {url}")
 
 
+@contextmanager
+def stream(method, url, max_retries=SSRF_DEFAULT_MAX_RETRIES, **kwargs) -> Generator[httpx.Response, None, None]:
+    """
+    Make a request without reading the body of the response, read it with `iter_response` or `read_response`
+    """
+    response = make_request(method, url, max_retries=max_retries, stream=True, **kwargs)
+    try:
+        yield response
+    finally:
+        response.close()
+
+
+def iter_response(response: httpx.Response, max_size: Optional[int] = None) -> Generator[bytes, None, None]:
+    """
+    Iterate over the body of a response
+    :param response: response made with `stream=True`
+    :param max_size: maximum size of the body in bytes, defaults to SSRF_DEFAULT_MAX_RESPONSE_SIZE
+    :raises ResponseTooLargeError: as soon as the body exceeds the maximum size
+    """
+    max_size = max_size or dify_config.SSRF_DEFAULT_MAX_RESPONSE_SIZE
+    content_length = response.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_size:
+        raise ResponseTooLargeError(f"Response size {content_length} exceeds the maximum size of {max_size} bytes")
+
+    size = 0
+    for chunk in response.iter_bytes():
+        size += len(chunk)
+        if size > max_size:
+            raise ResponseTooLargeError(f"Response size exceeds the maximum size of {max_size} bytes")
+        yield chunk
+
+
+def read_response(response: httpx.Response, max_size: Optional[int] = None) -> bytes:
+    """
+    Read the body of a response, the body is returned rather than kept as `response.content`
+    :param response: response made with `stream=True`
+    :param max_size: maximum size of the body in bytes, defaults to SSRF_DEFAULT_MAX_RESPONSE_SIZE
+    :raises ResponseTooLargeError: as soon as the body exceeds the maximum size
+    """
+    return b"".join(iter_response(response, max_size))
+
+
 def get(url, max_retries=SSRF_DEFAULT_MAX_RETRIES, **kwargs):
     return make_request("GET", url, max_retries=max_retries, **kwargs)
 
@@ -1,8 +1,12 @@
-from collections.abc import Sequence
-from typing import Optional
+from collections import defaultdict
+from collections.abc import Iterator, Sequence
+from itertools import islice
+from typing import Any, Optional
+
+from sqlalchemy import tuple_
 
 from core.app.app_config.features.file_upload.manager import FileUploadConfigManager
-from core.file import file_manager
+from core.file import FileUploadConfig, file_manager
 from core.model_manager import ModelInstance
 from core.model_runtime.entities import (
     AssistantPromptMessage,
@@ -13,11 +17,17 @@ from core.model_runtime.entities import (
     TextPromptMessageContent,
     UserPromptMessage,
 )
-from core.prompt.utils.extract_thread_messages import extract_thread_messages
+from core.prompt.utils.extract_thread_messages import iter_thread_messages
 from extensions.ext_database import db
+from extensions.ext_redis import redis_client
 from factories import file_factory
 from models.model import AppMode, Conversation, Message, MessageFile
-from models.workflow import WorkflowRun
+from models.workflow import Workflow, WorkflowRun
+
+# conversation messages are loaded and token counted newest first, one page at a time
+HISTORY_PAGE_SIZE = 50
+MAX_HISTORY_MESSAGE_LIMIT = 500
+MESSAGE_TOKENS_CACHE_TTL = 86400
 
 
 class TokenBufferMemory:
@@ -33,101 +43,198 @@ class TokenBufferMemory:
         :param max_token_limit: max token limit
         :param message_limit: message limit
         """
-        app_record = self.conversation.app
-
-        # fetch limited messages, and return reversed
-        query = (
-            db.session.query(
-                Message.id,
-                Message.query,
-                Message.answer,
-                Message.created_at,
-                Message.workflow_run_id,
-                Message.parent_message_id,
-            )
-            .filter(
-                Message.conversation_id == self.conversation.id,
-            )
-            .order_by(Message.created_at.desc())
-        )
-
         if message_limit and message_limit > 0:
-            message_limit = min(message_limit, 500)
+            message_limit = min(message_limit, MAX_HISTORY_MESSAGE_LIMIT)
         else:
-            message_limit = 500
-
-        messages = query.limit(message_limit).all()
+            message_limit = MAX_HISTORY_MESSAGE_LIMIT
 
         # instead of all messages from the conversation, we only need to extract messages
         # that belong to the thread of last message
-        thread_messages = extract_thread_messages(messages)
+        thread_messages = iter_thread_messages(self._iter_messages(message_limit))
+
+        # keep the newest messages until the token limit is reached
+        messages: list[Any] = []
+        curr_message_tokens = 0
+        is_newest = True
+        while True:
+            page = list(islice(thread_messages, HISTORY_PAGE_SIZE))
+            if not page:
+                break
 
-        # for newly created message, its answer is temporarily empty, we don't need to add it to memory
-        if thread_messages and not thread_messages[0].answer:
-            thread_messages.pop(0)
+            # for newly created message, its answer is temporarily empty, we don't need to add it to memory
+            if is_newest and not page[0].answer:
+                page.pop(0)
+            is_newest = False
 
-        messages = list(reversed(thread_messages))
+            exceeded = False
+            for message, message_tokens in zip(page, self._get_messages_tokens(page)):
+                if curr_message_tokens + message_tokens > max_token_limit:
+                    exceeded = True
+                    break
+                messages.append(message)
+                curr_message_tokens += message_tokens
+
+            if exceeded:
+                if not messages and page:
+                    # the last answer is always kept even if it exceeds the token limit
+                    return [AssistantPromptMessage(content=page[0].answer)]
+                break
+
+        messages.reverse()
+        message_files = self._get_message_files([message.id for message in messages])
+        file_extra_configs = self._get_file_extra_configs(
+            [message for message in messages if message.id in message_files]
+        )
 
         prompt_messages: list[PromptMessage] = []
         for message in messages:
-            files = db.session.query(MessageFile).filter(MessageFile.message_id == message.id).all()
+            files = message_files.get(message.id)
             if files:
-                file_extra_config = None
-                if self.conversation.mode not in {AppMode.ADVANCED_CHAT, AppMode.WORKFLOW}:
-                    file_extra_config = FileUploadConfigManager.convert(self.conversation.model_config)
-                else:
-                    if message.workflow_run_id:
-                        workflow_run = (
-                            db.session.query(WorkflowRun).filter(WorkflowRun.id == message.workflow_run_id).first()
-                        )
-
-                        if workflow_run and workflow_run.workflow:
-                            file_extra_config = FileUploadConfigManager.convert(
-                                workflow_run.workflow.features_dict, is_vision=False
-                            )
-
-                detail = ImagePromptMessageContent.DETAIL.LOW
-                if file_extra_config and app_record:
-                    file_objs = file_factory.build_from_message_files(
-                        message_files=files, tenant_id=app_record.tenant_id, config=file_extra_config
-                    )
-                    if file_extra_config.image_config and file_extra_config.image_config.detail:
-                        detail = file_extra_config.image_config.detail
-                else:
-                    file_objs = []
-
-                if not file_objs:
-                    prompt_messages.append(UserPromptMessage(content=message.query))
-                else:
-                    prompt_message_contents: list[PromptMessageContent] = []
-                    prompt_message_contents.append(TextPromptMessageContent(data=message.query))
-                    for file in file_objs:
-                        prompt_message = file_manager.to_prompt_message_content(
-                            file,
-                            image_detail_config=detail,
-                        )
-                        prompt_message_contents.append(prompt_message)
-
-                    prompt_messages.append(UserPromptMessage(content=prompt_message_contents))
-
+                prompt_messages.append(self._to_user_prompt_message(message, files, file_extra_configs.get(message.id)))
             else:
                 prompt_messages.append(UserPromptMessage(content=message.query))
 
             prompt_messages.append(AssistantPromptMessage(content=message.answer))
 
-        if not prompt_messages:
-            return []
+        return prompt_messages
+
+    def _iter_messages(self, message_limit: int) -> Iterator[Any]:
+        """
+        Lazily fetch the messages of the conversation from newest to oldest, one page at a time
+        """
+        query = db.session.query(
+            Message.id,
+            Message.query,
+            Message.answer,
+            Message.created_at,
+            Message.workflow_run_id,
+            Message.parent_message_id,
+        ).filter(
+            Message.conversation_id == self.conversation.id,
+        )
+
+        fetched_count = 0
+        last_message = None
+        while fetched_count < message_limit:
+            page_query = query
+            if last_message:
+                page_query = page_query.filter(
+                    tuple_(Message.created_at, Message.id) < (last_message.created_at, last_message.id)
+                )
+            page = (
+                page_query.order_by(Message.created_at.desc(), Message.id.desc())
+                .limit(min(HISTORY_PAGE_SIZE, message_limit - fetched_count))
+                .all()
+            )
+            yield from page
 
-        # prune the chat message if it exceeds the max token limit
-        curr_message_tokens = self.model_instance.get_llm_num_tokens(prompt_messages)
+            if len(page) < HISTORY_PAGE_SIZE:
+                break
+            fetched_count += len(page)
+            last_message = page[-1]
 
-        if curr_message_tokens > max_token_limit:
-            pruned_memory = []
-            while curr_message_tokens > max_token_limit and len(prompt_messages) > 1:
-                pruned_memory.append(prompt_messages.pop(0))
-                curr_message_tokens = self.model_instance.get_llm_num_tokens(prompt_messages)
+    def _get_messages_tokens(self, messages: list[Any]) -> list[int]:
+        """
+        Get the number of tokens of the query and answer of each message, counts are cached per model
+        """
+        cache_keys = [
+            f"memory_message_tokens:{self.model_instance.provider}:{self.model_instance.model}:{message.id}"
+            for message in messages
+        ]
+        cached_tokens = redis_client.mget(cache_keys) if cache_keys else []
 
-        return prompt_messages
+        messages_tokens = []
+        pipeline = None
+        for message, cache_key, tokens in zip(messages, cache_keys, cached_tokens):
+            if tokens is not None:
+                messages_tokens.append(int(tokens))
+                continue
+
+            message_tokens = self.model_instance.get_llm_num_tokens(
+                [UserPromptMessage(content=message.query), AssistantPromptMessage(content=message.answer)]
+            )
+            if pipeline is None:
+                pipeline = redis_client.pipeline(transaction=False)
+            pipeline.setex(cache_key, MESSAGE_TOKENS_CACHE_TTL, message_tokens)
+            messages_tokens.append(message_tokens)
+
+        if pipeline is not None:
+            pipeline.execute()
+
+        return messages_tokens
+
+    @staticmethod
+    def _get_message_files(message_ids: list[str]) -> dict[str, list[MessageFile]]:
+        message_files: dict[str, list[MessageFile]] = defaultdict(list)
+        if not message_ids:
+            return message_files
+
+        files = db.session.query(MessageFile).filter(MessageFile.message_id.in_(message_ids)).all()
+        for file in files:
+            message_files[file.message_id].append(file)
+
+        return message_files
+
+    def _get_file_extra_configs(self, messages: list[Any]) -> dict[str, Optional[FileUploadConfig]]:
+        """
+        Get the file upload config of each message, workflow runs of the messages are loaded in one query
+        """
+        if not messages:
+            return {}
+
+        if self.conversation.mode not in {AppMode.ADVANCED_CHAT, AppMode.WORKFLOW}:
+            file_extra_config = FileUploadConfigManager.convert(self.conversation.model_config)
+            return {message.id: file_extra_config for message in messages}
+
+        workflow_run_ids = {message.workflow_run_id for message in messages if message.workflow_run_id}
+        if not workflow_run_ids:
+            return {}
+
+        rows = (
+            db.session.query(WorkflowRun.id, Workflow)
+            .join(Workflow, Workflow.id == WorkflowRun.workflow_id)
+            .filter(WorkflowRun.id.in_(workflow_run_ids))
+            .all()
+        )
+        workflow_file_extra_configs: dict[str, Optional[FileUploadConfig]] = {}
+        run_file_extra_configs: dict[str, Optional[FileUploadConfig]] = {}
+        for workflow_run_id, workflow in rows:
+            if workflow.id not in workflow_file_extra_configs:
+                workflow_file_extra_configs[workflow.id] = FileUploadConfigManager.convert(
+                    workflow.features_dict, is_vision=False
+                )
+            run_file_extra_configs[workflow_run_id] = workflow_file_extra_configs[workflow.id]
+
+        return {message.id: run_file_extra_configs.get(message.workflow_run_id) for message in messages}
+
+    def _to_user_prompt_message(
+        self, message: Any, files: list[MessageFile], file_extra_config: Optional[FileUploadConfig]
+    ) -> UserPromptMessage:
+        app_record = self.conversation.app
+
+        detail = ImagePromptMessageContent.DETAIL.LOW
+        if file_extra_config and app_record:
+            file_objs = file_factory.build_from_message_files(
+                message_files=files, tenant_id=app_record.tenant_id, config=file_extra_config
+            )
+            if file_extra_config.image_config and file_extra_config.image_config.detail:
+                detail = file_extra_config.image_config.detail
+        else:
+            file_objs = []
+
+        if not file_objs:
+            return UserPromptMessage(content=message.query)
+
+        prompt_message_contents: list[PromptMessageContent] = []
+        prompt_message_contents.append(TextPromptMessageContent(data=message.query))
+        for file in file_objs:
+            prompt_message = file_manager.to_prompt_message_content(
+                file,
+                image_detail_config=detail,
+            )
+            prompt_message_contents.append(prompt_message)
+
+        return UserPromptMessage(content=prompt_message_contents)
 
     def get_history_prompt_text(
         self,
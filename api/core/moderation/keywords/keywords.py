@@ -1,9 +1,35 @@
-from collections.abc import Sequence
+from functools import lru_cache
 from typing import Any
 
 from core.moderation.base import Moderation, ModerationAction, ModerationInputsResult, ModerationOutputsResult
 
 
+class KeywordsMatcher:
+    """
+    Keywords of a moderation config prepared once for searching texts
+    """
+
+    def __init__(self, keywords: str):
+        keywords_list = sorted({keyword.lower() for keyword in keywords.split("\n") if keyword}, key=len)
+
+        # a keyword containing a shorter keyword can not match without the shorter one
+        self.keywords: list[str] = []
+        for keyword in keywords_list:
+            if not any(shorter_keyword in keyword for shorter_keyword in self.keywords):
+                self.keywords.append(keyword)
+
+        self.max_keyword_length = max((len(keyword) for keyword in self.keywords), default=0)
+
+    def search(self, value: Any) -> bool:
+        text = str(value).lower()
+        return any(keyword in text for keyword in self.keywords)
+
+
+@lru_cache(maxsize=256)
+def get_keywords_matcher(keywords: str) -> KeywordsMatcher:
+    return KeywordsMatcher(keywords)
+
+
 class KeywordsModeration(Moderation):
     name: str = "keywords"
 
@@ -40,10 +66,7 @@ class KeywordsModeration(Moderation):
             if query:
                 inputs["query__"] = query
 
-            # Filter out empty values
-            keywords_list = [keyword for keyword in self.config["keywords"].split("\n") if keyword]
-
-            flagged = self._is_violated(inputs, keywords_list)
+            flagged = self._is_violated(inputs, get_keywords_matcher(self.config["keywords"]))
 
         return ModerationInputsResult(
             flagged=flagged, action=ModerationAction.DIRECT_OUTPUT, preset_response=preset_response
@@ -56,18 +79,12 @@ class KeywordsModeration(Moderation):
             raise ValueError("The config is not set.")
 
         if self.config["outputs_config"]["enabled"]:
-            # Filter out empty values
-            keywords_list = [keyword for keyword in self.config["keywords"].split("\n") if keyword]
-
-            flagged = self._is_violated({"text": text}, keywords_list)
+            flagged = self._is_violated({"text": text}, get_keywords_matcher(self.config["keywords"]))
             preset_response = self.config["outputs_config"]["preset_response"]
 
         return ModerationOutputsResult(
             flagged=flagged, action=ModerationAction.DIRECT_OUTPUT, preset_response=preset_response
         )
 
-    def _is_violated(self, inputs: dict, keywords_list: list) -> bool:
-        return any(self._check_keywords_in_value(keywords_list, value) for value in inputs.values())
-
-    def _check_keywords_in_value(self, keywords_list: Sequence[str], value: Any) -> bool:
-        return any(keyword.lower() in str(value).lower() for keyword in keywords_list)
+    def _is_violated(self, inputs: dict, matcher: KeywordsMatcher) -> bool:
+        return any(matcher.search(value) for value in inputs.values())
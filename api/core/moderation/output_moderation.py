@@ -1,16 +1,16 @@
 import logging
 import threading
-import time
 from typing import Any, Optional
 
 from flask import Flask, current_app
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, PrivateAttr
 
 from configs import dify_config
 from core.app.apps.base_app_queue_manager import AppQueueManager, PublishFrom
 from core.app.entities.queue_entities import QueueMessageReplaceEvent
 from core.moderation.base import ModerationAction, ModerationOutputsResult
 from core.moderation.factory import ModerationFactory
+from core.moderation.keywords.keywords import KeywordsModeration, get_keywords_matcher
 
 logger = logging.getLogger(__name__)
 
@@ -34,6 +34,8 @@ class OutputModeration(BaseModel):
     final_output: Optional[str] = None
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
+    _new_token_event: threading.Event = PrivateAttr(default_factory=threading.Event)
+
     def should_direct_output(self) -> bool:
         return self.final_output is not None
 
@@ -42,6 +44,7 @@ class OutputModeration(BaseModel):
 
     def append_new_token(self, token: str) -> None:
         self.buffer += token
+        self._new_token_event.set()
 
         if not self.thread:
             self.thread = self.start_thread()
@@ -82,23 +85,33 @@ class OutputModeration(BaseModel):
     def stop_thread(self):
         if self.thread and self.thread.is_alive():
             self.thread_running = False
+            self._new_token_event.set()
 
     def worker(self, flask_app: Flask, buffer_size: int):
         with flask_app.app_context():
             current_length = 0
+            checked = False
+            overlap_length = self._get_incremental_overlap_length()
             while self.thread_running:
+                self._new_token_event.clear()
                 moderation_buffer = self.buffer
                 buffer_length = len(moderation_buffer)
-                if not self.is_final_chunk:
-                    chunk_length = buffer_length - current_length
-                    if 0 <= chunk_length < buffer_size:
-                        time.sleep(1)
-                        continue
+                chunk_length = buffer_length - current_length
+                if (not self.is_final_chunk and 0 <= chunk_length < buffer_size) or (checked and chunk_length == 0):
+                    self._new_token_event.wait(1)
+                    continue
+
+                if overlap_length is None:
+                    moderation_text = moderation_buffer
+                else:
+                    # the text before was checked, only a keyword spanning the appended text can be found
+                    moderation_text = moderation_buffer[max(current_length - overlap_length, 0) :]
 
                 current_length = buffer_length
+                checked = True
 
                 result = self.moderation(
-                    tenant_id=self.tenant_id, app_id=self.app_id, moderation_buffer=moderation_buffer
+                    tenant_id=self.tenant_id, app_id=self.app_id, moderation_buffer=moderation_text
                 )
 
                 if not result or not result.flagged:
@@ -117,6 +130,16 @@ class OutputModeration(BaseModel):
                 if result.action == ModerationAction.DIRECT_OUTPUT:
                     break
 
+    def _get_incremental_overlap_length(self) -> Optional[int]:
+        """
+        Keywords moderation flags texts containing a keyword, so a streamed output is checked incrementally:
+        only the appended text and the overlap of a keyword with the text before are checked.
+        :return: overlap length, None when the whole output must be checked
+        """
+        if self.rule.type != KeywordsModeration.name:
+            return None
+        return get_keywords_matcher(self.rule.config.get("keywords", "")).max_keyword_length
+
     def moderation(self, tenant_id: str, app_id: str, moderation_buffer: str) -> Optional[ModerationOutputsResult]:
         try:
             moderation_factory = ModerationFactory(
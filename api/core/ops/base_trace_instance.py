@@ -1,8 +1,12 @@
+import logging
 from abc import ABC, abstractmethod
+from collections.abc import Sequence
 
 from core.ops.entities.config_entity import BaseTracingConfig
 from core.ops.entities.trace_entity import BaseTraceInfo
 
+logger = logging.getLogger(__name__)
+
 
 class BaseTraceInstance(ABC):
     """
@@ -24,3 +28,26 @@ class BaseTraceInstance(ABC):
         Subclasses must implement specific tracing logic for activities.
         """
         ...
+
+    def trace_batch(self, trace_infos: Sequence[BaseTraceInfo]) -> int:
+        """
+        Trace a batch of activities, then flush them to the ops trace service in bulk.
+        :param trace_infos: trace infos
+        :return: number of trace infos failed to be traced
+        """
+        failed = 0
+        for trace_info in trace_infos:
+            try:
+                self.trace(trace_info)
+            except Exception:
+                logger.exception(f"Failed to trace {type(trace_info).__name__}")
+                failed += 1
+        self.flush()
+        return failed
+
+    def flush(self):
+        """
+        Send the activities buffered by the client of the ops trace service.
+        Clients sending each activity right away have nothing to flush.
+        """
+        return None
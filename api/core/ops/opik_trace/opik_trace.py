@@ -453,6 +453,9 @@ class OpikDataTrace(BaseTraceInstance):
         except Exception as e:
             raise ValueError(f"Opik Failed to create span: {str(e)}")
 
+    def flush(self):
+        self.opik_client.flush()
+
     def api_check(self):
         try:
             self.opik_client.auth_check()
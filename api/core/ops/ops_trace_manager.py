@@ -5,16 +5,18 @@ import queue
 import threading
 import time
 from datetime import timedelta
-from typing import Any, Optional, Union
+from typing import Any, ClassVar, Optional, Union
 from uuid import UUID, uuid4
 
 from flask import current_app
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from configs import dify_config
 from core.helper.encrypter import decrypt_token, encrypt_token, obfuscated_token
+from core.helper.lru_cache import TTLCache
 from core.ops.entities.config_entity import (
-    OPS_FILE_PATH,
+    OPS_BATCH_FILE_PATH,
     LangfuseConfig,
     LangSmithConfig,
     OpikConfig,
@@ -36,10 +38,11 @@ from core.ops.langsmith_trace.langsmith_trace import LangSmithDataTrace
 from core.ops.opik_trace.opik_trace import OpikDataTrace
 from core.ops.utils import get_message_data
 from extensions.ext_database import db
+from extensions.ext_redis import redis_client
 from extensions.ext_storage import storage
 from models.model import App, AppModelConfig, Conversation, Message, MessageFile, TraceAppConfig
 from models.workflow import WorkflowAppLog, WorkflowRun
-from tasks.ops_trace_task import process_trace_tasks
+from tasks.ops_trace_task import process_trace_batch_tasks
 
 provider_config_map: dict[str, dict[str, Any]] = {
     TracingProviderEnum.LANGFUSE.value: {
@@ -64,6 +67,8 @@ provider_config_map: dict[str, dict[str, Any]] = {
 
 
 class OpsTraceManager:
+    _trace_instance_cache: ClassVar[TTLCache] = TTLCache(dify_config.TRACE_INSTANCE_CACHE_SIZE)
+
     @classmethod
     def encrypt_tracing_config(
         cls, tenant_id: str, tracing_provider: str, tracing_config: dict, current_trace_config=None
@@ -192,6 +197,20 @@ class OpsTraceManager:
         if app_id is None:
             return None
 
+        # trace instances are reused with their clients until the tracing config of the app changes
+        version_cache_key = cls._get_tracing_config_version_cache_key(app_id)
+        version = redis_client.get(version_cache_key)
+        version = int(version) if version else 0
+        entry = cls._trace_instance_cache.get(app_id)
+        if entry and entry[0] == version:
+            return entry[1]
+
+        tracing_instance = cls._create_ops_trace_instance(app_id)
+        cls._trace_instance_cache.put(app_id, (version, tracing_instance))
+        return tracing_instance
+
+    @classmethod
+    def _create_ops_trace_instance(cls, app_id: str):
         app: Optional[App] = db.session.query(App).filter(App.id == app_id).first()
 
         if app is None:
@@ -207,9 +226,9 @@ class OpsTraceManager:
         if tracing_provider is None or tracing_provider not in provider_config_map:
             return None
 
-        # decrypt_token
-        decrypt_trace_config = cls.get_decrypted_tracing_config(app_id, tracing_provider)
         if app_ops_trace_config.get("enabled"):
+            # decrypt_token
+            decrypt_trace_config = cls.get_decrypted_tracing_config(app_id, tracing_provider)
             trace_instance, config_class = (
                 provider_config_map[tracing_provider]["trace_instance"],
                 provider_config_map[tracing_provider]["config_class"],
@@ -219,6 +238,20 @@ class OpsTraceManager:
 
         return None
 
+    @classmethod
+    def invalidate_ops_trace_instance(cls, app_id: str):
+        """
+        Invalidate cached ops trace instance of the app in all processes
+        :param app_id: app id
+        :return:
+        """
+        redis_client.incr(cls._get_tracing_config_version_cache_key(app_id))
+        cls._trace_instance_cache.delete(app_id)
+
+    @staticmethod
+    def _get_tracing_config_version_cache_key(app_id: str) -> str:
+        return f"tracing_config_version:app_id:{app_id}"
+
     @classmethod
     def get_app_config_through_message_id(cls, message_id: str):
         app_model_config = None
@@ -264,6 +297,7 @@ class OpsTraceManager:
             }
         )
         db.session.commit()
+        cls.invalidate_ops_trace_instance(app_id)
 
     @classmethod
     def get_app_tracing_config(cls, app_id: str):
@@ -345,6 +379,7 @@ class TraceTask:
         self.timer = timer
         self.file_base_url = os.getenv("FILES_URL", "http://127.0.0.1:5001")
         self.app_id = None
+        self.enqueued_at: Optional[float] = None
 
         self.kwargs = kwargs
 
@@ -738,12 +773,27 @@ class TraceTask:
 
 
 trace_manager_timer: Optional[threading.Timer] = None
-trace_manager_queue: queue.Queue = queue.Queue()
+trace_manager_queue: queue.Queue = queue.Queue(maxsize=int(os.getenv("TRACE_QUEUE_MANAGER_MAX_SIZE", 10000)))
 trace_manager_interval = int(os.getenv("TRACE_QUEUE_MANAGER_INTERVAL", 5))
 trace_manager_batch_size = int(os.getenv("TRACE_QUEUE_MANAGER_BATCH_SIZE", 100))
 
 
 class TraceQueueManager:
+    """
+    Collect the trace tasks of the process and ship them in batches, each batch is saved as one storage object
+    processed by one celery task. Trace tasks arriving while the queue is full are dropped.
+    """
+
+    _metrics_lock = threading.Lock()
+    _enqueued = 0
+    _dropped = 0
+    _reported_dropped = 0
+    _failed = 0
+    _shipped = 0
+    _batches = 0
+    _total_latency = 0.0
+    _max_latency = 0.0
+
     def __init__(self, app_id=None, user_id=None):
         global trace_manager_timer
 
@@ -759,7 +809,15 @@ class TraceQueueManager:
         try:
             if self.trace_instance:
                 trace_task.app_id = self.app_id
-                trace_manager_queue.put(trace_task)
+                trace_task.enqueued_at = time.monotonic()
+                try:
+                    trace_manager_queue.put_nowait(trace_task)
+                except queue.Full:
+                    with self._metrics_lock:
+                        TraceQueueManager._dropped += 1
+                else:
+                    with self._metrics_lock:
+                        TraceQueueManager._enqueued += 1
         except Exception as e:
             logging.exception(f"Error adding trace task, trace_type {trace_task.trace_type}")
         finally:
@@ -776,12 +834,24 @@ class TraceQueueManager:
 
     def run(self):
         try:
-            tasks = self.collect_tasks()
-            if tasks:
+            # ship the tasks queued at this point in as many batches as needed, not only one batch per interval
+            pending = trace_manager_queue.qsize()
+            while pending > 0:
+                tasks = self.collect_tasks()
+                if not tasks:
+                    break
+                pending -= len(tasks)
                 self.send_to_celery(tasks)
         except Exception as e:
             logging.exception("Error processing trace tasks")
 
+        with self._metrics_lock:
+            dropped = TraceQueueManager._dropped - TraceQueueManager._reported_dropped
+            TraceQueueManager._reported_dropped = TraceQueueManager._dropped
+        if dropped:
+            logging.warning(f"Dropped {dropped} trace tasks, the trace queue is full")
+        logging.info(f"Trace queue metrics: {self.metrics()}")
+
     def start_timer(self):
         global trace_manager_timer
         if trace_manager_timer is None or not trace_manager_timer.is_alive():
@@ -791,21 +861,61 @@ class TraceQueueManager:
             trace_manager_timer.start()
 
     def send_to_celery(self, tasks: list[TraceTask]):
+        task_data_list: list[str] = []
+        failed = 0
         with self.flask_app.app_context():
             for task in tasks:
                 if task.app_id is None:
                     continue
-                file_id = uuid4().hex
-                trace_info = task.execute()
+                try:
+                    trace_info = task.execute()
+                except Exception:
+                    logging.exception(f"Error executing trace task, trace_type {task.trace_type}")
+                    failed += 1
+                    continue
                 task_data = TaskData(
                     app_id=task.app_id,
                     trace_info_type=type(trace_info).__name__,
                     trace_info=trace_info.model_dump() if trace_info else None,
                 )
-                file_path = f"{OPS_FILE_PATH}{task.app_id}/{file_id}.json"
-                storage.save(file_path, task_data.model_dump_json().encode("utf-8"))
-                file_info = {
-                    "file_id": file_id,
-                    "app_id": task.app_id,
-                }
-                process_trace_tasks.delay(file_info)
+                task_data_list.append(task_data.model_dump_json())
+
+            if task_data_list:
+                file_id = uuid4().hex
+                file_path = f"{OPS_BATCH_FILE_PATH}{file_id}.json"
+                storage.save(file_path, f"[{','.join(task_data_list)}]".encode())
+                process_trace_batch_tasks.delay({"file_id": file_id})
+
+        now = time.monotonic()
+        latencies: list[float] = []
+        for task in tasks:
+            enqueued_at = task.enqueued_at
+            if task.app_id is not None and enqueued_at is not None:
+                latencies.append(now - enqueued_at)
+        with self._metrics_lock:
+            TraceQueueManager._failed += failed
+            if task_data_list:
+                TraceQueueManager._shipped += len(task_data_list)
+                TraceQueueManager._batches += 1
+            TraceQueueManager._total_latency += sum(latencies)
+            TraceQueueManager._max_latency = max([TraceQueueManager._max_latency, *latencies])
+
+    @classmethod
+    def metrics(cls) -> dict[str, Any]:
+        """
+        Get metrics of the trace queue of the process
+        :return: queue depth, counts of enqueued, dropped, failed and shipped trace tasks, shipped batches,
+            and latencies of trace tasks from being queued to being shipped
+        """
+        with cls._metrics_lock:
+            handled = cls._shipped + cls._failed
+            return {
+                "queue_depth": trace_manager_queue.qsize(),
+                "enqueued": cls._enqueued,
+                "dropped": cls._dropped,
+                "failed": cls._failed,
+                "shipped": cls._shipped,
+                "batches": cls._batches,
+                "avg_latency": cls._total_latency / handled if handled else 0.0,
+                "max_latency": cls._max_latency,
+            }
@@ -1,24 +1,29 @@
+from collections.abc import Iterable, Iterator
 from typing import Any
 
 from constants import UUID_NIL
 
 
 def extract_thread_messages(messages: list[Any]):
-    thread_messages = []
+    return list(iter_thread_messages(messages))
+
+
+def iter_thread_messages(messages: Iterable[Any]) -> Iterator[Any]:
+    """
+    Lazily yield the messages of the thread of the first message, messages are ordered from newest to oldest
+    """
     next_message = None
 
     for message in messages:
         if not message.parent_message_id:
             # If the message is regenerated and does not have a parent message, it is the start of a new thread
-            thread_messages.append(message)
+            yield message
             break
 
         if not next_message:
-            thread_messages.append(message)
+            yield message
             next_message = message.parent_message_id
         else:
             if next_message in {message.id, UUID_NIL}:
-                thread_messages.append(message)
+                yield message
                 next_message = message.parent_message_id
-
-    return thread_messages
@@ -21,6 +21,7 @@ from core.entities.provider_entities import (
 from core.helper import encrypter
 from core.helper.model_provider_cache import ProviderCredentialsCache, ProviderCredentialsCacheType
 from core.helper.position_helper import is_filtered
+from core.helper.provider_configurations_cache import ProviderConfigurationsCache
 from core.model_runtime.entities.model_entities import ModelType
 from core.model_runtime.entities.provider_entities import (
     ConfigurateMethod,
@@ -91,6 +92,13 @@ class ProviderManager:
         :param tenant_id:
         :return:
         """
+        # Reuse the configurations built in this process if the workspace records have not changed since
+        provider_configurations_cache = ProviderConfigurationsCache(tenant_id)
+        version = provider_configurations_cache.get_version()
+        cached_provider_configurations = provider_configurations_cache.get(version)
+        if cached_provider_configurations is not None:
+            return cached_provider_configurations
+
         # Get all provider records of the workspace
         provider_name_to_provider_records_dict = self._get_all_providers(tenant_id)
 
@@ -192,6 +200,8 @@ class ProviderManager:
 
             provider_configurations[provider_name] = provider_configuration
 
+        provider_configurations_cache.set(version, provider_configurations)
+
         # Return the encapsulated object
         return provider_configurations
 
@@ -599,6 +609,7 @@ class ProviderManager:
                                 provider_credentials.get(variable) or "",  # type: ignore
                                 self.decoding_rsa_key,
                                 self.decoding_cipher_rsa,
+                                tenant_id,
                             )
                         except ValueError:
                             pass
@@ -647,6 +658,7 @@ class ProviderManager:
                                 provider_model_credentials.get(variable),
                                 self.decoding_rsa_key,
                                 self.decoding_cipher_rsa,
+                                tenant_id,
                             )
                         except ValueError:
                             pass
@@ -762,7 +774,10 @@ class ProviderManager:
                         if variable in provider_credentials:
                             try:
                                 provider_credentials[variable] = encrypter.decrypt_token_with_decoding(
-                                    provider_credentials.get(variable), self.decoding_rsa_key, self.decoding_cipher_rsa
+                                    provider_credentials.get(variable),
+                                    self.decoding_rsa_key,
+                                    self.decoding_cipher_rsa,
+                                    tenant_id,
                                 )
                             except ValueError:
                                 pass
@@ -907,6 +922,7 @@ class ProviderManager:
                                             provider_model_credentials.get(variable),
                                             self.decoding_rsa_key,
                                             self.decoding_cipher_rsa,
+                                            load_balancing_model_config.tenant_id,
                                         )
                                     except ValueError:
                                         pass
@@ -11,7 +11,7 @@ from core.rag.models.document import Document
 from extensions.ext_database import db
 from extensions.ext_redis import redis_client
 from extensions.ext_storage import storage
-from models.dataset import Dataset, DatasetKeywordTable, DocumentSegment
+from models.dataset import Dataset, DatasetKeywordTable
 
 
 class KeywordTableConfig(BaseModel):
@@ -28,17 +28,20 @@ class Jieba(BaseKeyword):
         with redis_client.lock(lock_name, timeout=600):
             keyword_table_handler = JiebaKeywordTableHandler()
             keyword_table = self._get_dataset_keyword_table()
+            keywords_map: dict[str, list[str]] = {}
             for text in texts:
                 keywords = keyword_table_handler.extract_keywords(
                     text.page_content, self._config.max_keywords_per_chunk
                 )
                 if text.metadata is not None:
-                    self._update_segment_keywords(self.dataset.id, text.metadata["doc_id"], list(keywords))
+                    keywords_map[text.metadata["doc_id"]] = list(keywords)
                     keyword_table = self._add_text_to_keyword_table(
                         keyword_table or {}, text.metadata["doc_id"], list(keywords)
                     )
 
+            self._update_segments_keywords(keywords_map)
             self._save_dataset_keyword_table(keyword_table)
+            db.session.commit()
 
             return self
 
@@ -49,6 +52,7 @@ class Jieba(BaseKeyword):
 
             keyword_table = self._get_dataset_keyword_table()
             keywords_list = kwargs.get("keywords_list")
+            keywords_map: dict[str, list[str]] = {}
             for i in range(len(texts)):
                 text = texts[i]
                 if keywords_list:
@@ -62,12 +66,14 @@ class Jieba(BaseKeyword):
                         text.page_content, self._config.max_keywords_per_chunk
                     )
                 if text.metadata is not None:
-                    self._update_segment_keywords(self.dataset.id, text.metadata["doc_id"], list(keywords))
+                    keywords_map[text.metadata["doc_id"]] = list(keywords)
                     keyword_table = self._add_text_to_keyword_table(
                         keyword_table or {}, text.metadata["doc_id"], list(keywords)
                     )
 
+            self._update_segments_keywords(keywords_map)
             self._save_dataset_keyword_table(keyword_table)
+            db.session.commit()
 
     def text_exists(self, id: str) -> bool:
         keyword_table = self._get_dataset_keyword_table()
@@ -91,28 +97,7 @@ class Jieba(BaseKeyword):
 
         sorted_chunk_indices = self._retrieve_ids_by_query(keyword_table or {}, query, k)
 
-        documents = []
-        for chunk_index in sorted_chunk_indices:
-            segment = (
-                db.session.query(DocumentSegment)
-                .filter(DocumentSegment.dataset_id == self.dataset.id, DocumentSegment.index_node_id == chunk_index)
-                .first()
-            )
-
-            if segment:
-                documents.append(
-                    Document(
-                        page_content=segment.content,
-                        metadata={
-                            "doc_id": chunk_index,
-                            "doc_hash": segment.index_node_hash,
-                            "document_id": segment.document_id,
-                            "dataset_id": segment.dataset_id,
-                        },
-                    )
-                )
-
-        return documents
+        return self._get_documents_by_index_node_ids(sorted_chunk_indices)
 
     def delete(self) -> None:
         lock_name = "keyword_indexing_lock_{}".format(self.dataset.id)
@@ -210,22 +195,12 @@ class Jieba(BaseKeyword):
 
         return sorted_chunk_indices[:k]
 
-    def _update_segment_keywords(self, dataset_id: str, node_id: str, keywords: list[str]):
-        document_segment = (
-            db.session.query(DocumentSegment)
-            .filter(DocumentSegment.dataset_id == dataset_id, DocumentSegment.index_node_id == node_id)
-            .first()
-        )
-        if document_segment:
-            document_segment.keywords = keywords
-            db.session.add(document_segment)
-            db.session.commit()
-
     def create_segment_keywords(self, node_id: str, keywords: list[str]):
         keyword_table = self._get_dataset_keyword_table()
-        self._update_segment_keywords(self.dataset.id, node_id, keywords)
+        self._update_segments_keywords({node_id: keywords})
         keyword_table = self._add_text_to_keyword_table(keyword_table or {}, node_id, keywords)
         self._save_dataset_keyword_table(keyword_table)
+        db.session.commit()
 
     def multi_create_segment_keywords(self, pre_segment_data_list: list):
         keyword_table_handler = JiebaKeywordTableHandler()
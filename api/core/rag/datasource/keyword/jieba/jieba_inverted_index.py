@@ -0,0 +1,143 @@
+from typing import Any
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+
+from core.rag.datasource.keyword.jieba.jieba import KeywordTableConfig
+from core.rag.datasource.keyword.jieba.jieba_keyword_table_handler import JiebaKeywordTableHandler
+from core.rag.datasource.keyword.keyword_base import BaseKeyword
+from core.rag.models.document import Document
+from extensions.ext_database import db
+from models.dataset import Dataset, DatasetKeywordPosting
+
+# the posting keyword column is a varchar(255), longer keywords can not be indexed
+MAX_KEYWORD_LENGTH = 255
+POSTINGS_INSERT_BATCH_SIZE = 1000
+
+
+class JiebaInvertedIndex(BaseKeyword):
+    """
+    Jieba keyword store backed by one posting row per (keyword, index node) instead of a single
+    serialized keyword table, so reads only touch the query keywords and writes only append deltas.
+    """
+
+    def __init__(self, dataset: Dataset):
+        super().__init__(dataset)
+        self._config = KeywordTableConfig()
+
+    def create(self, texts: list[Document], **kwargs) -> BaseKeyword:
+        self.add_texts(texts, **kwargs)
+        return self
+
+    def add_texts(self, texts: list[Document], **kwargs):
+        keyword_table_handler = JiebaKeywordTableHandler()
+        keywords_list = kwargs.get("keywords_list")
+        postings: dict[str, list[str]] = {}
+        for i, text in enumerate(texts):
+            if text.metadata is None:
+                continue
+            keywords = keywords_list[i] if keywords_list else None
+            if not keywords:
+                keywords = keyword_table_handler.extract_keywords(
+                    text.page_content, self._config.max_keywords_per_chunk
+                )
+            postings[text.metadata["doc_id"]] = list(keywords)
+
+        self._update_segments_keywords(postings)
+        self._add_postings(postings)
+        db.session.commit()
+
+    def text_exists(self, id: str) -> bool:
+        posting = (
+            db.session.query(DatasetKeywordPosting.id)
+            .filter(DatasetKeywordPosting.dataset_id == self.dataset.id, DatasetKeywordPosting.index_node_id == id)
+            .first()
+        )
+        return posting is not None
+
+    def delete_by_ids(self, ids: list[str]) -> None:
+        if not ids:
+            return
+        db.session.query(DatasetKeywordPosting).filter(
+            DatasetKeywordPosting.dataset_id == self.dataset.id, DatasetKeywordPosting.index_node_id.in_(ids)
+        ).delete(synchronize_session=False)
+        db.session.commit()
+
+    def delete(self) -> None:
+        db.session.query(DatasetKeywordPosting).filter(DatasetKeywordPosting.dataset_id == self.dataset.id).delete(
+            synchronize_session=False
+        )
+        db.session.commit()
+
+    def search(self, query: str, **kwargs: Any) -> list[Document]:
+        k = kwargs.get("top_k", 4)
+        sorted_chunk_indices = self._retrieve_ids_by_query(query, k)
+
+        return self._get_documents_by_index_node_ids(sorted_chunk_indices)
+
+    def create_segment_keywords(self, node_id: str, keywords: list[str]):
+        self._update_segments_keywords({node_id: keywords})
+        self._add_postings({node_id: keywords})
+        db.session.commit()
+
+    def multi_create_segment_keywords(self, pre_segment_data_list: list):
+        keyword_table_handler = JiebaKeywordTableHandler()
+        postings: dict[str, list[str]] = {}
+        for pre_segment_data in pre_segment_data_list:
+            segment = pre_segment_data["segment"]
+            if pre_segment_data["keywords"]:
+                segment.keywords = pre_segment_data["keywords"]
+            else:
+                keywords = keyword_table_handler.extract_keywords(segment.content, self._config.max_keywords_per_chunk)
+                segment.keywords = list(keywords)
+            postings[segment.index_node_id] = segment.keywords
+        self._add_postings(postings)
+        db.session.commit()
+
+    def update_segment_keywords_index(self, node_id: str, keywords: list[str]):
+        self._add_postings({node_id: keywords})
+        db.session.commit()
+
+    def import_keyword_table(self, keyword_table: dict[str, set[str]]):
+        """
+        Import a legacy keyword table (keyword -> index node ids) into postings.
+        """
+        postings: dict[str, list[str]] = {}
+        for keyword, node_ids in keyword_table.items():
+            for node_id in node_ids:
+                postings.setdefault(node_id, []).append(keyword)
+        self._add_postings(postings)
+        db.session.commit()
+
+    def _add_postings(self, postings: dict[str, list[str]]):
+        rows = [
+            {"dataset_id": self.dataset.id, "keyword": keyword, "index_node_id": node_id}
+            for node_id, keywords in postings.items()
+            for keyword in set(keywords)
+            if keyword and len(keyword) <= MAX_KEYWORD_LENGTH
+        ]
+        for i in range(0, len(rows), POSTINGS_INSERT_BATCH_SIZE):
+            stmt = (
+                insert(DatasetKeywordPosting)
+                .values(rows[i : i + POSTINGS_INSERT_BATCH_SIZE])
+                .on_conflict_do_nothing(index_elements=["dataset_id", "keyword", "index_node_id"])
+            )
+            db.session.execute(stmt)
+
+    def _retrieve_ids_by_query(self, query: str, k: int = 4) -> list[str]:
+        keyword_table_handler = JiebaKeywordTableHandler()
+        keywords = [keyword for keyword in keyword_table_handler.extract_keywords(query) if keyword]
+        if not keywords:
+            return []
+
+        # go through text chunks in order of most matching keywords
+        hits = func.count(DatasetKeywordPosting.id).label("hits")
+        rows = (
+            db.session.query(DatasetKeywordPosting.index_node_id, hits)
+            .filter(DatasetKeywordPosting.dataset_id == self.dataset.id, DatasetKeywordPosting.keyword.in_(keywords))
+            .group_by(DatasetKeywordPosting.index_node_id)
+            .order_by(hits.desc(), DatasetKeywordPosting.index_node_id)
+            .limit(k)
+            .all()
+        )
+        return [row.index_node_id for row in rows]
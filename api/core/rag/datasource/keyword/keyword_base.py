@@ -4,7 +4,11 @@ from abc import ABC, abstractmethod
 from typing import Any
 
 from core.rag.models.document import Document
-from models.dataset import Dataset
+from extensions.ext_database import db
+from models.dataset import Dataset, DocumentSegment
+
+# max index node ids per segment IN query
+SEGMENT_BATCH_SIZE = 1000
 
 
 class BaseKeyword(ABC):
@@ -48,3 +52,47 @@ class BaseKeyword(ABC):
 
     def _get_uuids(self, texts: list[Document]) -> list[str]:
         return [text.metadata["doc_id"] for text in texts if text.metadata]
+
+    def _get_documents_by_index_node_ids(self, index_node_ids: list[str]) -> list[Document]:
+        """Hydrate index nodes into documents with a single segment query, keeping the given order."""
+        if not index_node_ids:
+            return []
+        segments = (
+            db.session.query(DocumentSegment)
+            .filter(DocumentSegment.dataset_id == self.dataset.id, DocumentSegment.index_node_id.in_(index_node_ids))
+            .all()
+        )
+        segment_map = {segment.index_node_id: segment for segment in segments}
+
+        documents = []
+        for index_node_id in index_node_ids:
+            segment = segment_map.get(index_node_id)
+            if segment:
+                documents.append(
+                    Document(
+                        page_content=segment.content,
+                        metadata={
+                            "doc_id": index_node_id,
+                            "doc_hash": segment.index_node_hash,
+                            "document_id": segment.document_id,
+                            "dataset_id": segment.dataset_id,
+                        },
+                    )
+                )
+        return documents
+
+    def _update_segments_keywords(self, keywords_map: dict[str, list[str]]) -> None:
+        """Update the keywords of many segments with one query and one flush per batch, the caller commits."""
+        index_node_ids = list(keywords_map.keys())
+        for i in range(0, len(index_node_ids), SEGMENT_BATCH_SIZE):
+            segments = (
+                db.session.query(DocumentSegment)
+                .filter(
+                    DocumentSegment.dataset_id == self.dataset.id,
+                    DocumentSegment.index_node_id.in_(index_node_ids[i : i + SEGMENT_BATCH_SIZE]),
+                )
+                .all()
+            )
+            for segment in segments:
+                segment.keywords = keywords_map[segment.index_node_id]
+            db.session.flush()
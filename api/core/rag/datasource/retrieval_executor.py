@@ -0,0 +1,169 @@
+import contextvars
+import logging
+import os
+import threading
+import time
+from collections.abc import Callable, Sequence
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Optional, TypeVar
+
+from configs import dify_config
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("retrieval_deadline", default=None)
+
+
+class RetrievalExecutor:
+    """
+    Process-wide bounded thread pools running the concurrent branches of a retrieval.
+
+    Retrievals fan out over datasets, and each dataset over search methods, so every level gets its own pool:
+    a task only waits for tasks of a lower level, which can never deadlock on a saturated pool.
+    All branches started for a request share one deadline, when it expires the queued branches are cancelled
+    and the results of the running ones are dropped. Callers may also stop waiting as soon as the results
+    already received are enough. Running branches can not be interrupted, they keep their worker until they finish.
+    """
+
+    DATASET = "dataset"
+    SEARCH = "search"
+
+    NESTED_MAP_GRACE_TIME = 0.5
+
+    _lock = threading.Lock()
+    _executors: dict[str, "RetrievalExecutor"] = {}
+    _pid: Optional[int] = None
+
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"retrieval-{name}")
+        self._metrics_lock = threading.Lock()
+        self._submitted = 0
+        self._started = 0
+        self._finished = 0
+        self._cancelled = 0
+        self._total_wait_time = 0.0
+        self._max_wait_time = 0.0
+
+    @classmethod
+    def get(cls, name: str) -> "RetrievalExecutor":
+        """
+        Get the executor of a retrieval level shared in the current process
+        :param name: retrieval level, `DATASET` or `SEARCH`
+        :return: executor
+        """
+        with cls._lock:
+            # worker threads do not survive a fork, create new pools in the child process
+            if cls._pid != os.getpid():
+                cls._executors = {}
+                cls._pid = os.getpid()
+
+            if name not in cls._executors:
+                cls._executors[name] = cls(name, dify_config.RETRIEVAL_EXECUTOR_MAX_WORKERS)
+            return cls._executors[name]
+
+    def map(
+        self, fns: Sequence[Callable[[], T]], is_enough: Optional[Callable[[list[T]], bool]] = None
+    ) -> list[Optional[T]]:
+        """
+        Run functions concurrently until the deadline of the current retrieval
+        :param fns: functions to run
+        :param is_enough: called with the results of the functions finished so far whenever one finishes,
+            once it returns True the remaining functions are cancelled and their results dropped
+        :return: results in the order of the functions, None for functions which failed, missed the deadline,
+            or were still running when enough results had arrived
+        """
+        deadline = _deadline.get()
+        grace_time = 0.0
+        if deadline is None and dify_config.RETRIEVAL_TIMEOUT:
+            deadline = time.monotonic() + dify_config.RETRIEVAL_TIMEOUT
+            # nested maps stop waiting at the same deadline, give them time to return their partial results
+            grace_time = self.NESTED_MAP_GRACE_TIME
+        wait_until = None if deadline is None else deadline + grace_time
+
+        futures = [self._submit(fn, deadline) for fn in fns]
+        not_done = set(futures)
+        finished: list[T] = []
+        enough = False
+        while not_done:
+            timeout = None if wait_until is None else max(wait_until - time.monotonic(), 0)
+            done, not_done = wait(
+                not_done, timeout=timeout, return_when=ALL_COMPLETED if is_enough is None else FIRST_COMPLETED
+            )
+            if is_enough is None or not done:
+                break
+            finished.extend(future.result() for future in done if future.exception() is None)
+            if is_enough(finished):
+                enough = True
+                break
+
+        if not_done:
+            cancelled = self._cancel(not_done)
+            if enough:
+                logger.info(
+                    f"Enough results arrived, {len(not_done)} of {len(futures)} {self.name} retrieval branches "
+                    f"skipped, {len(not_done) - cancelled} of them keep running and occupying workers until they finish"
+                )
+            else:
+                logger.warning(
+                    f"{len(not_done)} of {len(futures)} {self.name} retrieval branches timed out, "
+                    f"{len(not_done) - cancelled} of them keep running and occupying workers until they finish"
+                )
+
+        results: list[Optional[T]] = []
+        for future in futures:
+            exception = future.exception() if future not in not_done else None
+            if exception is not None:
+                # a failing branch does not fail the retrieval, the results of the other branches are kept
+                logger.error(f"{self.name} retrieval branch failed", exc_info=exception)
+            results.append(future.result() if future not in not_done and exception is None else None)
+        return results
+
+    def metrics(self) -> dict[str, Any]:
+        """
+        Get metrics of the executor
+        :return: queue depth, running and finished task counts, and wait times of tasks in the queue
+        """
+        with self._metrics_lock:
+            return {
+                "queue_depth": self._submitted - self._started - self._cancelled,
+                "running": self._started - self._finished,
+                "finished": self._finished,
+                "cancelled": self._cancelled,
+                "avg_wait_time": self._total_wait_time / self._started if self._started else 0.0,
+                "max_wait_time": self._max_wait_time,
+            }
+
+    def _submit(self, fn: Callable[[], T], deadline: Optional[float]) -> Future:
+        submitted_at = time.monotonic()
+        context = contextvars.copy_context()
+
+        def run() -> T:
+            wait_time = time.monotonic() - submitted_at
+            with self._metrics_lock:
+                self._started += 1
+                self._total_wait_time += wait_time
+                self._max_wait_time = max(self._max_wait_time, wait_time)
+            try:
+                # branches started by this function share its deadline
+                return context.run(self._run_with_deadline, fn, deadline)
+            finally:
+                with self._metrics_lock:
+                    self._finished += 1
+
+        with self._metrics_lock:
+            self._submitted += 1
+        return self._pool.submit(run)
+
+    @staticmethod
+    def _run_with_deadline(fn: Callable[[], T], deadline: Optional[float]) -> T:
+        _deadline.set(deadline)
+        return fn()
+
+    def _cancel(self, futures: set[Future]) -> int:
+        cancelled = sum(1 for future in futures if future.cancel())
+        with self._metrics_lock:
+            self._cancelled += cancelled
+        return cancelled
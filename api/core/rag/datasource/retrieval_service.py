@@ -1,10 +1,12 @@
-import threading
+from collections.abc import Callable
+from functools import partial
 from typing import Optional
 
 from flask import Flask, current_app
 
 from core.rag.data_post_processor.data_post_processor import DataPostProcessor
 from core.rag.datasource.keyword.keyword_factory import Keyword
+from core.rag.datasource.retrieval_executor import RetrievalExecutor
 from core.rag.datasource.vdb.vector_factory import Vector
 from core.rag.embedding.retrieval import RetrievalSegments
 from core.rag.index_processor.constant.index_type import IndexType
@@ -46,64 +48,65 @@ class RetrievalService:
 
         if not dataset or dataset.available_document_count == 0 or dataset.available_segment_count == 0:
             return []
-        all_documents: list[Document] = []
-        threads: list[threading.Thread] = []
-        exceptions: list[str] = []
+        flask_app = current_app._get_current_object()  # type: ignore
+        searches: list[Callable[[], tuple[list[Document], list[str]]]] = []
         # retrieval_model source with keyword
         if retrieval_method == "keyword_search":
-            keyword_thread = threading.Thread(
-                target=RetrievalService.keyword_search,
-                kwargs={
-                    "flask_app": current_app._get_current_object(),  # type: ignore
-                    "dataset_id": dataset_id,
-                    "query": query,
-                    "top_k": top_k,
-                    "all_documents": all_documents,
-                    "exceptions": exceptions,
-                },
+            searches.append(
+                partial(
+                    cls._search,
+                    RetrievalService.keyword_search,
+                    flask_app=flask_app,
+                    dataset=dataset,
+                    query=query,
+                    top_k=top_k,
+                )
             )
-            threads.append(keyword_thread)
-            keyword_thread.start()
         # retrieval_model source with semantic
         if RetrievalMethod.is_support_semantic_search(retrieval_method):
-            embedding_thread = threading.Thread(
-                target=RetrievalService.embedding_search,
-                kwargs={
-                    "flask_app": current_app._get_current_object(),  # type: ignore
-                    "dataset_id": dataset_id,
-                    "query": query,
-                    "top_k": top_k,
-                    "score_threshold": score_threshold,
-                    "reranking_model": reranking_model,
-                    "all_documents": all_documents,
-                    "retrieval_method": retrieval_method,
-                    "exceptions": exceptions,
-                },
+            searches.append(
+                partial(
+                    cls._search,
+                    RetrievalService.embedding_search,
+                    flask_app=flask_app,
+                    dataset=dataset,
+                    query=query,
+                    top_k=top_k,
+                    score_threshold=score_threshold,
+                    reranking_model=reranking_model,
+                    retrieval_method=retrieval_method,
+                )
             )
-            threads.append(embedding_thread)
-            embedding_thread.start()
 
         # retrieval source with full text
         if RetrievalMethod.is_support_fulltext_search(retrieval_method):
-            full_text_index_thread = threading.Thread(
-                target=RetrievalService.full_text_index_search,
-                kwargs={
-                    "flask_app": current_app._get_current_object(),  # type: ignore
-                    "dataset_id": dataset_id,
-                    "query": query,
-                    "retrieval_method": retrieval_method,
-                    "score_threshold": score_threshold,
-                    "top_k": top_k,
-                    "reranking_model": reranking_model,
-                    "all_documents": all_documents,
-                    "exceptions": exceptions,
-                },
+            searches.append(
+                partial(
+                    cls._search,
+                    RetrievalService.full_text_index_search,
+                    flask_app=flask_app,
+                    dataset=dataset,
+                    query=query,
+                    retrieval_method=retrieval_method,
+                    score_threshold=score_threshold,
+                    top_k=top_k,
+                    reranking_model=reranking_model,
+                )
             )
-            threads.append(full_text_index_thread)
-            full_text_index_thread.start()
 
-        for thread in threads:
-            thread.join()
+        all_documents: list[Document] = []
+        exceptions: list[str] = []
+        # the retrieval fails as soon as one search fails, the other searches are not waited for
+        results = RetrievalExecutor.get(RetrievalExecutor.SEARCH).map(
+            searches, is_enough=lambda finished: any(search_exceptions for _, search_exceptions in finished)
+        )
+        if searches and all(result is None for result in results):
+            exceptions.append("Retrieval timed out")
+        for result in results:
+            # searches slower than the retrieval deadline are skipped
+            if result is not None:
+                all_documents.extend(result[0])
+                exceptions.extend(result[1])
 
         if exceptions:
             exception_message = ";\n".join(exceptions)
@@ -132,15 +135,25 @@ class RetrievalService:
         )
         return all_documents
 
+    @staticmethod
+    def _search(search: Callable[..., None], **kwargs) -> tuple[list[Document], list[str]]:
+        documents: list[Document] = []
+        exceptions: list[str] = []
+        try:
+            search(all_documents=documents, exceptions=exceptions, **kwargs)
+        except Exception as e:
+            # failures are reported as such, only searches missing the retrieval deadline have no result
+            exceptions.append(str(e))
+        return documents, exceptions
+
     @classmethod
     def keyword_search(
-        cls, flask_app: Flask, dataset_id: str, query: str, top_k: int, all_documents: list, exceptions: list
+        cls, flask_app: Flask, dataset: Dataset, query: str, top_k: int, all_documents: list, exceptions: list
     ):
         with flask_app.app_context():
             try:
-                dataset = db.session.query(Dataset).filter(Dataset.id == dataset_id).first()
-                if not dataset:
-                    raise ValueError("dataset not found")
+                # attach the dataset loaded by the caller to the session of this thread without querying it again
+                dataset = db.session.merge(dataset, load=False)
 
                 keyword = Keyword(dataset=dataset)
 
@@ -153,7 +166,7 @@ class RetrievalService:
     def embedding_search(
         cls,
         flask_app: Flask,
-        dataset_id: str,
+        dataset: Dataset,
         query: str,
         top_k: int,
         score_threshold: Optional[float],
@@ -164,9 +177,7 @@ class RetrievalService:
     ):
         with flask_app.app_context():
             try:
-                dataset = db.session.query(Dataset).filter(Dataset.id == dataset_id).first()
-                if not dataset:
-                    raise ValueError("dataset not found")
+                dataset = db.session.merge(dataset, load=False)
 
                 vector = Vector(dataset=dataset)
 
@@ -205,7 +216,7 @@ class RetrievalService:
     def full_text_index_search(
         cls,
         flask_app: Flask,
-        dataset_id: str,
+        dataset: Dataset,
         query: str,
         top_k: int,
         score_threshold: Optional[float],
@@ -216,9 +227,7 @@ class RetrievalService:
     ):
         with flask_app.app_context():
             try:
-                dataset = db.session.query(Dataset).filter(Dataset.id == dataset_id).first()
-                if not dataset:
-                    raise ValueError("dataset not found")
+                dataset = db.session.merge(dataset, load=False)
 
                 vector_processor = Vector(
                     dataset=dataset,
@@ -254,86 +263,102 @@ class RetrievalService:
 
     @staticmethod
     def format_retrieval_documents(documents: list[Document]) -> list[RetrievalSegments]:
+        document_ids = {document.metadata.get("document_id") for document in documents}
+        document_ids.discard(None)
+        if not document_ids:
+            return []
+
+        dataset_documents = {
+            dataset_document.id: dataset_document
+            for dataset_document in db.session.query(
+                DatasetDocument.id, DatasetDocument.dataset_id, DatasetDocument.doc_form
+            )
+            .filter(DatasetDocument.id.in_(document_ids))
+            .all()
+        }
+
+        # group index node ids by index type, then load segments and child chunks of all datasets at once
+        index_node_ids: dict[str, set[str]] = {}
+        child_index_node_ids: dict[str, set[str]] = {}
+        for document in documents:
+            dataset_document = dataset_documents.get(document.metadata.get("document_id"))
+            doc_id = document.metadata.get("doc_id")
+            if not dataset_document or not doc_id:
+                continue
+            if dataset_document.doc_form == IndexType.PARENT_CHILD_INDEX:
+                child_index_node_ids.setdefault(dataset_document.dataset_id, set()).add(doc_id)
+            else:
+                index_node_ids.setdefault(dataset_document.dataset_id, set()).add(doc_id)
+
+        segments: dict[tuple[str, str], DocumentSegment] = {}
+        if index_node_ids:
+            for segment in (
+                db.session.query(DocumentSegment)
+                .filter(
+                    DocumentSegment.dataset_id.in_(index_node_ids.keys()),
+                    DocumentSegment.enabled == True,
+                    DocumentSegment.status == "completed",
+                    DocumentSegment.index_node_id.in_(set().union(*index_node_ids.values())),
+                )
+                .all()
+            ):
+                if segment.index_node_id in index_node_ids[segment.dataset_id]:
+                    segments.setdefault((segment.dataset_id, segment.index_node_id), segment)
+
+        child_chunks: dict[tuple[str, str], tuple[ChildChunk, DocumentSegment]] = {}
+        if child_index_node_ids:
+            for child_chunk, segment in (
+                db.session.query(ChildChunk, DocumentSegment)
+                .join(DocumentSegment, ChildChunk.segment_id == DocumentSegment.id)
+                .filter(
+                    ChildChunk.index_node_id.in_(set().union(*child_index_node_ids.values())),
+                    DocumentSegment.dataset_id.in_(child_index_node_ids.keys()),
+                    DocumentSegment.enabled == True,
+                    DocumentSegment.status == "completed",
+                )
+                .all()
+            ):
+                if child_chunk.index_node_id in child_index_node_ids[segment.dataset_id]:
+                    child_chunks.setdefault((segment.dataset_id, child_chunk.index_node_id), (child_chunk, segment))
+
         records = []
-        include_segment_ids = []
         segment_child_map = {}
         for document in documents:
-            document_id = document.metadata.get("document_id")
-            dataset_document = db.session.query(DatasetDocument).filter(DatasetDocument.id == document_id).first()
-            if dataset_document:
-                if dataset_document.doc_form == IndexType.PARENT_CHILD_INDEX:
-                    child_index_node_id = document.metadata.get("doc_id")
-                    result = (
-                        db.session.query(ChildChunk, DocumentSegment)
-                        .join(DocumentSegment, ChildChunk.segment_id == DocumentSegment.id)
-                        .filter(
-                            ChildChunk.index_node_id == child_index_node_id,
-                            DocumentSegment.dataset_id == dataset_document.dataset_id,
-                            DocumentSegment.enabled == True,
-                            DocumentSegment.status == "completed",
-                        )
-                        .first()
-                    )
-                    if result:
-                        child_chunk, segment = result
-                        if not segment:
-                            continue
-                        if segment.id not in include_segment_ids:
-                            include_segment_ids.append(segment.id)
-                            child_chunk_detail = {
-                                "id": child_chunk.id,
-                                "content": child_chunk.content,
-                                "position": child_chunk.position,
-                                "score": document.metadata.get("score", 0.0),
-                            }
-                            map_detail = {
-                                "max_score": document.metadata.get("score", 0.0),
-                                "child_chunks": [child_chunk_detail],
-                            }
-                            segment_child_map[segment.id] = map_detail
-                            record = {
-                                "segment": segment,
-                            }
-                            records.append(record)
-                        else:
-                            child_chunk_detail = {
-                                "id": child_chunk.id,
-                                "content": child_chunk.content,
-                                "position": child_chunk.position,
-                                "score": document.metadata.get("score", 0.0),
-                            }
-                            segment_child_map[segment.id]["child_chunks"].append(child_chunk_detail)
-                            segment_child_map[segment.id]["max_score"] = max(
-                                segment_child_map[segment.id]["max_score"], document.metadata.get("score", 0.0)
-                            )
-                    else:
-                        continue
+            dataset_document = dataset_documents.get(document.metadata.get("document_id"))
+            doc_id = document.metadata.get("doc_id")
+            if not dataset_document or not doc_id:
+                continue
+            if dataset_document.doc_form == IndexType.PARENT_CHILD_INDEX:
+                result = child_chunks.get((dataset_document.dataset_id, doc_id))
+                if not result:
+                    continue
+                child_chunk, segment = result
+                child_chunk_detail = {
+                    "id": child_chunk.id,
+                    "content": child_chunk.content,
+                    "position": child_chunk.position,
+                    "score": document.metadata.get("score", 0.0),
+                }
+                if segment.id not in segment_child_map:
+                    segment_child_map[segment.id] = {
+                        "max_score": document.metadata.get("score", 0.0),
+                        "child_chunks": [child_chunk_detail],
+                    }
+                    records.append({"segment": segment})
                 else:
-                    index_node_id = document.metadata["doc_id"]
-
-                    segment = (
-                        db.session.query(DocumentSegment)
-                        .filter(
-                            DocumentSegment.dataset_id == dataset_document.dataset_id,
-                            DocumentSegment.enabled == True,
-                            DocumentSegment.status == "completed",
-                            DocumentSegment.index_node_id == index_node_id,
-                        )
-                        .first()
+                    segment_child_map[segment.id]["child_chunks"].append(child_chunk_detail)
+                    segment_child_map[segment.id]["max_score"] = max(
+                        segment_child_map[segment.id]["max_score"], document.metadata.get("score", 0.0)
                     )
+            else:
+                index_segment = segments.get((dataset_document.dataset_id, doc_id))
+                if not index_segment:
+                    continue
+                records.append({"segment": index_segment, "score": document.metadata.get("score", None)})
 
-                    if not segment:
-                        continue
-                    include_segment_ids.append(segment.id)
-                    record = {
-                        "segment": segment,
-                        "score": document.metadata.get("score", None),
-                    }
-
-                    records.append(record)
-            for record in records:
-                if record["segment"].id in segment_child_map:
-                    record["child_chunks"] = segment_child_map[record["segment"].id].get("child_chunks", None)
-                    record["score"] = segment_child_map[record["segment"].id]["max_score"]
+        for record in records:
+            if record["segment"].id in segment_child_map:
+                record["child_chunks"] = segment_child_map[record["segment"].id].get("child_chunks", None)
+                record["score"] = segment_child_map[record["segment"].id]["max_score"]
 
         return [RetrievalSegments(**record) for record in records]
@@ -4,9 +4,9 @@ from contextlib import contextmanager
 from typing import Any
 
 import psycopg2.extras  # type: ignore
-import psycopg2.pool  # type: ignore
 from pydantic import BaseModel, model_validator
 
+from core.rag.datasource.vdb.vector_client_registry import BlockingConnectionPool, VectorClientRegistry
 from core.rag.models.document import Document
 from extensions.ext_redis import redis_client
 
@@ -50,7 +50,7 @@ class AnalyticdbVectorBySql:
         self.pool = None
         self._initialize()
         if not self.pool:
-            self.pool = self._create_connection_pool()
+            self.pool = self._get_connection_pool()
 
     def _initialize(self) -> None:
         cache_key = f"vector_initialize_{self.config.host}"
@@ -62,8 +62,11 @@ class AnalyticdbVectorBySql:
             self._initialize_vector_database()
             redis_client.set(database_exist_cache_key, 1, ex=3600)
 
+    def _get_connection_pool(self):
+        return VectorClientRegistry.get_or_create("analyticdb_sql", self.config, self._create_connection_pool)
+
     def _create_connection_pool(self):
-        return psycopg2.pool.SimpleConnectionPool(
+        return BlockingConnectionPool(
             self.config.min_connection,
             self.config.max_connection,
             host=self.config.host,
@@ -104,7 +107,7 @@ class AnalyticdbVectorBySql:
         finally:
             cur.close()
             conn.close()
-        self.pool = self._create_connection_pool()
+        self.pool = self._get_connection_pool()
         with self._get_cursor() as cur:
             try:
                 cur.execute("CREATE TEXT SEARCH CONFIGURATION zh_cn (PARSER = zhparser)")
@@ -11,6 +11,7 @@ from pydantic import BaseModel, model_validator
 
 from core.rag.datasource.vdb.field import Field
 from core.rag.datasource.vdb.vector_base import BaseVector
+from core.rag.datasource.vdb.vector_client_registry import VectorClientRegistry
 from core.rag.datasource.vdb.vector_factory import AbstractVectorFactory
 from core.rag.datasource.vdb.vector_type import VectorType
 from core.rag.embedding.embedding_base import Embeddings
@@ -44,8 +45,10 @@ class ElasticSearchConfig(BaseModel):
 class ElasticSearchVector(BaseVector):
     def __init__(self, index_name: str, config: ElasticSearchConfig, attributes: list):
         super().__init__(index_name.lower())
-        self._client = self._init_client(config)
-        self._version = self._get_version()
+        self._client = VectorClientRegistry.get_or_create(
+            VectorType.ELASTICSEARCH, config, lambda: self._init_client(config)
+        )
+        self._version = VectorClientRegistry.get_or_create("elasticsearch_version", config, self._get_version)
         self._check_version()
         self._attributes = attributes
 
@@ -10,6 +10,7 @@ from pymilvus.milvus_client import IndexParams  # type: ignore
 from configs import dify_config
 from core.rag.datasource.vdb.field import Field
 from core.rag.datasource.vdb.vector_base import BaseVector
+from core.rag.datasource.vdb.vector_client_registry import VectorClientRegistry
 from core.rag.datasource.vdb.vector_factory import AbstractVectorFactory
 from core.rag.datasource.vdb.vector_type import VectorType
 from core.rag.embedding.embedding_base import Embeddings
@@ -69,7 +70,7 @@ class MilvusVector(BaseVector):
     def __init__(self, collection_name: str, config: MilvusConfig):
         super().__init__(collection_name)
         self._client_config = config
-        self._client = self._init_client(config)
+        self._client = VectorClientRegistry.get_or_create(VectorType.MILVUS, config, lambda: self._init_client(config))
         self._consistency_level = "Session"  # Consistency level for Milvus operations
         self._fields: list[str] = []  # List of fields in the collection
         self._hybrid_search_enabled = self._check_hybrid_search_support()  # Check if hybrid search is supported
@@ -83,7 +84,9 @@ class MilvusVector(BaseVector):
             return False
 
         try:
-            milvus_version = self._client.get_server_version()
+            milvus_version = VectorClientRegistry.get_or_create(
+                "milvus_version", self._client_config, self._client.get_server_version
+            )
             return version.parse(milvus_version).base_version >= version.parse("2.5.0").base_version
         except Exception as e:
             logger.warning(f"Failed to check Milvus version: {str(e)}. Disabling hybrid search.")
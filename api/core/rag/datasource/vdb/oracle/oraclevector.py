@@ -12,6 +12,7 @@ from pydantic import BaseModel, model_validator
 
 from configs import dify_config
 from core.rag.datasource.vdb.vector_base import BaseVector
+from core.rag.datasource.vdb.vector_client_registry import VectorClientRegistry
 from core.rag.datasource.vdb.vector_factory import AbstractVectorFactory
 from core.rag.datasource.vdb.vector_type import VectorType
 from core.rag.embedding.embedding_base import Embeddings
@@ -63,7 +64,9 @@ INDEXTYPE IS CTXSYS.CONTEXT PARAMETERS
 class OracleVector(BaseVector):
     def __init__(self, collection_name: str, config: OracleVectorConfig):
         super().__init__(collection_name)
-        self.pool = self._create_connection_pool(config)
+        self.pool = VectorClientRegistry.get_or_create(
+            VectorType.ORACLE, config, lambda: self._create_connection_pool(config)
+        )
         self.table_name = f"embedding_{collection_name}"
 
     def get_type(self) -> str:
@@ -14,6 +14,7 @@ from sqlalchemy.orm import Mapped, Session, mapped_column
 from configs import dify_config
 from core.rag.datasource.vdb.pgvecto_rs.collection import CollectionORM
 from core.rag.datasource.vdb.vector_base import BaseVector
+from core.rag.datasource.vdb.vector_client_registry import VectorClientRegistry
 from core.rag.datasource.vdb.vector_factory import AbstractVectorFactory
 from core.rag.datasource.vdb.vector_type import VectorType
 from core.rag.embedding.embedding_base import Embeddings
@@ -54,10 +55,7 @@ class PGVectoRS(BaseVector):
         self._url = (
             f"postgresql+psycopg2://{config.user}:{config.password}@{config.host}:{config.port}/{config.database}"
         )
-        self._client = create_engine(self._url)
-        with Session(self._client) as session:
-            session.execute(text("CREATE EXTENSION IF NOT EXISTS vectors"))
-            session.commit()
+        self._client = VectorClientRegistry.get_or_create(VectorType.PGVECTO_RS, config, self._create_engine)
         self._fields: list[str] = []
 
         class _Table(CollectionORM):
@@ -74,6 +72,13 @@ class PGVectoRS(BaseVector):
         self._table = _Table
         self._distance_op = "<=>"
 
+    def _create_engine(self):
+        engine = create_engine(self._url)
+        with Session(engine) as session:
+            session.execute(text("CREATE EXTENSION IF NOT EXISTS vectors"))
+            session.commit()
+        return engine
+
     def get_type(self) -> str:
         return VectorType.PGVECTO_RS
 
@@ -1,14 +1,17 @@
+import hashlib
 import json
+import re
 import uuid
 from contextlib import contextmanager
-from typing import Any
+from typing import Any, Optional
 
 import psycopg2.extras  # type: ignore
-import psycopg2.pool  # type: ignore
 from pydantic import BaseModel, model_validator
 
 from configs import dify_config
+from core.rag.datasource.vdb.field import Field
 from core.rag.datasource.vdb.vector_base import BaseVector
+from core.rag.datasource.vdb.vector_client_registry import BlockingConnectionPool, VectorClientRegistry
 from core.rag.datasource.vdb.vector_factory import AbstractVectorFactory
 from core.rag.datasource.vdb.vector_type import VectorType
 from core.rag.embedding.embedding_base import Embeddings
@@ -25,6 +28,8 @@ class PGVectorConfig(BaseModel):
     database: str
     min_connection: int
     max_connection: int
+    hnsw_ef_search: int = 0
+    text_search_config: str = "english"
 
     @model_validator(mode="before")
     @classmethod
@@ -45,18 +50,32 @@ class PGVectorConfig(BaseModel):
             raise ValueError("config PGVECTOR_MAX_CONNECTION is required")
         if values["min_connection"] > values["max_connection"]:
             raise ValueError("config PGVECTOR_MIN_CONNECTION should less than PGVECTOR_MAX_CONNECTION")
+        # the text search config is part of the generated column definition and can not be a query parameter
+        if not re.fullmatch(r"[A-Za-z_][A-Za-z0-9_.]*", values.get("text_search_config", "english")):
+            raise ValueError("config PGVECTOR_TEXT_SEARCH_CONFIG should be the name of a text search configuration")
         return values
 
 
+# the text search config of generated tsvector columns must be explicit for the expression to be immutable
 SQL_CREATE_TABLE = """
 CREATE TABLE IF NOT EXISTS {table_name} (
     id UUID PRIMARY KEY,
     text TEXT NOT NULL,
     meta JSONB NOT NULL,
-    embedding vector({dimension}) NOT NULL
+    embedding vector({dimension}) NOT NULL,
+    text_tsv tsvector GENERATED ALWAYS AS (to_tsvector('{text_search_config}', coalesce(text, ''))) STORED
 ) using heap;
 """
 
+SQL_ADD_TEXT_TSV_COLUMN = """
+ALTER TABLE {table_name} ADD COLUMN IF NOT EXISTS
+text_tsv tsvector GENERATED ALWAYS AS (to_tsvector('{text_search_config}', coalesce(text, ''))) STORED;
+"""
+
+SQL_CREATE_TEXT_TSV_INDEX = """
+CREATE INDEX IF NOT EXISTS {index_name} ON {table_name} USING gin (text_tsv);
+"""
+
 SQL_CREATE_INDEX = """
 CREATE INDEX IF NOT EXISTS embedding_cosine_v1_idx ON {table_name} 
 USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64);
@@ -66,14 +85,18 @@ USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64);
 class PGVector(BaseVector):
     def __init__(self, collection_name: str, config: PGVectorConfig):
         super().__init__(collection_name)
-        self.pool = self._create_connection_pool(config)
+        self.pool = VectorClientRegistry.get_or_create(
+            VectorType.PGVECTOR, config, lambda: self._create_connection_pool(config)
+        )
         self.table_name = f"embedding_{collection_name}"
+        self.hnsw_ef_search = config.hnsw_ef_search
+        self.text_search_config = config.text_search_config
 
     def get_type(self) -> str:
         return VectorType.PGVECTOR
 
     def _create_connection_pool(self, config: PGVectorConfig):
-        return psycopg2.pool.SimpleConnectionPool(
+        return BlockingConnectionPool(
             config.min_connection,
             config.max_connection,
             host=config.host,
@@ -152,38 +175,63 @@ class PGVector(BaseVector):
 
         :param query_vector: The input vector to search for similar items.
         :param top_k: The number of nearest neighbors to return, default is 5.
+        :param score_threshold: Minimum cosine similarity of the returned items.
+        :param filter: Metadata values to filter on, `group_id` is ignored as documents do not store it.
         :return: List of Documents that are nearest to the query vector.
         """
-        top_k = kwargs.get("top_k", 4)
+        top_k = int(kwargs.get("top_k", 4))
+        score_threshold = float(kwargs.get("score_threshold") or 0.0)
+        where_clauses, params = self._build_filter_clauses(kwargs.get("filter"))
+        # score = 1 - distance, the threshold is applied by the database instead of after fetching top_k rows
+        where_clauses.append("embedding <=> %(query_vector)s::vector < %(max_distance)s")
+        params["query_vector"] = json.dumps(query_vector, separators=(",", ":"))
+        params["max_distance"] = 1 - score_threshold
+        params["top_k"] = top_k
 
         with self._get_cursor() as cur:
+            if self.hnsw_ef_search:
+                # only applies to the transaction of this search
+                cur.execute("SET LOCAL hnsw.ef_search = %s", (self.hnsw_ef_search,))
             cur.execute(
-                f"SELECT meta, text, embedding <=> %s AS distance FROM {self.table_name}"
-                f" ORDER BY distance LIMIT {top_k}",
-                (json.dumps(query_vector),),
+                f"SELECT meta, text, embedding <=> %(query_vector)s::vector AS distance FROM {self.table_name}"
+                f" WHERE {' AND '.join(where_clauses)}"
+                f" ORDER BY distance LIMIT %(top_k)s",
+                params,
             )
             docs = []
-            score_threshold = float(kwargs.get("score_threshold") or 0.0)
             for record in cur:
                 metadata, text, distance = record
-                score = 1 - distance
-                metadata["score"] = score
-                if score > score_threshold:
-                    docs.append(Document(page_content=text, metadata=metadata))
+                metadata["score"] = 1 - distance
+                docs.append(Document(page_content=text, metadata=metadata))
         return docs
 
     def search_by_full_text(self, query: str, **kwargs: Any) -> list[Document]:
-        top_k = kwargs.get("top_k", 5)
+        top_k = int(kwargs.get("top_k", 5))
+        where_clauses, params = self._build_filter_clauses(kwargs.get("filter"))
+        # f"'{query}'" is required in order to account for whitespace in query
+        params["query"] = f"'{query}'"
+        params["top_k"] = top_k
+
+        text_tsv_config = self._get_text_tsv_config()
+        if text_tsv_config is not None:
+            tsvector = "text_tsv"
+            # queries are parsed with the config the stored tsvector was generated with, not the current setting
+            tsquery = "plainto_tsquery(%(text_search_config)s::regconfig, %(query)s)"
+            params["text_search_config"] = text_tsv_config
+        else:
+            # collections created before the text_tsv column are searched without index until they are upgraded
+            tsvector = "to_tsvector(coalesce(text, ''))"
+            tsquery = "plainto_tsquery(%(query)s)"
+        where_clauses.append(f"{tsvector} @@ {tsquery}")
 
         with self._get_cursor() as cur:
             cur.execute(
-                f"""SELECT meta, text, ts_rank(to_tsvector(coalesce(text, '')), plainto_tsquery(%s)) AS score
+                f"""SELECT meta, text, ts_rank({tsvector}, {tsquery}) AS score
                 FROM {self.table_name}
-                WHERE to_tsvector(text) @@ plainto_tsquery(%s)
+                WHERE {" AND ".join(where_clauses)}
                 ORDER BY score DESC
-                LIMIT {top_k}""",
-                # f"'{query}'" is required in order to account for whitespace in query
-                (f"'{query}'", f"'{query}'"),
+                LIMIT %(top_k)s""",
+                params,
             )
 
             docs = []
@@ -195,6 +243,74 @@ class PGVector(BaseVector):
 
         return docs
 
+    @staticmethod
+    def _build_filter_clauses(filter: Optional[dict[str, list]]) -> tuple[list[str], dict[str, Any]]:
+        where_clauses = []
+        params: dict[str, Any] = {}
+        for i, (key, values) in enumerate((filter or {}).items()):
+            # collections are not shared by groups and neither dataset nor annotation documents store their
+            # group id, documents are only filtered on keys they store
+            if key == Field.GROUP_KEY.value:
+                continue
+            params[f"filter_key_{i}"] = key
+            params[f"filter_values_{i}"] = [str(value) for value in values]
+            where_clauses.append(f"meta->>%(filter_key_{i})s = ANY(%(filter_values_{i})s)")
+        return where_clauses, params
+
+    @property
+    def _text_tsv_config_cache_key(self) -> str:
+        return f"vector_text_tsv_config_{self._collection_name}"
+
+    def _get_text_tsv_config(self) -> Optional[str]:
+        """
+        Get the text search config the text_tsv column of the collection is generated with
+        :return: text search config, None when the collection has no text_tsv column
+        """
+        cached = redis_client.get(self._text_tsv_config_cache_key)
+        if cached is not None:
+            return cached.decode("utf-8") or None
+
+        with self._get_cursor() as cur:
+            text_tsv_config = self._fetch_text_tsv_config(cur)
+        redis_client.set(self._text_tsv_config_cache_key, text_tsv_config or "", ex=3600)
+        return text_tsv_config
+
+    def _fetch_text_tsv_config(self, cur) -> Optional[str]:
+        # unquoted identifiers are stored lowercased and truncated to 63 characters
+        cur.execute(
+            """SELECT pg_get_expr(d.adbin, d.adrelid)
+            FROM pg_attribute a
+            JOIN pg_class c ON c.oid = a.attrelid
+            JOIN pg_attrdef d ON d.adrelid = a.attrelid AND d.adnum = a.attnum
+            WHERE c.relname = %s AND pg_table_is_visible(c.oid) AND a.attname = 'text_tsv' AND NOT a.attisdropped""",
+            (self.table_name.lower()[:63],),
+        )
+        row = cur.fetchone()
+        if row is None:
+            return None
+        # the generation expression reads like to_tsvector('english'::regconfig, COALESCE(text, ''::text))
+        match = re.match(r"to_tsvector\('([^']+)'::regconfig", row[0])
+        return match.group(1) if match else self.text_search_config
+
+    def upgrade_full_text_index(self) -> None:
+        """
+        Add the stored tsvector column and its GIN index to a collection created before they existed.
+        Adding the column rewrites the table, so this is run by a command rather than on first search.
+        """
+        with self._get_cursor() as cur:
+            cur.execute(
+                SQL_ADD_TEXT_TSV_COLUMN.format(table_name=self.table_name, text_search_config=self.text_search_config)
+            )
+            cur.execute(
+                SQL_CREATE_TEXT_TSV_INDEX.format(table_name=self.table_name, index_name=self._text_tsv_index_name)
+            )
+        redis_client.delete(self._text_tsv_config_cache_key)
+
+    @property
+    def _text_tsv_index_name(self) -> str:
+        # table names are close to the identifier length limit, derive a short index name from them
+        return f"text_tsv_idx_{hashlib.md5(self.table_name.lower()[:63].encode()).hexdigest()}"
+
     def delete(self) -> None:
         with self._get_cursor() as cur:
             cur.execute(f"DROP TABLE IF EXISTS {self.table_name}")
@@ -209,7 +325,18 @@ class PGVector(BaseVector):
 
             with self._get_cursor() as cur:
                 cur.execute("CREATE EXTENSION IF NOT EXISTS vector")
-                cur.execute(SQL_CREATE_TABLE.format(table_name=self.table_name, dimension=dimension))
+                cur.execute(
+                    SQL_CREATE_TABLE.format(
+                        table_name=self.table_name, dimension=dimension, text_search_config=self.text_search_config
+                    )
+                )
+                # existing collections get the text_tsv column from the add-pgvector-full-text-index command
+                if self._fetch_text_tsv_config(cur) is not None:
+                    cur.execute(
+                        SQL_CREATE_TEXT_TSV_INDEX.format(
+                            table_name=self.table_name, index_name=self._text_tsv_index_name
+                        )
+                    )
                 # PG hnsw index only support 2000 dimension or less
                 # ref: https://github.com/pgvector/pgvector?tab=readme-ov-file#indexing
                 if dimension <= 2000:
@@ -237,5 +364,7 @@ class PGVectorFactory(AbstractVectorFactory):
                 database=dify_config.PGVECTOR_DATABASE or "postgres",
                 min_connection=dify_config.PGVECTOR_MIN_CONNECTION,
                 max_connection=dify_config.PGVECTOR_MAX_CONNECTION,
+                hnsw_ef_search=dify_config.PGVECTOR_HNSW_EF_SEARCH,
+                text_search_config=dify_config.PGVECTOR_TEXT_SEARCH_CONFIG,
             ),
         )
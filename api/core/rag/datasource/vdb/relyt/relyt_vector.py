@@ -20,6 +20,7 @@ except ImportError:
 
 from configs import dify_config
 from core.rag.datasource.vdb.vector_base import BaseVector
+from core.rag.datasource.vdb.vector_client_registry import VectorClientRegistry
 from core.rag.models.document import Document
 from extensions.ext_redis import redis_client
 
@@ -57,7 +58,7 @@ class RelytVector(BaseVector):
         self._url = (
             f"postgresql+psycopg2://{config.user}:{config.password}@{config.host}:{config.port}/{config.database}"
         )
-        self.client = create_engine(self._url)
+        self.client = VectorClientRegistry.get_or_create(VectorType.RELYT, config, lambda: create_engine(self._url))
         self._fields: list[str] = []
         self._group_id = group_id
 
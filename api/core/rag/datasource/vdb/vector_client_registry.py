@@ -0,0 +1,91 @@
+import os
+import threading
+from collections.abc import Callable
+from typing import Any, Optional, TypeVar, cast
+
+import psycopg2.pool  # type: ignore
+from pydantic import BaseModel
+
+T = TypeVar("T")
+
+
+class VectorClientRegistry:
+    """
+    Process-wide registry of vector store clients and connection pools, keyed by vector store type and
+    connection config, so vector instances built per dataset and per query reuse established connections.
+    """
+
+    _lock = threading.Lock()
+    _clients: dict[tuple[str, str], Any] = {}
+    # locks serializing the creation of each client, so that creating a slow client does not block the others
+    _creation_locks: dict[tuple[str, str], threading.Lock] = {}
+    _pid: Optional[int] = None
+    # clients inherited from the parent process, kept referenced so that garbage collecting them does not
+    # close connections the parent process is still using
+    _inherited_clients: list[Any] = []
+
+    @classmethod
+    def get_or_create(cls, namespace: str, config: BaseModel, factory: Callable[[], T]) -> T:
+        """
+        Get the client shared in the current process for the config, creating it on first use
+        :param namespace: vector store type or purpose of the client
+        :param config: connection config of the client
+        :param factory: function creating the client
+        :return: client
+        """
+        key = (namespace, config.model_dump_json())
+        with cls._lock:
+            if cls._pid != os.getpid():
+                cls._inherited_clients.extend(cls._clients.values())
+                cls._clients = {}
+                cls._creation_locks = {}
+                cls._pid = os.getpid()
+
+            if key in cls._clients:
+                return cast(T, cls._clients[key])
+            creation_lock = cls._creation_locks.setdefault(key, threading.Lock())
+
+        with creation_lock:
+            with cls._lock:
+                if key in cls._clients:
+                    return cast(T, cls._clients[key])
+
+            client = factory()
+            with cls._lock:
+                cls._clients[key] = client
+            return client
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls._lock:
+            cls._clients = {}
+            cls._creation_locks = {}
+
+
+class BlockingConnectionPool(psycopg2.pool.ThreadedConnectionPool):
+    """
+    Thread-safe psycopg2 connection pool which waits for a connection to be returned when all `maxconn`
+    connections are in use instead of failing, and replaces connections closed by the server.
+    """
+
+    def __init__(self, minconn: int, maxconn: int, *args, **kwargs):
+        self._semaphore = threading.BoundedSemaphore(maxconn)
+        super().__init__(minconn, maxconn, *args, **kwargs)
+
+    def getconn(self, key=None):
+        self._semaphore.acquire()
+        try:
+            conn = super().getconn(key)
+            if conn.closed:
+                super().putconn(conn, key, close=True)
+                conn = super().getconn(key)
+            return conn
+        except Exception:
+            self._semaphore.release()
+            raise
+
+    def putconn(self, conn=None, key=None, close=False):
+        try:
+            super().putconn(conn, key, close=close or bool(conn is not None and conn.closed))
+        finally:
+            self._semaphore.release()
@@ -1,12 +1,14 @@
-import base64
 import logging
+import pickle
 from typing import Any, Optional, cast
 
 import numpy as np
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.exc import IntegrityError
 
 from configs import dify_config
 from core.entities.embedding_type import EmbeddingInputType
+from core.helper.lru_cache import TTLCache
 from core.model_manager import ModelInstance
 from core.model_runtime.entities.model_entities import ModelPropertyKey
 from core.model_runtime.model_providers.__base.text_embedding_model import TextEmbeddingModel
@@ -18,6 +20,9 @@ from models.dataset import Embedding
 
 logger = logging.getLogger(__name__)
 
+# max hashes per IN lookup and max rows per bulk insert of the document embedding cache
+EMBEDDING_CACHE_BATCH_SIZE = 1000
+
 
 class CacheEmbedding(Embeddings):
     def __init__(self, model_instance: ModelInstance, user: Optional[str] = None) -> None:
@@ -28,23 +33,20 @@ class CacheEmbedding(Embeddings):
         """Embed search docs in batches of 10."""
         # use doc embedding cache or store if not exists
         text_embeddings: list[Any] = [None for _ in range(len(texts))]
-        embedding_queue_indices = []
-        for i, text in enumerate(texts):
-            hash = helper.generate_text_hash(text)
-            embedding = (
-                db.session.query(Embedding)
-                .filter_by(
-                    model_name=self._model_instance.model, hash=hash, provider_name=self._model_instance.provider
-                )
-                .first()
-            )
-            if embedding:
-                text_embeddings[i] = embedding.get_embedding()
+        text_hashes = [helper.generate_text_hash(text) for text in texts]
+        cached_embeddings = self._get_cached_embeddings(set(text_hashes))
+
+        # texts with the same hash only need to be embedded once
+        embedding_queue_indices: dict[str, list[int]] = {}
+        for i, hash in enumerate(text_hashes):
+            if hash in cached_embeddings:
+                text_embeddings[i] = cached_embeddings[hash]
             else:
-                embedding_queue_indices.append(i)
+                embedding_queue_indices.setdefault(hash, []).append(i)
         if embedding_queue_indices:
-            embedding_queue_texts = [texts[i] for i in embedding_queue_indices]
-            embedding_queue_embeddings = []
+            embedding_queue_hashes = list(embedding_queue_indices.keys())
+            embedding_queue_texts = [texts[embedding_queue_indices[hash][0]] for hash in embedding_queue_hashes]
+            embedding_queue_embeddings: dict[str, list[float]] = {}
             try:
                 model_type_instance = cast(TextEmbeddingModel, self._model_instance.model_type_instance)
                 model_schema = model_type_instance.get_model_schema(
@@ -57,12 +59,13 @@ class CacheEmbedding(Embeddings):
                 )
                 for i in range(0, len(embedding_queue_texts), max_chunks):
                     batch_texts = embedding_queue_texts[i : i + max_chunks]
+                    batch_hashes = embedding_queue_hashes[i : i + max_chunks]
 
                     embedding_result = self._model_instance.invoke_text_embedding(
                         texts=batch_texts, user=self._user, input_type=EmbeddingInputType.DOCUMENT
                     )
 
-                    for vector in embedding_result.embeddings:
+                    for hash, vector in zip(batch_hashes, embedding_result.embeddings):
                         try:
                             # FIXME: type ignore for numpy here
                             normalized_embedding = (vector / np.linalg.norm(vector)).tolist()  # type: ignore
@@ -71,28 +74,13 @@ class CacheEmbedding(Embeddings):
                                 # for issue #11827  float values are not json compliant
                                 logger.warning(f"Normalized embedding is nan: {normalized_embedding}")
                                 continue
-                            embedding_queue_embeddings.append(normalized_embedding)
-                        except IntegrityError:
-                            db.session.rollback()
+                            embedding_queue_embeddings[hash] = normalized_embedding
                         except Exception as e:
                             logging.exception("Failed transform embedding")
-                cache_embeddings = []
-                try:
-                    for i, n_embedding in zip(embedding_queue_indices, embedding_queue_embeddings):
+                for hash, n_embedding in embedding_queue_embeddings.items():
+                    for i in embedding_queue_indices[hash]:
                         text_embeddings[i] = n_embedding
-                        hash = helper.generate_text_hash(texts[i])
-                        if hash not in cache_embeddings:
-                            embedding_cache = Embedding(
-                                model_name=self._model_instance.model,
-                                hash=hash,
-                                provider_name=self._model_instance.provider,
-                            )
-                            embedding_cache.set_embedding(n_embedding)
-                            db.session.add(embedding_cache)
-                            cache_embeddings.append(hash)
-                    db.session.commit()
-                except IntegrityError:
-                    db.session.rollback()
+                self._save_cached_embeddings(embedding_queue_embeddings)
             except Exception as ex:
                 db.session.rollback()
                 logger.exception("Failed to embed documents: %s")
@@ -100,16 +88,64 @@ class CacheEmbedding(Embeddings):
 
         return text_embeddings
 
+    def _get_cached_embeddings(self, hashes: set[str]) -> dict[str, list[float]]:
+        """Load cached document embeddings with one IN query per batch of hashes."""
+        cached_embeddings: dict[str, list[float]] = {}
+        hash_list = list(hashes)
+        for i in range(0, len(hash_list), EMBEDDING_CACHE_BATCH_SIZE):
+            embeddings = (
+                db.session.query(Embedding.hash, Embedding.embedding)
+                .filter(
+                    Embedding.model_name == self._model_instance.model,
+                    Embedding.provider_name == self._model_instance.provider,
+                    Embedding.hash.in_(hash_list[i : i + EMBEDDING_CACHE_BATCH_SIZE]),
+                )
+                .all()
+            )
+            for embedding in embeddings:
+                cached_embeddings[embedding.hash] = pickle.loads(embedding.embedding)
+        return cached_embeddings
+
+    def _save_cached_embeddings(self, embeddings: dict[str, list[float]]) -> None:
+        """Bulk upsert document embeddings, rows cached concurrently by other workers are kept."""
+        rows = [
+            {
+                "model_name": self._model_instance.model,
+                "hash": hash,
+                "provider_name": self._model_instance.provider,
+                "embedding": pickle.dumps(embedding, protocol=pickle.HIGHEST_PROTOCOL),
+            }
+            for hash, embedding in embeddings.items()
+        ]
+        try:
+            for i in range(0, len(rows), EMBEDDING_CACHE_BATCH_SIZE):
+                stmt = (
+                    insert(Embedding)
+                    .values(rows[i : i + EMBEDDING_CACHE_BATCH_SIZE])
+                    .on_conflict_do_nothing(index_elements=["model_name", "hash", "provider_name"])
+                )
+                db.session.execute(stmt)
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+
     def embed_query(self, text: str) -> list[float]:
         """Embed query text."""
-        # use doc embedding cache or store if not exists
+        # use query embedding cache (process memory first, then redis) or store if not exists
         hash = helper.generate_text_hash(text)
-        embedding_cache_key = f"{self._model_instance.provider}_{self._model_instance.model}_{hash}"
-        embedding = redis_client.get(embedding_cache_key)
-        if embedding:
-            redis_client.expire(embedding_cache_key, 600)
-            decoded_embedding = np.frombuffer(base64.b64decode(embedding), dtype="float")
-            return [float(x) for x in decoded_embedding]
+        embedding_cache_key = f"{self._model_instance.provider}_{self._model_instance.model}_{hash}_f32"
+        local_embedding = _get_local_query_embedding(embedding_cache_key)
+        if local_embedding:
+            return local_embedding
+
+        with redis_client.pipeline() as pipe:
+            pipe.get(embedding_cache_key)
+            pipe.expire(embedding_cache_key, dify_config.QUERY_EMBEDDING_CACHE_TTL)
+            cached_vector, _ = pipe.execute()
+        if cached_vector:
+            cached_embedding: list[float] = np.frombuffer(cached_vector, dtype=np.float32).tolist()
+            _put_local_query_embedding(embedding_cache_key, cached_embedding)
+            return cached_embedding
         try:
             embedding_result = self._model_instance.invoke_text_embedding(
                 texts=[text], user=self._user, input_type=EmbeddingInputType.QUERY
@@ -126,17 +162,31 @@ class CacheEmbedding(Embeddings):
             raise ex
 
         try:
-            # encode embedding to base64
-            embedding_vector = np.array(embedding_results)
-            vector_bytes = embedding_vector.tobytes()
-            # Transform to Base64
-            encoded_vector = base64.b64encode(vector_bytes)
-            # Transform to string
-            encoded_str = encoded_vector.decode("utf-8")
-            redis_client.setex(embedding_cache_key, 600, encoded_str)
+            # store embedding as raw float32 bytes
+            vector_bytes = np.array(embedding_results, dtype=np.float32).tobytes()
+            redis_client.setex(embedding_cache_key, dify_config.QUERY_EMBEDDING_CACHE_TTL, vector_bytes)
         except Exception as ex:
             if dify_config.DEBUG:
                 logging.exception(f"Failed to add embedding to redis for the text '{text[:10]}...({len(text)} chars)'")
             raise ex
+        _put_local_query_embedding(embedding_cache_key, embedding_results)
 
         return embedding_results
+
+
+# local entries expire after the same time to live as the redis ones
+_local_query_embedding_cache = TTLCache(
+    dify_config.QUERY_EMBEDDING_LOCAL_CACHE_SIZE, dify_config.QUERY_EMBEDDING_CACHE_TTL
+)
+
+
+def _get_local_query_embedding(key: str) -> Optional[list[float]]:
+    embedding = _local_query_embedding_cache.get(key)
+    if embedding is None:
+        return None
+    # return a copy so callers can not mutate the cached vector
+    return list(embedding)
+
+
+def _put_local_query_embedding(key: str, embedding: list[float]) -> None:
+    _local_query_embedding_cache.put(key, list(embedding))
@@ -53,27 +53,27 @@ class ExtractProcessor:
 
     @classmethod
     def load_from_url(cls, url: str, return_text: bool = False) -> Union[list[Document], str]:
-        response = ssrf_proxy.get(url, headers={"User-Agent": USER_AGENT})
-
         with tempfile.TemporaryDirectory() as temp_dir:
-            suffix = Path(url).suffix
-            if not suffix and suffix != ".":
-                # get content-type
-                if response.headers.get("Content-Type"):
-                    suffix = "." + response.headers.get("Content-Type").split("/")[-1]
-                else:
-                    content_disposition = response.headers.get("Content-Disposition")
-                    filename_match = re.search(r'filename="([^"]+)"', content_disposition)
-                    if filename_match:
-                        filename = unquote(filename_match.group(1))
-                        match = re.search(r"\.(\w+)$", filename)
-                        if match:
-                            suffix = "." + match.group(1)
-                        else:
-                            suffix = ""
-            # FIXME mypy: Cannot determine type of 'tempfile._get_candidate_names' better not use it here
-            file_path = f"{temp_dir}/{next(tempfile._get_candidate_names())}{suffix}"  # type: ignore
-            Path(file_path).write_bytes(response.content)
+            with ssrf_proxy.stream("GET", url, headers={"User-Agent": USER_AGENT}) as response:
+                suffix = Path(url).suffix
+                if not suffix and suffix != ".":
+                    # get content-type
+                    if response.headers.get("Content-Type"):
+                        suffix = "." + response.headers.get("Content-Type").split("/")[-1]
+                    else:
+                        content_disposition = response.headers.get("Content-Disposition")
+                        filename_match = re.search(r'filename="([^"]+)"', content_disposition)
+                        if filename_match:
+                            filename = unquote(filename_match.group(1))
+                            match = re.search(r"\.(\w+)$", filename)
+                            if match:
+                                suffix = "." + match.group(1)
+                            else:
+                                suffix = ""
+                # FIXME mypy: Cannot determine type of 'tempfile._get_candidate_names' better not use it here
+                file_path = f"{temp_dir}/{next(tempfile._get_candidate_names())}{suffix}"  # type: ignore
+                with open(file_path, "wb") as f:
+                    f.writelines(ssrf_proxy.iter_response(response))
             extract_setting = ExtractSetting(datasource_type="upload_file", document_model="text_model")
             if return_text:
                 delimiter = "\n"
@@ -1,6 +1,6 @@
 import math
-import threading
 from collections import Counter
+from functools import partial
 from typing import Any, Optional, cast
 
 from flask import Flask, current_app
@@ -19,18 +19,20 @@ from core.ops.ops_trace_manager import TraceQueueManager, TraceTask
 from core.ops.utils import measure_time
 from core.rag.data_post_processor.data_post_processor import DataPostProcessor
 from core.rag.datasource.keyword.jieba.jieba_keyword_table_handler import JiebaKeywordTableHandler
+from core.rag.datasource.retrieval_executor import RetrievalExecutor
 from core.rag.datasource.retrieval_service import RetrievalService
 from core.rag.entities.context_entities import DocumentContext
 from core.rag.models.document import Document
 from core.rag.rerank.rerank_type import RerankMode
 from core.rag.retrieval.retrieval_methods import RetrievalMethod
+from core.rag.retrieval.retrieval_statistics import RetrievalStatistics
 from core.rag.retrieval.router.multi_dataset_function_call_router import FunctionCallMultiDatasetRouter
 from core.rag.retrieval.router.multi_dataset_react_route import ReactMultiDatasetRouter
 from core.tools.tool.dataset_retriever.dataset_multi_retriever_tool import DatasetMultiRetrieverTool
 from core.tools.tool.dataset_retriever.dataset_retriever_base_tool import DatasetRetrieverBaseTool
 from core.tools.tool.dataset_retriever.dataset_retriever_tool import DatasetRetrieverTool
 from extensions.ext_database import db
-from models.dataset import Dataset, DatasetQuery, DocumentSegment
+from models.dataset import Dataset
 from models.dataset import Document as DatasetDocument
 from services.external_knowledge_service import ExternalDatasetService
 
@@ -351,7 +353,6 @@ class DatasetRetrieval:
     ):
         if not available_datasets:
             return []
-        threads = []
         all_documents: list[Document] = []
         dataset_ids = [dataset.id for dataset in available_datasets]
         index_type_check = all(
@@ -385,22 +386,18 @@ class DatasetRetrieval:
                     ].embedding_model_provider
                     weights["vector_setting"]["embedding_model_name"] = available_datasets[0].embedding_model
 
-        for dataset in available_datasets:
-            index_type = dataset.indexing_technique
-            retrieval_thread = threading.Thread(
-                target=self._retriever,
-                kwargs={
-                    "flask_app": current_app._get_current_object(),  # type: ignore
-                    "dataset_id": dataset.id,
-                    "query": query,
-                    "top_k": top_k,
-                    "all_documents": all_documents,
-                },
-            )
-            threads.append(retrieval_thread)
-            retrieval_thread.start()
-        for thread in threads:
-            thread.join()
+        flask_app = current_app._get_current_object()  # type: ignore
+        results = RetrievalExecutor.get(RetrievalExecutor.DATASET).map(
+            [
+                partial(self._retriever, flask_app=flask_app, dataset=dataset, query=query, top_k=top_k)
+                for dataset in available_datasets
+            ]
+        )
+        index_type = available_datasets[-1].indexing_technique
+        for documents in results:
+            # datasets slower than the retrieval deadline are skipped
+            if documents:
+                all_documents.extend(documents)
 
         with measure_time() as timer:
             if reranking_enable:
@@ -428,20 +425,7 @@ class DatasetRetrieval:
     ) -> None:
         """Handle retrieval end."""
         dify_documents = [document for document in documents if document.provider == "dify"]
-        for document in dify_documents:
-            if document.metadata is not None:
-                query = db.session.query(DocumentSegment).filter(
-                    DocumentSegment.index_node_id == document.metadata["doc_id"]
-                )
-
-                # if 'dataset_id' in document.metadata:
-                if "dataset_id" in document.metadata:
-                    query = query.filter(DocumentSegment.dataset_id == document.metadata["dataset_id"])
-
-                # add hit count to document segment
-                query.update({DocumentSegment.hit_count: DocumentSegment.hit_count + 1}, synchronize_session=False)
-
-                db.session.commit()
+        RetrievalStatistics.record_segment_hits(dify_documents)
 
         # get tracing instance
         trace_manager: Optional[TraceQueueManager] = (
@@ -458,29 +442,21 @@ class DatasetRetrieval:
         """
         Handle query.
         """
-        if not query:
-            return
-        dataset_queries = []
-        for dataset_id in dataset_ids:
-            dataset_query = DatasetQuery(
-                dataset_id=dataset_id,
-                content=query,
-                source="app",
-                source_app_id=app_id,
-                created_by_role=user_from,
-                created_by=user_id,
-            )
-            dataset_queries.append(dataset_query)
-        if dataset_queries:
-            db.session.add_all(dataset_queries)
-        db.session.commit()
+        RetrievalStatistics.record_queries(
+            query=query,
+            dataset_ids=dataset_ids,
+            source="app",
+            source_app_id=app_id,
+            created_by_role=user_from,
+            created_by=user_id,
+        )
 
-    def _retriever(self, flask_app: Flask, dataset_id: str, query: str, top_k: int, all_documents: list):
+    def _retriever(self, flask_app: Flask, dataset: Dataset, query: str, top_k: int) -> list[Document]:
+        all_documents: list[Document] = []
         with flask_app.app_context():
-            dataset = db.session.query(Dataset).filter(Dataset.id == dataset_id).first()
-
-            if not dataset:
-                return []
+            # attach the dataset loaded by the caller to the session of this thread without querying it again
+            dataset = db.session.merge(dataset, load=False)
+            dataset_id = dataset.id
 
             if dataset.provider == "external":
                 external_documents = ExternalDatasetService.fetch_external_knowledge_retrieval(
@@ -532,6 +508,8 @@ class DatasetRetrieval:
 
                         all_documents.extend(documents)
 
+        return all_documents
+
     def to_dataset_retriever_tool(
         self,
         tenant_id: str,
@@ -0,0 +1,175 @@
+import json
+import logging
+from collections import Counter, defaultdict
+from datetime import UTC, datetime
+from typing import Any, Optional
+
+from sqlalchemy import insert, update
+
+from configs import dify_config
+from core.rag.models.document import Document
+from extensions.ext_database import db
+from extensions.ext_redis import redis_client
+from models.dataset import DatasetQuery, DocumentSegment
+
+logger = logging.getLogger(__name__)
+
+
+class RetrievalStatistics:
+    """
+    Records segment hit counts and dataset queries of retrievals.
+
+    When buffering is enabled the statistics are only appended to Redis during the request, and
+    `flush` periodically applies the aggregated hit counts and inserts the buffered queries in bulk.
+    """
+
+    HIT_COUNTS_KEY = "retrieval_statistics:segment_hit_counts"
+    FLUSHING_HIT_COUNTS_KEY = "retrieval_statistics:segment_hit_counts:flushing"
+    DATASET_QUERIES_KEY = "retrieval_statistics:dataset_queries"
+    FLUSH_LOCK_KEY = "retrieval_statistics:flush_lock"
+    BATCH_SIZE = 1000
+
+    @classmethod
+    def record_segment_hits(cls, documents: list[Document]) -> None:
+        """
+        Record a hit for the segment of each retrieved document
+        :param documents: retrieved documents
+        :return:
+        """
+        hit_counts: Counter[tuple[str, str]] = Counter()
+        for document in documents:
+            if document.metadata is not None:
+                hit_counts[(document.metadata.get("dataset_id") or "", document.metadata["doc_id"])] += 1
+        if not hit_counts:
+            return
+
+        if not dify_config.RETRIEVAL_STATISTICS_BUFFER_ENABLED:
+            cls._update_segment_hit_counts(hit_counts)
+            return
+
+        pipeline = redis_client.pipeline(transaction=False)
+        for (dataset_id, index_node_id), count in hit_counts.items():
+            pipeline.hincrby(cls.HIT_COUNTS_KEY, f"{dataset_id}:{index_node_id}", count)
+        pipeline.execute()
+
+    @classmethod
+    def record_queries(
+        cls,
+        query: str,
+        dataset_ids: list[str],
+        source: str,
+        source_app_id: Optional[str],
+        created_by_role: str,
+        created_by: str,
+    ) -> None:
+        """
+        Record a query on each of the datasets
+        :param query: query content
+        :param dataset_ids: queried dataset ids
+        :param source: query source
+        :param source_app_id: app id the query comes from
+        :param created_by_role: role of the user
+        :param created_by: user id
+        :return:
+        """
+        if not query or not dataset_ids:
+            return
+
+        created_at = datetime.now(UTC).replace(tzinfo=None)
+        rows = [
+            {
+                "dataset_id": dataset_id,
+                "content": query,
+                "source": source,
+                "source_app_id": source_app_id,
+                "created_by_role": created_by_role,
+                "created_by": created_by,
+                "created_at": created_at,
+            }
+            for dataset_id in dataset_ids
+        ]
+
+        if not dify_config.RETRIEVAL_STATISTICS_BUFFER_ENABLED:
+            cls._insert_dataset_queries(rows)
+            return
+
+        redis_client.rpush(
+            cls.DATASET_QUERIES_KEY,
+            *[json.dumps({**row, "created_at": created_at.isoformat()}) for row in rows],
+        )
+
+    @classmethod
+    def flush(cls) -> None:
+        """
+        Apply the buffered hit counts and insert the buffered dataset queries
+        :return:
+        """
+        with redis_client.lock(cls.FLUSH_LOCK_KEY, timeout=600):
+            cls._flush_segment_hit_counts()
+            cls._flush_dataset_queries()
+
+    @classmethod
+    def _flush_segment_hit_counts(cls) -> None:
+        # hits recorded while flushing go to a new hash, a previous failed flush is retried first
+        if not redis_client.exists(cls.FLUSHING_HIT_COUNTS_KEY):
+            if not redis_client.exists(cls.HIT_COUNTS_KEY):
+                return
+            redis_client.rename(cls.HIT_COUNTS_KEY, cls.FLUSHING_HIT_COUNTS_KEY)
+
+        hit_counts: Counter[tuple[str, str]] = Counter()
+        for field, count in redis_client.hgetall(cls.FLUSHING_HIT_COUNTS_KEY).items():
+            dataset_id, index_node_id = field.decode("utf-8").split(":", 1)
+            hit_counts[(dataset_id, index_node_id)] += int(count)
+
+        cls._update_segment_hit_counts(hit_counts)
+        redis_client.delete(cls.FLUSHING_HIT_COUNTS_KEY)
+
+    @classmethod
+    def _flush_dataset_queries(cls) -> None:
+        while True:
+            items = redis_client.lrange(cls.DATASET_QUERIES_KEY, 0, cls.BATCH_SIZE - 1)
+            if not items:
+                return
+
+            rows = []
+            for item in items:
+                row = json.loads(item)
+                row["created_at"] = datetime.fromisoformat(row["created_at"])
+                rows.append(row)
+            cls._insert_dataset_queries(rows)
+            # queries are only appended, so the inserted ones are still at the head of the list
+            redis_client.ltrim(cls.DATASET_QUERIES_KEY, len(items), -1)
+
+    @classmethod
+    def _update_segment_hit_counts(cls, hit_counts: Counter[tuple[str, str]]) -> None:
+        # segments hit the same number of times in a dataset are updated by a single statement
+        index_node_ids: defaultdict[tuple[str, int], list[str]] = defaultdict(list)
+        for (dataset_id, index_node_id), count in hit_counts.items():
+            index_node_ids[(dataset_id, count)].append(index_node_id)
+
+        try:
+            for (dataset_id, count), ids in index_node_ids.items():
+                for i in range(0, len(ids), cls.BATCH_SIZE):
+                    stmt: Any = update(DocumentSegment).where(
+                        DocumentSegment.index_node_id.in_(ids[i : i + cls.BATCH_SIZE])
+                    )
+                    if dataset_id:
+                        stmt = stmt.where(DocumentSegment.dataset_id == dataset_id)
+                    db.session.execute(
+                        stmt.values(hit_count=DocumentSegment.hit_count + count).execution_options(
+                            synchronize_session=False
+                        )
+                    )
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+    @classmethod
+    def _insert_dataset_queries(cls, rows: list[dict[str, Any]]) -> None:
+        try:
+            db.session.execute(insert(DatasetQuery), rows)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+from functools import lru_cache
 from typing import Any, Optional
 
 from core.model_manager import ModelInstance
@@ -16,6 +17,9 @@ from core.rag.splitter.text_splitter import (
     Union,
 )
 
+# max number of distinct pieces whose token count is memoized per splitter
+TOKEN_COUNT_CACHE_SIZE = 10000
+
 
 class EnhanceRecursiveCharacterTextSplitter(RecursiveCharacterTextSplitter):
     """
@@ -30,6 +34,9 @@ class EnhanceRecursiveCharacterTextSplitter(RecursiveCharacterTextSplitter):
         disallowed_special: Union[Literal["all"], Collection[str]] = "all",  # noqa: UP037
         **kwargs: Any,
     ):
+        # the same pieces and separators are measured repeatedly while splitting and merging,
+        # memoize their token counts since remote tokenizers may cost a request per call
+        @lru_cache(maxsize=TOKEN_COUNT_CACHE_SIZE)
         def _token_encoder(text: str) -> int:
             if not text:
                 return 0
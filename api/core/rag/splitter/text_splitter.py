@@ -110,6 +110,8 @@ class TextSplitter(BaseDocumentTransformer, ABC):
 
         docs = []
         current_doc: list[str] = []
+        # lengths of the pieces in current_doc, so popping the overlap never re-measures them
+        current_lengths: list[int] = []
         total = 0
         index = 0
         for d in splits:
@@ -129,9 +131,11 @@ class TextSplitter(BaseDocumentTransformer, ABC):
                     while total > self._chunk_overlap or (
                         total + _len + (separator_len if len(current_doc) > 0 else 0) > self._chunk_size and total > 0
                     ):
-                        total -= self._length_function(current_doc[0]) + (separator_len if len(current_doc) > 1 else 0)
+                        total -= current_lengths[0] + (separator_len if len(current_doc) > 1 else 0)
                         current_doc = current_doc[1:]
+                        current_lengths = current_lengths[1:]
             current_doc.append(d)
+            current_lengths.append(_len)
             total += _len + (separator_len if len(current_doc) > 1 else 0)
             index += 1
         doc = self._join_docs(current_doc, separator)
@@ -1,4 +1,4 @@
-import threading
+from functools import partial
 from typing import Any
 
 from flask import Flask, current_app
@@ -7,6 +7,7 @@ from pydantic import BaseModel, Field
 from core.callback_handler.index_tool_callback_handler import DatasetIndexToolCallbackHandler
 from core.model_manager import ModelManager
 from core.model_runtime.entities.model_entities import ModelType
+from core.rag.datasource.retrieval_executor import RetrievalExecutor
 from core.rag.datasource.retrieval_service import RetrievalService
 from core.rag.models.document import Document as RagDocument
 from core.rag.rerank.rerank_model import RerankModelRunner
@@ -45,23 +46,29 @@ class DatasetMultiRetrieverTool(DatasetRetrieverBaseTool):
         )
 
     def _run(self, query: str) -> str:
-        threads = []
+        datasets = (
+            db.session.query(Dataset)
+            .filter(Dataset.tenant_id == self.tenant_id, Dataset.id.in_(self.dataset_ids))
+            .all()
+        )
+        flask_app = current_app._get_current_object()  # type: ignore
+        results = RetrievalExecutor.get(RetrievalExecutor.DATASET).map(
+            [
+                partial(
+                    self._retriever,
+                    flask_app=flask_app,
+                    dataset=dataset,
+                    query=query,
+                    hit_callbacks=self.hit_callbacks,
+                )
+                for dataset in datasets
+            ]
+        )
         all_documents: list[RagDocument] = []
-        for dataset_id in self.dataset_ids:
-            retrieval_thread = threading.Thread(
-                target=self._retriever,
-                kwargs={
-                    "flask_app": current_app._get_current_object(),  # type: ignore
-                    "dataset_id": dataset_id,
-                    "query": query,
-                    "all_documents": all_documents,
-                    "hit_callbacks": self.hit_callbacks,
-                },
-            )
-            threads.append(retrieval_thread)
-            retrieval_thread.start()
-        for thread in threads:
-            thread.join()
+        for documents in results:
+            # datasets slower than the retrieval deadline are skipped
+            if documents:
+                all_documents.extend(documents)
         # do rerank for searched documents
         model_manager = ModelManager()
         rerank_model_instance = model_manager.get_model_instance(
@@ -146,18 +153,14 @@ class DatasetMultiRetrieverTool(DatasetRetrieverBaseTool):
     def _retriever(
         self,
         flask_app: Flask,
-        dataset_id: str,
+        dataset: Dataset,
         query: str,
-        all_documents: list,
         hit_callbacks: list[DatasetIndexToolCallbackHandler],
-    ):
+    ) -> list[RagDocument]:
+        all_documents: list[RagDocument] = []
         with flask_app.app_context():
-            dataset = (
-                db.session.query(Dataset).filter(Dataset.tenant_id == self.tenant_id, Dataset.id == dataset_id).first()
-            )
-
-            if not dataset:
-                return []
+            # attach the dataset loaded by the caller to the session of this thread without querying it again
+            dataset = db.session.merge(dataset, load=False)
 
             for hit_callback in hit_callbacks:
                 hit_callback.on_query(query, dataset.id)
@@ -194,3 +197,5 @@ class DatasetMultiRetrieverTool(DatasetRetrieverBaseTool):
                     )
 
                     all_documents.extend(documents)
+
+        return all_documents
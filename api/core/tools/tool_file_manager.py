@@ -95,11 +95,13 @@ class ToolFileManager:
     ) -> ToolFile:
         # try to download image
         try:
-            response = ssrf_proxy.get(file_url)
-            response.raise_for_status()
-            blob = response.content
+            with ssrf_proxy.stream("GET", file_url) as response:
+                response.raise_for_status()
+                blob = ssrf_proxy.read_response(response)
         except httpx.TimeoutException as e:
             raise ValueError(f"timeout when downloading file from {file_url}")
+        except ssrf_proxy.ResponseTooLargeError as e:
+            raise ValueError(f"file downloaded from {file_url} is too large")
 
         mimetype = guess_type(file_url)[0] or "octet/stream"
         extension = guess_extension(mimetype) or ".bin"
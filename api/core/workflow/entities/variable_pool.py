@@ -1,9 +1,9 @@
 import re
 from collections import defaultdict
 from collections.abc import Mapping, Sequence
-from typing import Any, Union
+from typing import Any, Optional, Union
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 
 from core.file import File, FileAttribute, file_manager
 from core.variables import Segment, SegmentGroup, Variable
@@ -43,6 +43,11 @@ class VariablePool(BaseModel):
         description="Conversation variables.",
         default_factory=list,
     )
+    # An overlay pool only holds the variables written to it, reads of other variables fall through to the
+    # parent pool. Removals of variables of the parent pool are recorded so they are not read through.
+    _parent: Optional["VariablePool"] = PrivateAttr(default=None)
+    _removed_node_ids: set[str] = PrivateAttr(default_factory=set)
+    _removed_keys: set[tuple[str, int]] = PrivateAttr(default_factory=set)
 
     def __init__(
         self,
@@ -106,6 +111,37 @@ class VariablePool(BaseModel):
         hash_key = hash(tuple(selector[1:]))
         self.variable_dictionary[selector[0]][hash_key] = variable
 
+    def create_overlay(self) -> "VariablePool":
+        """
+        Create a copy-on-write view of the variable pool.
+
+        The overlay starts empty, reads fall through to this pool and writes stay in the overlay,
+        so creating it does not depend on the size of this pool.
+
+        Returns:
+            VariablePool: The overlay variable pool.
+        """
+        overlay = VariablePool.model_construct(
+            variable_dictionary=defaultdict(dict),
+            user_inputs=self.user_inputs,
+            system_variables=self.system_variables,
+            environment_variables=self.environment_variables,
+            conversation_variables=self.conversation_variables,
+        )
+        overlay._parent = self
+        return overlay
+
+    def _get_variable(self, node_id: str, hash_key: int) -> Segment | None:
+        pool: Optional[VariablePool] = self
+        while pool is not None:
+            variables = pool.variable_dictionary.get(node_id)
+            if variables is not None and hash_key in variables:
+                return variables[hash_key]
+            if node_id in pool._removed_node_ids or (node_id, hash_key) in pool._removed_keys:
+                return None
+            pool = pool._parent
+        return None
+
     def get(self, selector: Sequence[str], /) -> Segment | None:
         """
         Retrieves the value from the variable pool based on the given selector.
@@ -123,7 +159,7 @@ class VariablePool(BaseModel):
             return None
 
         hash_key = hash(tuple(selector[1:]))
-        value = self.variable_dictionary[selector[0]].get(hash_key)
+        value = self._get_variable(selector[0], hash_key)
 
         if value is None:
             selector, attr = selector[:-1], selector[-1]
@@ -153,9 +189,13 @@ class VariablePool(BaseModel):
             return
         if len(selector) == 1:
             self.variable_dictionary[selector[0]] = {}
+            if self._parent is not None:
+                self._removed_node_ids.add(selector[0])
             return
         hash_key = hash(tuple(selector[1:]))
         self.variable_dictionary[selector[0]].pop(hash_key, None)
+        if self._parent is not None:
+            self._removed_keys.add((selector[0], hash_key))
 
     def convert_template(self, template: str, /):
         parts = VARIABLE_PATTERN.split(template)
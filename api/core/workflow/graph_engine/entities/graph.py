@@ -1,11 +1,12 @@
 import uuid
 from collections import defaultdict
 from collections.abc import Mapping
-from typing import Any, Optional, cast
+from typing import Any, ClassVar, Optional, cast
 
 from pydantic import BaseModel, Field
 
 from configs import dify_config
+from core.helper.lru_cache import TTLCache
 from core.workflow.graph_engine.entities.run_condition import RunCondition
 from core.workflow.nodes import NodeType
 from core.workflow.nodes.answer.answer_stream_generate_router import AnswerStreamGeneratorRouter
@@ -52,6 +53,35 @@ class Graph(BaseModel):
     )
     answer_stream_generate_routes: AnswerStreamGenerateRoute = Field(..., description="answer stream generate routes")
     end_stream_param: EndStreamParam = Field(..., description="end stream param")
+    graph_hash: Optional[str] = Field(default=None, description="hash of the graph config of a cached graph")
+
+    _cache: ClassVar[TTLCache] = TTLCache(dify_config.WORKFLOW_GRAPH_CACHE_SIZE)
+
+    @classmethod
+    def init_cached(
+        cls, graph_config: Mapping[str, Any], graph_hash: Optional[str], root_node_id: Optional[str] = None
+    ) -> "Graph":
+        """
+        Init graph, reusing the graph initialized from the same graph config in this process.
+        Cached graphs are shared by all runs and threads, so they must not be modified.
+
+        :param graph_config: graph config
+        :param graph_hash: hash of the graph config, the graph is not cached without it
+        :param root_node_id: root node id
+        :return: graph
+        """
+        if not graph_hash or not cls._cache.enabled:
+            return cls.init(graph_config=graph_config, root_node_id=root_node_id)
+
+        key = (graph_hash, root_node_id)
+        cached_graph = cls._cache.get(key)
+        if cached_graph is not None:
+            return cast(Graph, cached_graph)
+
+        graph = cls.init(graph_config=graph_config, root_node_id=root_node_id)
+        graph.graph_hash = graph_hash
+        cls._cache.put(key, graph)
+        return graph
 
     @classmethod
     def init(cls, graph_config: Mapping[str, Any], root_node_id: Optional[str] = None) -> "Graph":
@@ -4,7 +4,7 @@ import time
 import uuid
 from collections.abc import Generator, Mapping
 from concurrent.futures import ThreadPoolExecutor, wait
-from copy import copy, deepcopy
+from copy import copy
 from datetime import UTC, datetime
 from typing import Any, Optional, cast
 
@@ -852,7 +852,8 @@ class GraphEngine:
         """
         new_instance = copy(self)
         new_instance.graph_runtime_state = copy(self.graph_runtime_state)
-        new_instance.graph_runtime_state.variable_pool = deepcopy(self.graph_runtime_state.variable_pool)
+        # the copy writes to an overlay of the variable pool, the variables of this engine are shared, not copied
+        new_instance.graph_runtime_state.variable_pool = self.graph_runtime_state.variable_pool.create_overlay()
         return new_instance
 
     def _handle_continue_on_error(
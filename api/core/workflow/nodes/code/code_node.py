@@ -7,6 +7,7 @@ from core.helper.code_executor.code_node_provider import CodeNodeProvider
 from core.helper.code_executor.javascript.javascript_code_provider import JavascriptCodeProvider
 from core.helper.code_executor.python3.python3_code_provider import Python3CodeProvider
 from core.workflow.entities.node_entities import NodeRunResult
+from core.workflow.entities.variable_pool import VariablePool
 from core.workflow.nodes.base import BaseNode
 from core.workflow.nodes.code.entities import CodeNodeData
 from core.workflow.nodes.enums import NodeType
@@ -45,11 +46,7 @@ class CodeNode(BaseNode[CodeNodeData]):
         code = self.node_data.code
 
         # Get variables
-        variables = {}
-        for variable_selector in self.node_data.variables:
-            variable_name = variable_selector.variable
-            variable = self.graph_runtime_state.variable_pool.get(variable_selector.value_selector)
-            variables[variable_name] = variable.to_object() if variable else None
+        variables = self.fetch_variables(self.node_data, self.graph_runtime_state.variable_pool)
         # Run code
         try:
             result = CodeExecutor.execute_workflow_code_template(
@@ -67,6 +64,21 @@ class CodeNode(BaseNode[CodeNodeData]):
 
         return NodeRunResult(status=WorkflowNodeExecutionStatus.SUCCEEDED, inputs=variables, outputs=result)
 
+    @classmethod
+    def fetch_variables(cls, node_data: CodeNodeData, variable_pool: VariablePool) -> dict[str, Any]:
+        """
+        Fetch the inputs of the code from the variable pool
+        :param node_data: node data
+        :param variable_pool: variable pool
+        :return: inputs of the code
+        """
+        variables = {}
+        for variable_selector in node_data.variables:
+            variable_name = variable_selector.variable
+            variable = variable_pool.get(variable_selector.value_selector)
+            variables[variable_name] = variable.to_object() if variable else None
+        return variables
+
     def _check_string(self, value: str | None, variable: str) -> str | None:
         """
         Check string
@@ -195,7 +207,7 @@ class CodeNode(BaseNode[CodeNodeData]):
             if output_config.type == "object":
                 # check if output is object
                 if not isinstance(result.get(output_name), dict):
-                    if isinstance(result.get(output_name), type(None)):
+                    if result.get(output_name) is None:
                         transformed_result[output_name] = None
                     else:
                         raise OutputValidationError(
@@ -223,7 +235,7 @@ class CodeNode(BaseNode[CodeNodeData]):
             elif output_config.type == "array[number]":
                 # check if array of number available
                 if not isinstance(result[output_name], list):
-                    if isinstance(result[output_name], type(None)):
+                    if result[output_name] is None:
                         transformed_result[output_name] = None
                     else:
                         raise OutputValidationError(
@@ -244,7 +256,7 @@ class CodeNode(BaseNode[CodeNodeData]):
             elif output_config.type == "array[string]":
                 # check if array of string available
                 if not isinstance(result[output_name], list):
-                    if isinstance(result[output_name], type(None)):
+                    if result[output_name] is None:
                         transformed_result[output_name] = None
                     else:
                         raise OutputValidationError(
@@ -265,7 +277,7 @@ class CodeNode(BaseNode[CodeNodeData]):
             elif output_config.type == "array[object]":
                 # check if array of object available
                 if not isinstance(result[output_name], list):
-                    if isinstance(result[output_name], type(None)):
+                    if result[output_name] is None:
                         transformed_result[output_name] = None
                     else:
                         raise OutputValidationError(
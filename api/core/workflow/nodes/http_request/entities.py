@@ -96,9 +96,11 @@ class Response:
     headers: dict[str, str]
     response: httpx.Response
 
-    def __init__(self, response: httpx.Response):
+    def __init__(self, response: httpx.Response, content: Optional[bytes] = None):
         self.response = response
         self.headers = dict(response.headers)
+        # body of a streamed response, read before the response is closed
+        self._content = content
 
     @property
     def is_file(self):
@@ -132,7 +134,7 @@ class Response:
             # Try to detect if content is text-based by sampling first few bytes
             try:
                 # Sample first 1024 bytes for text detection
-                content_sample = self.response.content[:1024]
+                content_sample = self.content[:1024]
                 content_sample.decode("utf-8")
                 # If we can decode as UTF-8 and find common text patterns, likely not a file
                 text_markers = (b"{", b"[", b"<", b"function", b"var ", b"const ", b"let ")
@@ -156,11 +158,15 @@ class Response:
 
     @property
     def text(self) -> str:
-        return self.response.text
+        if self._content is None:
+            return self.response.text
+        return self._content.decode(self.response.encoding or "utf-8", errors="replace")
 
     @property
     def content(self) -> bytes:
-        return self.response.content
+        if self._content is None:
+            return self.response.content
+        return self._content
 
     @property
     def status_code(self) -> int:
@@ -243,9 +243,7 @@ class Executor:
 
         return headers
 
-    def _validate_and_parse_response(self, response: httpx.Response) -> Response:
-        executor_response = Response(response)
-
+    def _validate_and_parse_response(self, executor_response: Response) -> Response:
         threshold_size = (
             dify_config.HTTP_REQUEST_NODE_MAX_BINARY_SIZE
             if executor_response.is_file
@@ -260,7 +258,7 @@ class Executor:
 
         return executor_response
 
-    def _do_http_request(self, headers: dict[str, Any]) -> httpx.Response:
+    def _do_http_request(self, headers: dict[str, Any]) -> Response:
         """
         do http request depending on api bundle
         """
@@ -293,14 +291,25 @@ class Executor:
             "timeout": (self.timeout.connect, self.timeout.read, self.timeout.write),
             "follow_redirects": True,
             "max_retries": self.max_retries,
+            "stream": True,
         }
         # request_args = {k: v for k, v in request_args.items() if v is not None}
         try:
             response = getattr(ssrf_proxy, self.method.lower())(**request_args)
         except (ssrf_proxy.MaxRetriesExceededError, httpx.RequestError) as e:
             raise HttpRequestNodeError(str(e))
-        # FIXME: fix type ignore, this maybe httpx type issue
-        return response  # type: ignore
+
+        # stop downloading as soon as the body exceeds the size any response is allowed to have
+        max_size = max(dify_config.HTTP_REQUEST_NODE_MAX_BINARY_SIZE, dify_config.HTTP_REQUEST_NODE_MAX_TEXT_SIZE)
+        try:
+            content = ssrf_proxy.read_response(response, max_size=max_size)
+        except ssrf_proxy.ResponseTooLargeError:
+            raise ResponseSizeError(f"Response size is too large, max size is {max_size / 1024 / 1024:.2f} MB.")
+        except httpx.HTTPError as e:
+            raise HttpRequestNodeError(str(e))
+        finally:
+            response.close()
+        return Response(response, content=content)
 
     def invoke(self) -> Response:
         # assemble headers
@@ -1,7 +1,9 @@
+import contextvars
 import logging
 import uuid
 from collections.abc import Generator, Mapping, Sequence
 from concurrent.futures import Future, wait
+from contextlib import contextmanager
 from datetime import UTC, datetime
 from queue import Empty, Queue
 from typing import TYPE_CHECKING, Any, Optional, cast
@@ -9,6 +11,7 @@ from typing import TYPE_CHECKING, Any, Optional, cast
 from flask import Flask, current_app
 
 from configs import dify_config
+from core.helper.code_executor.code_executor import CodeExecutor
 from core.variables import ArrayVariable, IntegerVariable, NoneVariable
 from core.workflow.entities.node_entities import (
     NodeRunMetadataKey,
@@ -33,6 +36,8 @@ from core.workflow.graph_engine.entities.event import (
 )
 from core.workflow.graph_engine.entities.graph import Graph
 from core.workflow.nodes.base import BaseNode
+from core.workflow.nodes.code import CodeNode
+from core.workflow.nodes.code.entities import CodeNodeData
 from core.workflow.nodes.enums import NodeType
 from core.workflow.nodes.event import NodeEvent, RunCompletedEvent
 from core.workflow.nodes.iteration.entities import ErrorHandleMode, IterationNodeData
@@ -107,7 +112,9 @@ class IterationNode(BaseNode[IterationNodeData]):
         root_node_id = self.node_data.start_node_id
 
         # init graph
-        iteration_graph = Graph.init(graph_config=graph_config, root_node_id=root_node_id)
+        iteration_graph = Graph.init_cached(
+            graph_config=graph_config, graph_hash=self.graph.graph_hash, root_node_id=root_node_id
+        )
 
         if not iteration_graph:
             raise IterationGraphNotFoundError("iteration graph not found")
@@ -163,66 +170,69 @@ class IterationNode(BaseNode[IterationNodeData]):
         iter_run_map: dict[str, float] = {}
         outputs: list[Any] = [None] * len(iterator_list_value)
         try:
-            if self.node_data.is_parallel:
-                futures: list[Future] = []
-                q: Queue = Queue()
-                thread_pool = GraphEngineThreadPool(
-                    max_workers=self.node_data.parallel_nums, max_submit_count=dify_config.MAX_SUBMIT_COUNT
-                )
-                for index, item in enumerate(iterator_list_value):
-                    future: Future = thread_pool.submit(
-                        self._run_single_iter_parallel,
-                        flask_app=current_app._get_current_object(),  # type: ignore
-                        q=q,
-                        iterator_list_value=iterator_list_value,
-                        inputs=inputs,
-                        outputs=outputs,
-                        start_at=start_at,
-                        graph_engine=graph_engine,
-                        iteration_graph=iteration_graph,
-                        index=index,
-                        item=item,
-                        iter_run_map=iter_run_map,
+            with self._prefetch_code_node(iteration_graph, iterator_list_value):
+                if self.node_data.is_parallel:
+                    futures: list[Future] = []
+                    q: Queue = Queue()
+                    thread_pool = GraphEngineThreadPool(
+                        max_workers=self.node_data.parallel_nums, max_submit_count=dify_config.MAX_SUBMIT_COUNT
                     )
-                    future.add_done_callback(thread_pool.task_done_callback)
-                    futures.append(future)
-                succeeded_count = 0
-                while True:
-                    try:
-                        event = q.get(timeout=1)
-                        if event is None:
-                            break
-                        if isinstance(event, IterationRunNextEvent):
-                            succeeded_count += 1
-                            if succeeded_count == len(futures):
-                                q.put(None)
-                        yield event
-                        if isinstance(event, RunCompletedEvent):
-                            q.put(None)
-                            for f in futures:
-                                if not f.done():
-                                    f.cancel()
-                            yield event
-                        if isinstance(event, IterationRunFailedEvent):
-                            q.put(None)
+                    for index, item in enumerate(iterator_list_value):
+                        # run in a copy of the current context to see the prefetched code node results
+                        future: Future = thread_pool.submit(
+                            contextvars.copy_context().run,
+                            self._run_single_iter_parallel,
+                            flask_app=current_app._get_current_object(),  # type: ignore
+                            q=q,
+                            iterator_list_value=iterator_list_value,
+                            inputs=inputs,
+                            outputs=outputs,
+                            start_at=start_at,
+                            graph_engine=graph_engine,
+                            iteration_graph=iteration_graph,
+                            index=index,
+                            item=item,
+                            iter_run_map=iter_run_map,
+                        )
+                        future.add_done_callback(thread_pool.task_done_callback)
+                        futures.append(future)
+                    succeeded_count = 0
+                    while True:
+                        try:
+                            event = q.get(timeout=1)
+                            if event is None:
+                                break
+                            if isinstance(event, IterationRunNextEvent):
+                                succeeded_count += 1
+                                if succeeded_count == len(futures):
+                                    q.put(None)
                             yield event
-                    except Empty:
-                        continue
-
-                # wait all threads
-                wait(futures)
-            else:
-                for _ in range(len(iterator_list_value)):
-                    yield from self._run_single_iter(
-                        iterator_list_value=iterator_list_value,
-                        variable_pool=variable_pool,
-                        inputs=inputs,
-                        outputs=outputs,
-                        start_at=start_at,
-                        graph_engine=graph_engine,
-                        iteration_graph=iteration_graph,
-                        iter_run_map=iter_run_map,
-                    )
+                            if isinstance(event, RunCompletedEvent):
+                                q.put(None)
+                                for f in futures:
+                                    if not f.done():
+                                        f.cancel()
+                                yield event
+                            if isinstance(event, IterationRunFailedEvent):
+                                q.put(None)
+                                yield event
+                        except Empty:
+                            continue
+
+                    # wait all threads
+                    wait(futures)
+                else:
+                    for _ in range(len(iterator_list_value)):
+                        yield from self._run_single_iter(
+                            iterator_list_value=iterator_list_value,
+                            variable_pool=variable_pool,
+                            inputs=inputs,
+                            outputs=outputs,
+                            start_at=start_at,
+                            graph_engine=graph_engine,
+                            iteration_graph=iteration_graph,
+                            iter_run_map=iter_run_map,
+                        )
             if self.node_data.error_handle_mode == ErrorHandleMode.REMOVE_ABNORMAL_OUTPUT:
                 outputs = [output for output in outputs if output is not None]
 
@@ -279,6 +289,41 @@ class IterationNode(BaseNode[IterationNodeData]):
             variable_pool.remove([self.node_id, "index"])
             variable_pool.remove([self.node_id, "item"])
 
+    @contextmanager
+    def _prefetch_code_node(
+        self, iteration_graph: Graph, iterator_list_value: Sequence[Any]
+    ) -> Generator[None, None, None]:
+        """
+        When the iteration only runs a code node, execute the code for all items in batches alongside the iterations
+        """
+        node_configs = [
+            node_config
+            for node_config in iteration_graph.node_id_config_mapping.values()
+            if node_config.get("data", {}).get("type") != NodeType.ITERATION_START.value
+        ]
+        if (
+            not dify_config.CODE_EXECUTION_BATCH_SIZE
+            or len(node_configs) != 1
+            or node_configs[0].get("data", {}).get("type") != NodeType.CODE.value
+        ):
+            yield
+            return
+
+        node_data = CodeNodeData.model_validate(node_configs[0]["data"])
+        inputs_list = []
+        for index, item in enumerate(iterator_list_value):
+            variable_pool = self.graph_runtime_state.variable_pool.create_overlay()
+            variable_pool.add([self.node_id, "index"], index)
+            variable_pool.add([self.node_id, "item"], item)
+            inputs_list.append(CodeNode.fetch_variables(node_data, variable_pool))
+
+        # batches run concurrently like the iterations, each iteration only waits for the batch of its item
+        max_workers = self.node_data.parallel_nums if self.node_data.is_parallel else 1
+        with CodeExecutor.prefetch_workflow_code_template(
+            node_data.code_language, node_data.code, inputs_list, max_workers=max_workers
+        ):
+            yield
+
     @classmethod
     def _extract_variable_selector_to_variable_mapping(
         cls,
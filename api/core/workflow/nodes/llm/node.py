@@ -10,6 +10,7 @@ from core.entities.provider_entities import QuotaUnit
 from core.errors.error import ModelCurrentlyNotSupportError, ProviderTokenNotInitError, QuotaExceededError
 from core.file import FileType, file_manager
 from core.helper.code_executor import CodeExecutor, CodeLanguage
+from core.helper.provider_configurations_cache import ProviderConfigurationsCache
 from core.memory.token_buffer_memory import TokenBufferMemory
 from core.model_manager import ModelInstance, ModelManager
 from core.model_runtime.entities import (
@@ -738,15 +739,23 @@ class LLMNode(BaseNode[LLMNodeData]):
                 used_quota = 1
 
         if used_quota is not None and system_configuration.current_quota_type is not None:
-            db.session.query(Provider).filter(
-                Provider.tenant_id == tenant_id,
-                Provider.provider_name == model_instance.provider,
-                Provider.provider_type == ProviderType.SYSTEM.value,
-                Provider.quota_type == system_configuration.current_quota_type.value,
-                Provider.quota_limit > Provider.quota_used,
-            ).update({"quota_used": Provider.quota_used + used_quota})
+            updated_count = (
+                db.session.query(Provider)
+                .filter(
+                    Provider.tenant_id == tenant_id,
+                    Provider.provider_name == model_instance.provider,
+                    Provider.provider_type == ProviderType.SYSTEM.value,
+                    Provider.quota_type == system_configuration.current_quota_type.value,
+                    Provider.quota_limit > Provider.quota_used,
+                )
+                .update({"quota_used": Provider.quota_used + used_quota})
+            )
             db.session.commit()
 
+            # the quota was already exhausted, drop the cached provider configurations which still see it as valid
+            if not updated_count:
+                ProviderConfigurationsCache(tenant_id).delete()
+
     @classmethod
     def _extract_variable_selector_to_variable_mapping(
         cls,
@@ -152,7 +152,7 @@ class WorkflowEntry:
         variable_pool = VariablePool(environment_variables=workflow.environment_variables)
 
         # init graph
-        graph = Graph.init(graph_config=workflow.graph_dict)
+        graph = Graph.init_cached(graph_config=workflow.graph_dict, graph_hash=workflow.graph_hash)
 
         # init workflow run state
         node_instance = node_cls(
@@ -70,6 +70,7 @@ def init_app(app: DifyApp) -> Celery:
         "schedule.update_tidb_serverless_status_task",
         "schedule.clean_messages",
         "schedule.mail_clean_document_notify_task",
+        "schedule.flush_retrieval_statistics_task",
     ]
     day = dify_config.CELERY_BEAT_SCHEDULER_TIME
     beat_schedule = {
@@ -98,6 +99,10 @@ def init_app(app: DifyApp) -> Celery:
             "task": "schedule.mail_clean_document_notify_task.mail_clean_document_notify_task",
             "schedule": crontab(minute="0", hour="10", day_of_week="1"),
         },
+        "flush_retrieval_statistics_task": {
+            "task": "schedule.flush_retrieval_statistics_task.flush_retrieval_statistics_task",
+            "schedule": timedelta(seconds=dify_config.RETRIEVAL_STATISTICS_FLUSH_INTERVAL),
+        },
     }
     celery_app.conf.update(beat_schedule=beat_schedule, imports=imports)
 
@@ -3,10 +3,12 @@ from dify_app import DifyApp
 
 def init_app(app: DifyApp):
     from commands import (
+        add_pgvector_full_text_index,
         add_qdrant_doc_id_index,
         convert_to_agent_apps,
         create_tenant,
         fix_app_site_missing,
+        migrate_keyword_table,
         reset_email,
         reset_encrypt_key_pair,
         reset_password,
@@ -21,9 +23,11 @@ def init_app(app: DifyApp):
         vdb_migrate,
         convert_to_agent_apps,
         add_qdrant_doc_id_index,
+        add_pgvector_full_text_index,
         create_tenant,
         upgrade_db,
         fix_app_site_missing,
+        migrate_keyword_table,
     ]
     for cmd in cmds_to_register:
         app.cli.add_command(cmd)
@@ -4,6 +4,8 @@ from Crypto.Cipher import AES
 from Crypto.PublicKey import RSA
 from Crypto.Random import get_random_bytes
 
+from configs import dify_config
+from core.helper.lru_cache import TTLCache
 from extensions.ext_redis import redis_client
 from extensions.ext_storage import storage
 from libs import gmpy2_pkcs10aep_cipher
@@ -19,6 +21,8 @@ def generate_key_pair(tenant_id):
     filepath = "privkeys/{tenant_id}".format(tenant_id=tenant_id) + "/private.pem"
 
     storage.save(filepath, pem_private)
+    redis_client.delete(_get_private_key_cache_key(filepath))
+    _invalidate_decrypt_decoding(tenant_id)
 
     return pem_public.decode()
 
@@ -45,10 +49,28 @@ def encrypt(text, public_key):
     return prefix_hybrid + encrypted_data
 
 
-def get_decrypt_decoding(tenant_id):
+# parsed private keys of tenants, importing a private key is far more expensive than decrypting a token
+_decoding_cache = TTLCache(dify_config.TENANT_PRIVATE_KEY_CACHE_SIZE, dify_config.TENANT_PRIVATE_KEY_CACHE_TTL)
+
+# minimum interval in seconds between reloads of the private key of a tenant after decrypting with it failed
+PRIVATE_KEY_RELOAD_INTERVAL = 10
+
+# tenants whose private key has been reloaded within the reload interval
+_decoding_reloads = TTLCache(dify_config.TENANT_PRIVATE_KEY_CACHE_SIZE, PRIVATE_KEY_RELOAD_INTERVAL)
+
+
+def _get_private_key_cache_key(filepath):
+    return "tenant_privkey:{hash}".format(hash=hashlib.sha3_256(filepath.encode()).hexdigest())
+
+
+def _invalidate_decrypt_decoding(tenant_id):
+    _decoding_cache.delete(tenant_id)
+
+
+def _load_decrypt_decoding(tenant_id):
     filepath = "privkeys/{tenant_id}".format(tenant_id=tenant_id) + "/private.pem"
 
-    cache_key = "tenant_privkey:{hash}".format(hash=hashlib.sha3_256(filepath.encode()).hexdigest())
+    cache_key = _get_private_key_cache_key(filepath)
     private_key = redis_client.get(cache_key)
     if not private_key:
         try:
@@ -64,7 +86,50 @@ def get_decrypt_decoding(tenant_id):
     return rsa_key, cipher_rsa
 
 
-def decrypt_token_with_decoding(encrypted_text, rsa_key, cipher_rsa):
+def get_decrypt_decoding(tenant_id):
+    decoding = _decoding_cache.get(tenant_id)
+    if decoding:
+        return decoding
+
+    decoding = _load_decrypt_decoding(tenant_id)
+    _decoding_cache.put(tenant_id, decoding)
+
+    return decoding
+
+
+def _reload_decrypt_decoding(tenant_id, rsa_key):
+    """
+    Get the decoding of the current private key of a tenant after decrypting with `rsa_key` failed,
+    None when the private key has not changed.
+    """
+    decoding = _decoding_cache.get(tenant_id)
+    # the decoding may already have been reloaded after decrypting another token with the same key failed
+    if not decoding or decoding[0] is rsa_key:
+        if _decoding_reloads.get(tenant_id):
+            return None
+        _decoding_reloads.put(tenant_id, True)
+        _invalidate_decrypt_decoding(tenant_id)
+        decoding = get_decrypt_decoding(tenant_id)
+
+    current_rsa_key, current_cipher_rsa = decoding
+    if current_rsa_key.n == rsa_key.n:
+        return None
+
+    return current_rsa_key, current_cipher_rsa
+
+
+def _is_well_formed(encrypted_text, rsa_key):
+    """
+    Whether the encrypted text has the layout of a token encrypted with a key of the size of `rsa_key`,
+    only such tokens may have been encrypted with a rotated key pair.
+    """
+    key_size = rsa_key.size_in_bytes()
+    if encrypted_text.startswith(prefix_hybrid):
+        return len(encrypted_text) >= len(prefix_hybrid) + key_size + 32
+    return len(encrypted_text) == key_size
+
+
+def _decrypt_token(encrypted_text, rsa_key, cipher_rsa):
     if encrypted_text.startswith(prefix_hybrid):
         encrypted_text = encrypted_text[len(prefix_hybrid) :]
 
@@ -83,10 +148,23 @@ def decrypt_token_with_decoding(encrypted_text, rsa_key, cipher_rsa):
     return decrypted_text.decode()
 
 
+def decrypt_token_with_decoding(encrypted_text, rsa_key, cipher_rsa, tenant_id=None):
+    try:
+        return _decrypt_token(encrypted_text, rsa_key, cipher_rsa)
+    except ValueError:
+        if tenant_id is None or not _is_well_formed(encrypted_text, rsa_key):
+            raise
+        # the key pair may have been rotated by another process since the private key was cached
+        decoding = _reload_decrypt_decoding(tenant_id, rsa_key)
+        if decoding is None:
+            raise
+        return _decrypt_token(encrypted_text, *decoding)
+
+
 def decrypt(encrypted_text, tenant_id):
     rsa_key, cipher_rsa = get_decrypt_decoding(tenant_id)
 
-    return decrypt_token_with_decoding(encrypted_text, rsa_key, cipher_rsa)
+    return decrypt_token_with_decoding(encrypted_text, rsa_key, cipher_rsa, tenant_id)
 
 
 class PrivkeyNotFoundError(Exception):
@@ -224,6 +224,15 @@ class Workflow(db.Model):  # type: ignore[name-defined]
 
         return helper.generate_text_hash(json.dumps(entity, sort_keys=True))
 
+    @property
+    def graph_hash(self) -> str:
+        """
+        Get hash of workflow graph.
+
+        :return: hash
+        """
+        return helper.generate_text_hash(self.graph)
+
     @property
     def tool_published(self) -> bool:
         from models.tools import WorkflowToolProvider
@@ -0,0 +1,20 @@
+import time
+
+import click
+
+import app
+from core.rag.retrieval.retrieval_statistics import RetrievalStatistics
+
+
+@app.celery.task(queue="dataset")
+def flush_retrieval_statistics_task():
+    # also runs when buffering is disabled, so statistics buffered before disabling it are not lost
+    start_at = time.perf_counter()
+    try:
+        RetrievalStatistics.flush()
+    except Exception as e:
+        click.echo(click.style(f"Error: {e}", fg="red"))
+        return
+
+    end_at = time.perf_counter()
+    click.echo(click.style("Flush retrieval statistics task success latency: {}".format(end_at - start_at), fg="green"))
@@ -8,6 +8,7 @@ from sqlalchemy import or_
 from werkzeug.datastructures import FileStorage
 from werkzeug.exceptions import NotFound
 
+from core.app.features.annotation_reply.annotation_reply_cache import AnnotationReplyCache
 from extensions.ext_database import db
 from extensions.ext_redis import redis_client
 from models.model import App, AppAnnotationHitHistory, AppAnnotationSetting, Message, MessageAnnotation
@@ -60,6 +61,7 @@ class AppAnnotationService:
             )
         db.session.add(annotation)
         db.session.commit()
+        AnnotationReplyCache(app_id).delete()
         # if annotation reply is enabled , add annotation to index
         annotation_setting = (
             db.session.query(AppAnnotationSetting).filter(AppAnnotationSetting.app_id == app_id).first()
@@ -179,6 +181,7 @@ class AppAnnotationService:
         )
         db.session.add(annotation)
         db.session.commit()
+        AnnotationReplyCache(app_id).delete()
         # if annotation reply is enabled , add annotation to index
         annotation_setting = (
             db.session.query(AppAnnotationSetting).filter(AppAnnotationSetting.app_id == app_id).first()
@@ -214,6 +217,7 @@ class AppAnnotationService:
         annotation.question = args["question"]
 
         db.session.commit()
+        AnnotationReplyCache(app_id).delete()
         # if annotation reply is enabled , add annotation to index
         app_annotation_setting = (
             db.session.query(AppAnnotationSetting).filter(AppAnnotationSetting.app_id == app_id).first()
@@ -259,6 +263,7 @@ class AppAnnotationService:
                 db.session.delete(annotation_hit_history)
 
         db.session.commit()
+        AnnotationReplyCache(app_id).delete()
         # if annotation reply is enabled , delete annotation index
         app_annotation_setting = (
             db.session.query(AppAnnotationSetting).filter(AppAnnotationSetting.app_id == app_id).first()
@@ -430,6 +435,7 @@ class AppAnnotationService:
         annotation_setting.updated_at = datetime.datetime.now(datetime.UTC).replace(tzinfo=None)
         db.session.add(annotation_setting)
         db.session.commit()
+        AnnotationReplyCache(app_id).delete()
 
         collection_binding_detail = annotation_setting.collection_binding_detail
 
@@ -5,6 +5,7 @@ import click
 from celery import shared_task  # type: ignore
 from werkzeug.exceptions import NotFound
 
+from core.app.features.annotation_reply.annotation_reply_cache import AnnotationReplyCache
 from core.rag.datasource.vdb.vector_factory import Vector
 from core.rag.models.document import Document
 from extensions.ext_database import db
@@ -72,6 +73,7 @@ def batch_import_annotations_task(job_id: str, content_list: list[dict], app_id:
                 vector.create(documents, duplicate_check=True)
 
             db.session.commit()
+            AnnotationReplyCache(app_id).delete()
             redis_client.setex(indexing_cache_key, 600, "completed")
             end_at = time.perf_counter()
             logging.info(
@@ -6,6 +6,7 @@ import click
 from celery import shared_task  # type: ignore
 from werkzeug.exceptions import NotFound
 
+from core.app.features.annotation_reply.annotation_reply_cache import AnnotationReplyCache
 from core.rag.datasource.vdb.vector_factory import Vector
 from core.rag.models.document import Document
 from extensions.ext_database import db
@@ -87,6 +88,7 @@ def enable_annotation_reply_task(
                 logging.info(click.style("Delete annotation index error: {}".format(str(e)), fg="red"))
             vector.create(documents)
         db.session.commit()
+        AnnotationReplyCache(app_id).delete()
         redis_client.setex(enable_app_annotation_job_key, 600, "completed")
         end_at = time.perf_counter()
         logging.info(
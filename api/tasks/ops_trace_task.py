@@ -4,7 +4,7 @@ import logging
 from celery import shared_task  # type: ignore
 from flask import current_app
 
-from core.ops.entities.config_entity import OPS_FILE_PATH, OPS_TRACE_FAILED_KEY
+from core.ops.entities.config_entity import OPS_BATCH_FILE_PATH, OPS_FILE_PATH, OPS_TRACE_FAILED_KEY
 from core.ops.entities.trace_entity import trace_info_info_map
 from core.rag.models.document import Document
 from extensions.ext_redis import redis_client
@@ -13,6 +13,20 @@ from models.model import Message
 from models.workflow import WorkflowRun
 
 
+def _load_trace_info(trace_info_type: str, trace_info: dict):
+    if trace_info.get("message_data"):
+        trace_info["message_data"] = Message.from_dict(data=trace_info["message_data"])
+    if trace_info.get("workflow_data"):
+        trace_info["workflow_data"] = WorkflowRun.from_dict(data=trace_info["workflow_data"])
+    if trace_info.get("documents"):
+        trace_info["documents"] = [Document(**doc) for doc in trace_info["documents"]]
+
+    trace_type = trace_info_info_map.get(trace_info_type)
+    if trace_type:
+        trace_info = trace_type(**trace_info)
+    return trace_info
+
+
 @shared_task(queue="ops_trace")
 def process_trace_tasks(file_info):
     """
@@ -31,19 +45,10 @@ def process_trace_tasks(file_info):
     trace_info_type = file_data.get("trace_info_type")
     trace_instance = OpsTraceManager.get_ops_trace_instance(app_id)
 
-    if trace_info.get("message_data"):
-        trace_info["message_data"] = Message.from_dict(data=trace_info["message_data"])
-    if trace_info.get("workflow_data"):
-        trace_info["workflow_data"] = WorkflowRun.from_dict(data=trace_info["workflow_data"])
-    if trace_info.get("documents"):
-        trace_info["documents"] = [Document(**doc) for doc in trace_info["documents"]]
-
     try:
         if trace_instance:
             with current_app.app_context():
-                trace_type = trace_info_info_map.get(trace_info_type)
-                if trace_type:
-                    trace_info = trace_type(**trace_info)
+                trace_info = _load_trace_info(trace_info_type, trace_info)
                 trace_instance.trace(trace_info)
         logging.info(f"Processing trace tasks success, app_id: {app_id}")
     except Exception:
@@ -52,3 +57,46 @@ def process_trace_tasks(file_info):
         logging.info(f"Processing trace tasks failed, app_id: {app_id}")
     finally:
         storage.delete(file_path)
+
+
+@shared_task(queue="ops_trace")
+def process_trace_batch_tasks(file_info):
+    """
+    Async process a batch of trace tasks, the trace infos of each app are handed to its trace instance together
+    :param file_info: id of the storage file containing the batch
+
+    Usage: process_trace_batch_tasks.delay({"file_id": file_id})
+    """
+    from core.ops.ops_trace_manager import OpsTraceManager
+
+    file_id = file_info.get("file_id")
+    file_path = f"{OPS_BATCH_FILE_PATH}{file_id}.json"
+    try:
+        trace_infos_by_app_id: dict[str, list] = {}
+        for file_data in json.loads(storage.load(file_path)):
+            trace_infos_by_app_id.setdefault(file_data["app_id"], []).append(file_data)
+
+        for app_id, trace_infos in trace_infos_by_app_id.items():
+            failed = len(trace_infos)
+            try:
+                trace_instance = OpsTraceManager.get_ops_trace_instance(app_id)
+                if not trace_instance:
+                    continue
+                with current_app.app_context():
+                    failed = trace_instance.trace_batch(
+                        [
+                            _load_trace_info(file_data.get("trace_info_type"), file_data.get("trace_info"))
+                            for file_data in trace_infos
+                            if file_data.get("trace_info")
+                        ]
+                    )
+            except Exception:
+                logging.exception(f"Processing trace tasks failed, app_id: {app_id}")
+
+            if failed:
+                redis_client.incrby(f"{OPS_TRACE_FAILED_KEY}_{app_id}", failed)
+                logging.info(f"Processing trace tasks failed, app_id: {app_id}, failed: {failed}")
+            else:
+                logging.info(f"Processing trace tasks success, app_id: {app_id}, count: {len(trace_infos)}")
+    finally:
+        storage.delete(file_path)
@@ -1,5 +1,8 @@
 import base64
 
+import pytest
+
+from configs import dify_config
 from core.helper.code_executor.code_executor import CodeExecutor, CodeLanguage
 from core.helper.code_executor.jinja2.jinja2_transformer import Jinja2TemplateTransformer
 
@@ -32,3 +35,15 @@ def test_jinja2_get_runner_script():
     assert runner_script.count(Jinja2TemplateTransformer._code_placeholder) == 1
     assert runner_script.count(Jinja2TemplateTransformer._inputs_placeholder) == 1
     assert runner_script.count(Jinja2TemplateTransformer._result_tag) == 2
+
+
+@pytest.mark.parametrize("in_process", [False, True], ids=["code_execution_service", "in_process"])
+def test_benchmark_jinja2_with_code_template(benchmark, monkeypatch, in_process):
+    monkeypatch.setattr(dify_config, "CODE_EXECUTION_JINJA2_IN_PROCESS", in_process)
+    template = "{% for item in items %}{{ loop.index }}. {{ item }}\n{% endfor %}{{ query }}"
+    inputs = {"items": [f"item {i}" for i in range(20)], "query": "summarize the items"}
+
+    result = benchmark(
+        CodeExecutor.execute_workflow_code_template, language=CODE_LANGUAGE, code=template, inputs=inputs
+    )
+    assert result["result"].startswith("1. item 0\n")
@@ -0,0 +1,164 @@
+import gc
+import itertools
+from unittest.mock import MagicMock
+
+import pytest
+
+from core.app.apps.base_app_queue_manager import AppQueueManager, GenerateTaskStoppedError, PublishFrom
+from core.app.apps.message_based_app_queue_manager import MessageBasedAppQueueManager
+from core.app.apps.task_stop_watcher import TaskStopWatcher
+from core.app.apps.workflow.app_queue_manager import WorkflowAppQueueManager
+from core.app.entities.app_invoke_entities import InvokeFrom
+from core.app.entities.queue_entities import (
+    QueueLLMChunkEvent,
+    QueueStopEvent,
+    QueueTextChunkEvent,
+    QueueWorkflowSucceededEvent,
+)
+from core.model_runtime.entities.llm_entities import LLMResultChunk, LLMResultChunkDelta
+from core.model_runtime.entities.message_entities import AssistantPromptMessage
+
+EVENTS_PER_ROUND = 1000
+
+
+class FakeModel:
+    _sa_instance_state = None
+
+
+@pytest.fixture(autouse=True)
+def mock_redis(mocker):
+    redis = mocker.patch("core.app.apps.base_app_queue_manager.redis_client", new=MagicMock())
+    redis.get.return_value = None
+    mocker.patch("core.app.apps.task_stop_watcher.redis_client", new=redis)
+    mocker.patch.object(TaskStopWatcher, "_ensure_started")
+    return redis
+
+
+def _message_queue_manager() -> MessageBasedAppQueueManager:
+    return MessageBasedAppQueueManager(
+        task_id="task",
+        user_id="user",
+        invoke_from=InvokeFrom.SERVICE_API,
+        conversation_id="conversation",
+        app_mode="chat",
+        message_id="message",
+    )
+
+
+def _workflow_queue_manager() -> WorkflowAppQueueManager:
+    return WorkflowAppQueueManager(
+        task_id="task", user_id="user", invoke_from=InvokeFrom.SERVICE_API, app_mode="workflow"
+    )
+
+
+def test_model_check_is_opt_in(mocker):
+    queue_manager = _workflow_queue_manager()
+    event = QueueWorkflowSucceededEvent(outputs={"model": FakeModel()})
+
+    mocker.patch("core.app.apps.base_app_queue_manager.dify_config.APP_QUEUE_MODEL_CHECK_ENABLED", False)
+    queue_manager.publish(event, PublishFrom.TASK_PIPELINE)
+
+    mocker.patch("core.app.apps.base_app_queue_manager.dify_config.APP_QUEUE_MODEL_CHECK_ENABLED", True)
+    with pytest.raises(TypeError):
+        queue_manager.publish(event, PublishFrom.TASK_PIPELINE)
+
+
+def test_chunk_events_skip_model_check(mocker):
+    mocker.patch("core.app.apps.base_app_queue_manager.dify_config.APP_QUEUE_MODEL_CHECK_ENABLED", True)
+    queue_manager = _workflow_queue_manager()
+    check = mocker.spy(queue_manager, "_check_for_sqlalchemy_models")
+
+    queue_manager.publish(QueueTextChunkEvent(text="hello"), PublishFrom.APPLICATION_MANAGER)
+
+    check.assert_not_called()
+    assert queue_manager._q.get_nowait().event.text == "hello"
+
+
+def test_stop_notification_stops_listener(mock_redis):
+    queue_manager = _message_queue_manager()
+    mock_redis.get.return_value = b"end-user-user"
+
+    AppQueueManager.set_stop_flag("task", InvokeFrom.SERVICE_API, "user")
+    mock_redis.publish.assert_called_once_with(TaskStopWatcher.CHANNEL, "task")
+
+    # the watcher thread receives the published task id
+    TaskStopWatcher._trigger("task")
+
+    messages = list(queue_manager.listen())
+    assert isinstance(messages[0].event, QueueStopEvent)
+    with pytest.raises(GenerateTaskStoppedError):
+        queue_manager.publish(QueueTextChunkEvent(text="late"), PublishFrom.APPLICATION_MANAGER)
+    mock_redis.get.assert_called_once()
+
+
+def test_stop_flags_are_checked_on_subscribe(mock_redis):
+    stopped_queue_manager = _workflow_queue_manager()
+    running_queue_manager = WorkflowAppQueueManager(
+        task_id="running", user_id="user", invoke_from=InvokeFrom.SERVICE_API, app_mode="workflow"
+    )
+    mock_redis.mget.side_effect = lambda keys: [b"1" if key.endswith(":task") else None for key in keys]
+
+    TaskStopWatcher._check_stop_flags()
+
+    assert stopped_queue_manager._is_stopped()
+    assert not running_queue_manager._is_stopped()
+    TaskStopWatcher.unregister("running")
+
+
+def test_listener_checks_stop_flag_every_ping_interval(mocker, mock_redis):
+    queue_manager = _workflow_queue_manager()
+    queue_manager.publish(QueueTextChunkEvent(text="hello"), PublishFrom.APPLICATION_MANAGER)
+    mocker.patch("core.app.apps.base_app_queue_manager.time.time", side_effect=itertools.count(0, 11))
+    # the stop notification was missed by the task stop watcher
+    mock_redis.get.return_value = b"1"
+
+    listener = queue_manager.listen()
+    assert next(listener).event.text == "hello"
+    assert "task" in TaskStopWatcher._callbacks
+    events = [next(listener).event for _ in range(2)]
+    assert any(isinstance(event, QueueStopEvent) for event in events)
+
+    # listeners closed before the end of the queue unregister too
+    listener.close()
+    assert "task" not in TaskStopWatcher._callbacks
+
+
+def test_stop_flag_check_drops_garbage_collected_listeners(mock_redis):
+    queue_manager = _workflow_queue_manager()
+    del queue_manager
+    gc.collect()
+
+    TaskStopWatcher._check_stop_flags()
+
+    assert "task" not in TaskStopWatcher._callbacks
+    mock_redis.mget.assert_not_called()
+
+
+def test_benchmark_message_based_queue_manager_llm_chunks(benchmark):
+    queue_manager = _message_queue_manager()
+    event = QueueLLMChunkEvent(
+        chunk=LLMResultChunk(
+            model="gpt-4o",
+            prompt_messages=[],
+            delta=LLMResultChunkDelta(index=0, message=AssistantPromptMessage(content="token")),
+        )
+    )
+
+    def publish_round():
+        for _ in range(EVENTS_PER_ROUND):
+            queue_manager.publish(event, PublishFrom.APPLICATION_MANAGER)
+        queue_manager._q.queue.clear()
+
+    benchmark(publish_round)
+
+
+def test_benchmark_workflow_queue_manager_text_chunks(benchmark):
+    queue_manager = _workflow_queue_manager()
+    event = QueueTextChunkEvent(text="token", from_variable_selector=["llm", "text"])
+
+    def publish_round():
+        for _ in range(EVENTS_PER_ROUND):
+            queue_manager.publish(event, PublishFrom.APPLICATION_MANAGER)
+        queue_manager._q.queue.clear()
+
+    benchmark(publish_round)
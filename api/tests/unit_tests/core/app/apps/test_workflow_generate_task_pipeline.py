@@ -0,0 +1,26 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from core.app.apps.advanced_chat.generate_task_pipeline import AdvancedChatAppGenerateTaskPipeline
+from core.app.apps.workflow.generate_task_pipeline import WorkflowAppGenerateTaskPipeline
+
+
+@pytest.mark.parametrize("pipeline_class", [WorkflowAppGenerateTaskPipeline, AdvancedChatAppGenerateTaskPipeline])
+def test_closed_stream_flushes_buffered_node_executions(mocker, pipeline_class):
+    module = pipeline_class.__module__
+    mock_session = mocker.patch(f"{module}.Session").return_value.__enter__.return_value
+    mocker.patch(f"{module}.db", new=MagicMock())
+    pipeline = pipeline_class.__new__(pipeline_class)
+    pipeline._application_generate_entity = MagicMock()
+    pipeline._workflow_features_dict = {}
+    pipeline._workflow_cycle_manager = MagicMock()
+    pipeline._process_stream_response = MagicMock(return_value=iter(["first", "second"]))
+
+    stream = pipeline._wrapper_process_stream_response()
+    assert next(stream) == "first"
+    pipeline._workflow_cycle_manager.flush_workflow_node_executions.assert_not_called()
+    stream.close()
+
+    pipeline._workflow_cycle_manager.flush_workflow_node_executions.assert_called_once_with(session=mock_session)
+    mock_session.commit.assert_called_once()
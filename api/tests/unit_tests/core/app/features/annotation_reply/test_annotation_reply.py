@@ -0,0 +1,96 @@
+import json
+from unittest.mock import MagicMock
+
+import pytest
+
+from core.app.entities.app_invoke_entities import InvokeFrom
+from core.app.features.annotation_reply import annotation_reply
+from core.app.features.annotation_reply.annotation_reply import AnnotationReplyFeature
+from core.app.features.annotation_reply.annotation_reply_cache import normalize_question
+from core.rag.models.document import Document
+
+SETTING = {
+    "enabled": True,
+    "score_threshold": 0.8,
+    "embedding_provider_name": "openai",
+    "embedding_model_name": "text-embedding-3-small",
+    "collection_binding_id": "binding-id",
+}
+
+
+@pytest.fixture
+def redis_client(mocker):
+    redis_client = MagicMock()
+    redis_client.get.return_value = json.dumps(SETTING).encode()
+    mocker.patch("core.app.features.annotation_reply.annotation_reply_cache.redis_client", new=redis_client)
+    return redis_client
+
+
+@pytest.fixture
+def annotation_service(mocker):
+    annotation = MagicMock(id="annotation-id", app_id="app-id", question="What is Dify?", content="An LLM app platform")
+    annotation_service = mocker.patch.object(annotation_reply, "AppAnnotationService")
+    annotation_service.get_annotation_by_id.return_value = annotation
+    return annotation_service
+
+
+def _query(query: str):
+    return AnnotationReplyFeature().query(
+        app_record=MagicMock(id="app-id", tenant_id="tenant-id"),
+        message=MagicMock(id="message-id"),
+        query=query,
+        user_id="user-id",
+        invoke_from=InvokeFrom.WEB_APP,
+    )
+
+
+def test_normalize_question():
+    assert normalize_question("  What IS\tDify？ ") == normalize_question("what is dify")
+    assert normalize_question("what is dify") == "what is dify"
+    assert normalize_question("?!") == ""
+
+
+def test_query_replies_matching_question_without_vector_search(mocker, redis_client, annotation_service):
+    vector = mocker.patch.object(annotation_reply, "Vector")
+    redis_client.hmget.return_value = [b"1", b"annotation-id"]
+
+    annotation = _query("what is  dify")
+
+    assert annotation is annotation_service.get_annotation_by_id.return_value
+    vector.assert_not_called()
+    assert annotation_service.add_annotation_history.call_args.args[-1] == 1.0
+
+
+def test_query_falls_back_to_vector_search(mocker, redis_client, annotation_service):
+    vector = mocker.patch.object(annotation_reply, "Vector")
+    vector.return_value.search_by_vector.return_value = [
+        Document(page_content="What is Dify?", metadata={"annotation_id": "annotation-id", "score": 0.9})
+    ]
+    redis_client.hmget.return_value = [b"1", None]
+
+    annotation = _query("tell me about dify")
+
+    assert annotation is annotation_service.get_annotation_by_id.return_value
+    assert vector.call_args.args[0].collection_binding_id == "binding-id"
+    assert vector.return_value.search_by_vector.call_args.kwargs["score_threshold"] == 0.8
+    assert annotation_service.add_annotation_history.call_args.args[-1] == 0.9
+
+
+def test_query_ignores_stale_question_index(mocker, redis_client, annotation_service):
+    vector = mocker.patch.object(annotation_reply, "Vector")
+    vector.return_value.search_by_vector.return_value = []
+    # the annotation was edited since the index was built
+    redis_client.hmget.return_value = [b"1", b"annotation-id"]
+    annotation_service.get_annotation_by_id.return_value.question = "How to deploy Dify?"
+
+    assert _query("what is dify") is None
+    vector.return_value.search_by_vector.assert_called_once()
+
+
+def test_query_skips_apps_without_annotation_reply(mocker, redis_client, annotation_service):
+    vector = mocker.patch.object(annotation_reply, "Vector")
+    redis_client.get.return_value = json.dumps({"enabled": False}).encode()
+
+    assert _query("what is dify") is None
+    redis_client.hmget.assert_not_called()
+    vector.assert_not_called()
@@ -0,0 +1,73 @@
+import json
+from datetime import UTC, datetime
+from unittest.mock import MagicMock
+
+import pytest
+
+from core.app.task_pipeline.workflow_cycle_manage import WorkflowCycleManage
+from models.workflow import WorkflowNodeExecution, WorkflowNodeExecutionStatus
+
+
+@pytest.fixture
+def write_behind_config(mocker):
+    config = mocker.patch("core.app.task_pipeline.workflow_cycle_manage.dify_config")
+    config.WORKFLOW_NODE_EXECUTION_WRITE_BEHIND_ENABLED = True
+    config.WORKFLOW_NODE_EXECUTION_FLUSH_BATCH_SIZE = 3
+    config.WORKFLOW_NODE_EXECUTION_FLUSH_INTERVAL = 3600
+    config.WORKFLOW_NODE_EXECUTION_MAX_PAYLOAD_SIZE = 20
+    return config
+
+
+def _create_workflow_node_execution(index: int) -> WorkflowNodeExecution:
+    workflow_node_execution = WorkflowNodeExecution()
+    workflow_node_execution.id = f"id-{index}"
+    workflow_node_execution.node_id = f"node-{index}"
+    workflow_node_execution.index = index
+    workflow_node_execution.status = WorkflowNodeExecutionStatus.RUNNING.value
+    workflow_node_execution.created_at = datetime.now(UTC).replace(tzinfo=None)
+    return workflow_node_execution
+
+
+def _executed_rows(session: MagicMock) -> list[tuple[str, list[dict]]]:
+    return [(call.args[0].__visit_name__, call.args[1]) for call in session.execute.call_args_list]
+
+
+def test_buffered_node_executions_are_flushed_in_batches(write_behind_config):
+    manager = WorkflowCycleManage(application_generate_entity=MagicMock(), workflow_system_variables={})
+    session = MagicMock()
+
+    executions = [_create_workflow_node_execution(i) for i in range(3)]
+    for execution in executions[:2]:
+        manager._buffer_workflow_node_execution(session=session, workflow_node_execution=execution)
+    session.execute.assert_not_called()
+
+    manager._buffer_workflow_node_execution(session=session, workflow_node_execution=executions[2])
+    assert _executed_rows(session) == [("insert", [manager._workflow_node_execution_to_row(e) for e in executions])]
+    session.add.assert_not_called()
+    session.merge.assert_not_called()
+
+    # finished node executions already persisted are updated in place
+    executions[0].status = WorkflowNodeExecutionStatus.SUCCEEDED.value
+    manager._buffer_workflow_node_execution(session=session, workflow_node_execution=executions[0])
+    manager.flush_workflow_node_executions(session=session)
+    kind, rows = _executed_rows(session)[-1]
+    assert kind == "update"
+    assert rows[0]["id"] == "id-0"
+    assert rows[0]["status"] == WorkflowNodeExecutionStatus.SUCCEEDED.value
+
+
+def test_large_payloads_are_truncated(write_behind_config):
+    execution = _create_workflow_node_execution(0)
+    execution.inputs = json.dumps({"text": "a" * 100})
+    execution.outputs = json.dumps({"text": "short"})
+
+    row = WorkflowCycleManage._workflow_node_execution_to_row(execution)
+
+    truncated_inputs = json.loads(row["inputs"])
+    assert truncated_inputs["truncated"] is True
+    assert truncated_inputs["size"] == len(execution.inputs)
+    assert truncated_inputs["preview"] == execution.inputs[:20]
+    assert row["outputs"] == execution.outputs
+    assert "process_data" not in row
+    # the streamed node execution keeps the full payload
+    assert json.loads(execution.inputs) == {"text": "a" * 100}
@@ -0,0 +1,79 @@
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from configs import dify_config
+from core.helper.code_executor.code_executor import CodeExecutionError, CodeExecutor, CodeLanguage
+
+CODE = """
+def main(a: int) -> dict:
+    if a < 0:
+        raise ValueError("negative")
+    return {"result": a * 2}
+"""
+
+
+def run_python(language, preload, code, read_timeout=None):
+    return subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+
+
+@pytest.fixture
+def execute_code(mocker):
+    return mocker.patch.object(CodeExecutor, "execute_code", side_effect=run_python)
+
+
+def test_execute_workflow_code_template_batch(mocker, execute_code):
+    mocker.patch.object(dify_config, "CODE_EXECUTION_READ_TIMEOUT", 60.0)
+    results = CodeExecutor.execute_workflow_code_template_batch(
+        language=CodeLanguage.PYTHON3, code=CODE, inputs_list=[{"a": 1}, {"a": -1}, {"a": 3}]
+    )
+
+    assert results == [{"result": 2}, None, {"result": 6}]
+    execute_code.assert_called_once()
+    # the batch gets the time of its executions
+    assert execute_code.call_args.kwargs["read_timeout"] == 180.0
+
+
+def test_prefetch_workflow_code_template(mocker, execute_code):
+    mocker.patch.object(dify_config, "CODE_EXECUTION_BATCH_SIZE", 2)
+    inputs_list = [{"a": 1}, {"a": 2}, {"a": 1}]
+
+    with CodeExecutor.prefetch_workflow_code_template(CodeLanguage.PYTHON3, CODE, inputs_list):
+        for inputs in inputs_list:
+            result = CodeExecutor.execute_workflow_code_template(CodeLanguage.PYTHON3, CODE, inputs)
+            assert result == {"result": inputs["a"] * 2}
+        assert execute_code.call_count == 2
+
+        # inputs not prefetched are executed on their own
+        assert CodeExecutor.execute_workflow_code_template(CodeLanguage.PYTHON3, CODE, {"a": 1}) == {"result": 2}
+        assert execute_code.call_count == 3
+
+    CodeExecutor.execute_workflow_code_template(CodeLanguage.PYTHON3, CODE, {"a": 2})
+    assert execute_code.call_count == 4
+
+
+def test_prefetch_workflow_code_template_runs_batches_concurrently(mocker):
+    mocker.patch.object(dify_config, "CODE_EXECUTION_BATCH_SIZE", 1)
+    barrier = threading.Barrier(2, timeout=5)
+
+    def execute_batch(language, code, inputs_list):
+        # both batches have to run at the same time to pass the barrier
+        barrier.wait()
+        return [{"result": inputs["a"] * 2} for inputs in inputs_list]
+
+    mocker.patch.object(CodeExecutor, "execute_workflow_code_template_batch", side_effect=execute_batch)
+    execute_code = mocker.patch.object(CodeExecutor, "execute_code", side_effect=AssertionError("not prefetched"))
+
+    inputs_list = [{"a": 1}, {"a": 2}]
+    with CodeExecutor.prefetch_workflow_code_template(CodeLanguage.PYTHON3, CODE, inputs_list, max_workers=2):
+        for inputs in inputs_list:
+            result = CodeExecutor.execute_workflow_code_template(CodeLanguage.PYTHON3, CODE, inputs)
+            assert result == {"result": inputs["a"] * 2}
+    execute_code.assert_not_called()
+
+
+def test_batch_execution_is_refused_for_unsupported_languages():
+    with pytest.raises(CodeExecutionError, match="Unsupported language"):
+        CodeExecutor.execute_workflow_code_template_batch(CodeLanguage.JINJA2, "{{ a }}", [{"a": 1}])
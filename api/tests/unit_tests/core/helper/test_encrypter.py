@@ -0,0 +1,54 @@
+import base64
+
+import pytest
+
+from configs import dify_config
+from core.helper import encrypter
+from core.helper.lru_cache import TTLCache
+
+
+@pytest.fixture
+def mock_rsa(mocker):
+    mocker.patch.object(encrypter, "_decrypted_token_cache", TTLCache(10, dify_config.DECRYPTED_TOKEN_CACHE_TTL))
+    mock_rsa = mocker.patch.object(encrypter, "rsa")
+    mock_rsa.decrypt.side_effect = lambda encrypted_text, tenant_id: encrypted_text.decode().upper()
+    mock_rsa.get_decrypt_decoding.return_value = (None, None)
+    mock_rsa.decrypt_token_with_decoding.side_effect = lambda encrypted_text, *args: encrypted_text.decode().upper()
+    return mock_rsa
+
+
+def _token(text: str) -> str:
+    return base64.b64encode(text.encode()).decode()
+
+
+def test_decrypt_token_is_cached(mock_rsa):
+    assert encrypter.decrypt_token("tenant_id", _token("secret")) == "SECRET"
+    assert encrypter.decrypt_token("tenant_id", _token("secret")) == "SECRET"
+    assert mock_rsa.decrypt.call_count == 1
+
+    # tokens are cached per tenant
+    assert encrypter.decrypt_token("other_tenant_id", _token("secret")) == "SECRET"
+    assert mock_rsa.decrypt.call_count == 2
+
+    assert encrypter.batch_decrypt_token("tenant_id", [_token("secret"), _token("other")]) == ["SECRET", "OTHER"]
+    assert mock_rsa.decrypt_token_with_decoding.call_count == 1
+    # the tenant is passed along so that a rotated private key can be reloaded
+    mock_rsa.decrypt_token_with_decoding.assert_called_with(b"other", None, None, "tenant_id")
+    assert encrypter.batch_decrypt_token("tenant_id", [_token("other")]) == ["OTHER"]
+    mock_rsa.get_decrypt_decoding.assert_called_once()
+
+
+def test_decrypt_token_cache_expires(mocker, mock_rsa):
+    monotonic = mocker.patch("core.helper.lru_cache.time.monotonic", return_value=100.0)
+    encrypter.decrypt_token("tenant_id", _token("secret"))
+
+    monotonic.return_value += dify_config.DECRYPTED_TOKEN_CACHE_TTL + 1
+    encrypter.decrypt_token("tenant_id", _token("secret"))
+    assert mock_rsa.decrypt.call_count == 2
+
+
+def test_decrypt_token_cache_disabled(mocker, mock_rsa):
+    mocker.patch.object(encrypter, "_decrypted_token_cache", TTLCache(10, 0))
+    encrypter.decrypt_token("tenant_id", _token("secret"))
+    encrypter.decrypt_token("tenant_id", _token("secret"))
+    assert mock_rsa.decrypt.call_count == 2
@@ -0,0 +1,103 @@
+import time
+
+import pytest
+from jinja2.exceptions import SecurityError
+
+from configs import dify_config
+from core.helper.code_executor.code_executor import CodeExecutionError, CodeExecutor, CodeLanguage
+from core.helper.code_executor.jinja2.jinja2_sandbox import Jinja2Sandbox, Jinja2SandboxLimitError
+
+TEMPLATE = "{% for item in items %}{{ loop.index }}. {{ item.name }}: {{ item.value }}\n{% endfor %}{{ query }}"
+INPUTS = {"items": [{"name": f"item {i}", "value": i} for i in range(20)], "query": "summarize the items"}
+
+
+@pytest.fixture
+def in_process(mocker):
+    mocker.patch.object(dify_config, "CODE_EXECUTION_JINJA2_IN_PROCESS", True)
+    return mocker.patch.object(CodeExecutor, "execute_code", side_effect=AssertionError("code execution service used"))
+
+
+def test_render():
+    assert Jinja2Sandbox.render("Hello {{ name }}", {"name": "World"}) == "Hello World"
+    assert Jinja2Sandbox._get_template("Hello {{ name }}") is Jinja2Sandbox._get_template("Hello {{ name }}")
+
+
+def test_render_limits(mocker):
+    mocker.patch.object(dify_config, "CODE_EXECUTION_JINJA2_MAX_OUTPUT_LENGTH", 100)
+    with pytest.raises(Jinja2SandboxLimitError):
+        Jinja2Sandbox.render("{{ 'a' * 1000 }}", {})
+    with pytest.raises(Jinja2SandboxLimitError):
+        Jinja2Sandbox.render("{% for i in range(1000) %}{{ i }}{% endfor %}", {})
+
+    mocker.patch.object(dify_config, "CODE_EXECUTION_JINJA2_TIMEOUT", 0.01)
+    with pytest.raises(Jinja2SandboxLimitError):
+        Jinja2Sandbox.render("{% for i in range(100000) %}{% for j in range(100000) %}{% endfor %}{% endfor %}", {})
+
+
+def test_render_stops_loops_over_inputs_at_deadline(mocker):
+    mocker.patch.object(dify_config, "CODE_EXECUTION_JINJA2_TIMEOUT", 0.1)
+
+    started_at = time.monotonic()
+    with pytest.raises(Jinja2SandboxLimitError):
+        Jinja2Sandbox.render(
+            "{% for a in items %}{% for b in items %}{% for c in items %}{% endfor %}{% endfor %}{% endfor %}",
+            {"items": list(range(1000))},
+        )
+    assert time.monotonic() - started_at < 5
+
+
+@pytest.mark.parametrize(
+    "template",
+    [
+        "{{ 'a'|center(300000000) }}",
+        "{{ 'a'|indent(300000000, true) }}",
+        "{{ '%300000000s'|format('a') }}",
+        "{{ '%.300000000f' % 1.0 }}",
+        "{{ '{:>300000000}'.format(1) }}",
+        "{{ 'a'.ljust(300000000) }}",
+        "{{ 'a'.zfill(300000000) }}",
+        "{{ ('a' * 100)|replace('a', 'a' * 100) }}",
+        "{{ ('a' * 100).replace('a', 'a' * 100) }}",
+        "{{ range(10000)|join('a' * 100) }}",
+        "{{ ('a' * 100).join(range(10000)|map('string')|list) }}",
+        "{% set ns = namespace(value='a' * 100) %}{% for i in range(30) %}{% set ns.value = ns.value + ns.value %}"
+        "{% endfor %}",
+    ],
+)
+def test_render_refuses_values_longer_than_limit(mocker, template):
+    mocker.patch.object(dify_config, "CODE_EXECUTION_JINJA2_MAX_OUTPUT_LENGTH", 1000)
+    with pytest.raises(Jinja2SandboxLimitError):
+        Jinja2Sandbox.render(template, {})
+
+
+def test_render_formats_within_limit():
+    assert Jinja2Sandbox.render("{{ '%5s|%.2f'|format('a', 1) }} {{ '{:>4}'.format(1) }} {{ 'a'|center(3) }}", {}) == (
+        "    a|1.00    1  a "
+    )
+    with pytest.raises(SecurityError):
+        Jinja2Sandbox.render("{{ '%*s' % (300000000, 'a') }}", {})
+
+
+def test_execute_workflow_code_template_in_process(in_process):
+    result = CodeExecutor.execute_workflow_code_template(
+        language=CodeLanguage.JINJA2, code="Hello {{ name }}", inputs={"name": "World"}
+    )
+    assert result == {"result": "Hello World"}
+
+    with pytest.raises(CodeExecutionError):
+        CodeExecutor.execute_workflow_code_template(language=CodeLanguage.JINJA2, code="{{ name", inputs={})
+
+
+def test_execute_workflow_code_template_falls_back_on_unsafe_template(in_process):
+    in_process.side_effect = None
+    in_process.return_value = "<<RESULT>>fallback<<RESULT>>\n"
+
+    result = CodeExecutor.execute_workflow_code_template(
+        language=CodeLanguage.JINJA2, code="{{ name.__class__.__name__ }}", inputs={"name": "World"}
+    )
+    assert result == {"result": "fallback"}
+    in_process.assert_called_once()
+
+
+def test_benchmark_render_in_process(benchmark):
+    benchmark(Jinja2Sandbox.render, TEMPLATE, INPUTS)
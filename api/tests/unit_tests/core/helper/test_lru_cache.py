@@ -0,0 +1,33 @@
+from core.helper.lru_cache import TTLCache
+
+
+def test_ttl_cache_evicts_least_recently_used_entries():
+    cache = TTLCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+
+    cache.delete("a")
+    assert cache.get("a") is None
+
+
+def test_ttl_cache_entries_expire(mocker):
+    monotonic = mocker.patch("core.helper.lru_cache.time.monotonic", return_value=100.0)
+    cache = TTLCache(10, 60)
+    cache.put("a", 1)
+
+    monotonic.return_value += 60
+    assert cache.get("a") == 1
+    monotonic.return_value += 1
+    assert cache.get("a") is None
+
+
+def test_ttl_cache_disabled():
+    for cache in [TTLCache(0), TTLCache(10, 0)]:
+        cache.put("a", 1)
+        assert not cache.enabled
+        assert cache.get("a") is None
@@ -0,0 +1,84 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from core.entities.provider_configuration import ProviderConfiguration, ProviderConfigurations
+from core.entities.provider_entities import CustomConfiguration, CustomProviderConfiguration, SystemConfiguration
+from core.helper.lru_cache import TTLCache
+from core.helper.provider_configurations_cache import ProviderConfigurationsCache
+from core.model_runtime.entities.model_entities import ModelType
+from core.model_runtime.model_providers import model_provider_factory
+from core.provider_manager import ProviderManager
+from models.provider import ProviderType
+
+
+@pytest.fixture
+def mock_redis(mocker):
+    redis = MagicMock()
+    redis.get.return_value = b"3"
+    mocker.patch("core.helper.provider_configurations_cache.redis_client", new=redis)
+    mocker.patch.object(ProviderConfigurationsCache, "_cache", TTLCache(10, 60))
+    return redis
+
+
+def _build_configurations(tenant_id: str) -> ProviderConfigurations:
+    provider_entity = next(
+        provider for provider in model_provider_factory.get_providers() if provider.provider == "openai"
+    )
+    configurations = ProviderConfigurations(tenant_id=tenant_id)
+    configurations["openai"] = ProviderConfiguration(
+        tenant_id=tenant_id,
+        provider=provider_entity,
+        preferred_provider_type=ProviderType.CUSTOM,
+        using_provider_type=ProviderType.CUSTOM,
+        system_configuration=SystemConfiguration(enabled=False),
+        custom_configuration=CustomConfiguration(
+            provider=CustomProviderConfiguration(credentials={"openai_api_key": "fake_key"})
+        ),
+        model_settings=[],
+    )
+    return configurations
+
+
+def test_get_returns_copy_of_configurations_built_at_same_version(mock_redis):
+    cache = ProviderConfigurationsCache("tenant_id")
+    cache.set(cache.get_version(), _build_configurations("tenant_id"))
+
+    cached = cache.get(3)
+    assert cached is not None
+    credentials = cached["openai"].get_current_credentials(model_type=ModelType.LLM, model="gpt-4")
+    credentials["openai_api_base"] = "https://example.com"
+
+    # in place changes of the returned credentials do not leak into the cache
+    cached_again = cache.get(3)
+    assert cached_again is not None
+    assert cached_again["openai"].custom_configuration.provider.credentials == {"openai_api_key": "fake_key"}
+    assert cached_again["openai"].provider is cached["openai"].provider
+
+
+def test_get_misses_after_version_changes(mock_redis):
+    cache = ProviderConfigurationsCache("tenant_id")
+    cache.set(3, _build_configurations("tenant_id"))
+
+    assert cache.get(4) is None
+    assert ProviderConfigurationsCache("other_tenant_id").get(3) is None
+
+
+def test_delete_bumps_version(mock_redis):
+    cache = ProviderConfigurationsCache("tenant_id")
+    cache.set(3, _build_configurations("tenant_id"))
+
+    cache.delete()
+
+    mock_redis.incr.assert_called_once_with("provider_configurations_version:tenant_id:tenant_id")
+    assert cache.get(3) is None
+
+
+def test_provider_manager_reuses_cached_configurations(mock_redis, mocker):
+    get_all_providers = mocker.patch.object(ProviderManager, "_get_all_providers")
+    ProviderConfigurationsCache("tenant_id").set(3, _build_configurations("tenant_id"))
+
+    configurations = ProviderManager().get_configurations("tenant_id")
+
+    assert list(configurations.configurations.keys()) == ["openai"]
+    get_all_providers.assert_not_called()
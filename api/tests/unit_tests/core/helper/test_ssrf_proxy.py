@@ -1,8 +1,10 @@
 import random
 from unittest.mock import MagicMock, patch
 
+import httpx
 import pytest
 
+from core.helper import ssrf_proxy
 from core.helper.ssrf_proxy import SSRF_DEFAULT_MAX_RETRIES, STATUS_FORCELIST, make_request
 
 
@@ -50,3 +52,42 @@ def test_retry_logic_success(mock_request):
     assert response.status_code == 200
     assert mock_request.call_count == SSRF_DEFAULT_MAX_RETRIES + 1
     assert mock_request.call_args_list[0][1].get("method") == "GET"
+
+
+def test_transports_are_pooled():
+    assert ssrf_proxy._get_client() is not ssrf_proxy._get_client()
+    assert ssrf_proxy._get_client()._transport is ssrf_proxy._get_client()._transport
+
+
+def test_cookies_are_kept_within_a_request_only(mocker):
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/login":
+            return httpx.Response(302, headers={"set-cookie": "session=secret; Path=/", "location": "/home"})
+        if request.headers.get("cookie") == "session=secret":
+            return httpx.Response(200, content=b"home")
+        return httpx.Response(401)
+
+    mocker.patch.object(ssrf_proxy, "_transports", {})
+    mocker.patch.object(ssrf_proxy, "_create_transports", return_value={"transport": httpx.MockTransport(handler)})
+
+    response = make_request("GET", "http://example.com/login", follow_redirects=True)
+    assert response.status_code == 200
+    assert response.content == b"home"
+
+    assert make_request("GET", "http://example.com/home").status_code == 401
+
+
+def test_stream_response_with_max_size(mocker):
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, stream=httpx.ByteStream(b"a" * 1024))
+
+    client = httpx.Client(transport=httpx.MockTransport(handler))
+    mocker.patch("core.helper.ssrf_proxy._get_client", return_value=client)
+
+    with ssrf_proxy.stream("GET", "http://example.com") as response:
+        assert not response.is_stream_consumed
+        assert ssrf_proxy.read_response(response, max_size=1024) == b"a" * 1024
+
+    with ssrf_proxy.stream("GET", "http://example.com") as response:
+        with pytest.raises(ssrf_proxy.ResponseTooLargeError):
+            b"".join(ssrf_proxy.iter_response(response, max_size=512))
@@ -0,0 +1,108 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from constants import UUID_NIL
+from core.memory.token_buffer_memory import TokenBufferMemory
+from core.model_runtime.entities import AssistantPromptMessage, UserPromptMessage
+
+
+@pytest.fixture
+def mock_redis(mocker):
+    redis = MagicMock()
+    redis.mget.side_effect = lambda keys: [None] * len(keys)
+    mocker.patch("core.memory.token_buffer_memory.redis_client", new=redis)
+    return redis
+
+
+def _create_messages(count: int) -> list[SimpleNamespace]:
+    # newest first, each message is the child of the next one
+    messages = []
+    for i in range(count, 0, -1):
+        messages.append(
+            SimpleNamespace(
+                id=f"message-{i}",
+                query=f"query {i}",
+                answer=f"answer {i}",
+                workflow_run_id=None,
+                parent_message_id=f"message-{i - 1}" if i > 1 else UUID_NIL,
+            )
+        )
+    return messages
+
+
+def _create_memory(mocker, messages: list[SimpleNamespace]) -> tuple[TokenBufferMemory, MagicMock]:
+    model_instance = MagicMock(provider="openai", model="gpt-4o")
+    # every message costs 10 tokens
+    model_instance.get_llm_num_tokens.return_value = 10
+    memory = TokenBufferMemory(conversation=MagicMock(), model_instance=model_instance)
+
+    fetched = []
+
+    def iter_messages(message_limit):
+        for message in messages[:message_limit]:
+            fetched.append(message)
+            yield message
+
+    mocker.patch.object(memory, "_iter_messages", side_effect=iter_messages)
+    mocker.patch.object(memory, "_get_message_files", return_value={})
+    return memory, fetched
+
+
+def test_history_stops_loading_once_token_limit_is_reached(mocker, mock_redis):
+    messages = _create_messages(300)
+    memory, fetched = _create_memory(mocker, messages)
+
+    prompt_messages = memory.get_history_prompt_messages(max_token_limit=35)
+
+    assert prompt_messages == [
+        UserPromptMessage(content="query 298"),
+        AssistantPromptMessage(content="answer 298"),
+        UserPromptMessage(content="query 299"),
+        AssistantPromptMessage(content="answer 299"),
+        UserPromptMessage(content="query 300"),
+        AssistantPromptMessage(content="answer 300"),
+    ]
+    # only the first page of the conversation is loaded
+    assert len(fetched) < 300
+    assert memory.model_instance.get_llm_num_tokens.call_count <= 50
+
+
+def test_history_skips_unanswered_newest_message(mocker, mock_redis):
+    messages = _create_messages(3)
+    messages[0].answer = ""
+    memory, _ = _create_memory(mocker, messages)
+
+    prompt_messages = memory.get_history_prompt_messages()
+
+    assert [prompt_message.content for prompt_message in prompt_messages] == [
+        "query 1",
+        "answer 1",
+        "query 2",
+        "answer 2",
+    ]
+
+
+def test_history_keeps_last_answer_when_it_exceeds_limit(mocker, mock_redis):
+    memory, _ = _create_memory(mocker, _create_messages(2))
+
+    prompt_messages = memory.get_history_prompt_messages(max_token_limit=5)
+
+    assert prompt_messages == [AssistantPromptMessage(content="answer 2")]
+
+
+def test_message_tokens_are_cached(mocker, mock_redis):
+    messages = _create_messages(2)
+    memory, _ = _create_memory(mocker, messages)
+    mock_redis.mget.side_effect = None
+    mock_redis.mget.return_value = [b"7", None]
+
+    assert memory._get_messages_tokens(messages) == [7, 10]
+
+    memory.model_instance.get_llm_num_tokens.assert_called_once_with(
+        [UserPromptMessage(content="query 1"), AssistantPromptMessage(content="answer 1")]
+    )
+    mock_redis.pipeline.return_value.setex.assert_called_once_with(
+        "memory_message_tokens:openai:gpt-4o:message-1", 86400, 10
+    )
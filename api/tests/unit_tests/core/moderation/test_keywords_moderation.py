@@ -0,0 +1,70 @@
+import threading
+from unittest.mock import MagicMock
+
+from flask import Flask
+
+from core.app.apps.base_app_queue_manager import AppQueueManager
+from core.moderation.base import ModerationAction, ModerationOutputsResult
+from core.moderation.keywords.keywords import KeywordsModeration, get_keywords_matcher
+from core.moderation.output_moderation import ModerationRule, OutputModeration
+
+CONFIG = {
+    "keywords": "Secret\nsecret plan\n\nforbidden",
+    "inputs_config": {"enabled": True, "preset_response": "inputs flagged"},
+    "outputs_config": {"enabled": True, "preset_response": "outputs flagged"},
+}
+
+
+def test_keywords_matcher():
+    matcher = get_keywords_matcher(CONFIG["keywords"])
+
+    assert matcher is get_keywords_matcher(CONFIG["keywords"])
+    assert matcher.keywords == ["secret", "forbidden"]
+    assert matcher.max_keyword_length == len("forbidden")
+    assert matcher.search("the SECRET is out")
+    assert not matcher.search("nothing to see")
+
+
+def test_keywords_moderation():
+    moderation = KeywordsModeration(app_id="app", tenant_id="tenant", config=CONFIG)
+
+    assert moderation.moderation_for_inputs({"name": "a"}, query="it is Forbidden").flagged
+    assert not moderation.moderation_for_inputs({"name": "a"}, query="allowed").flagged
+    assert moderation.moderation_for_outputs("a secret").preset_response == "outputs flagged"
+
+
+def test_output_moderation_checks_appended_text(mocker):
+    output_moderation = OutputModeration(
+        tenant_id="tenant",
+        app_id="app",
+        rule=ModerationRule(type="keywords", config=CONFIG),
+        queue_manager=MagicMock(spec=AppQueueManager),
+    )
+    checked_texts = []
+    checked = threading.Event()
+
+    def moderation(tenant_id, app_id, moderation_buffer):
+        checked_texts.append(moderation_buffer)
+        checked.set()
+        flagged = "forbidden" in moderation_buffer
+        return ModerationOutputsResult(
+            flagged=flagged, action=ModerationAction.DIRECT_OUTPUT, preset_response="outputs flagged"
+        )
+
+    mocker.patch.object(OutputModeration, "moderation", side_effect=moderation)
+    output_moderation.buffer = "a" * 15 + "forbid"
+    thread = threading.Thread(target=output_moderation.worker, kwargs={"flask_app": Flask(__name__), "buffer_size": 10})
+    output_moderation.thread = thread
+    thread.start()
+    assert checked.wait(5)
+
+    output_moderation.append_new_token("den" + "c" * 10)
+    thread.join(5)
+
+    assert not thread.is_alive()
+    assert checked_texts == [
+        "a" * 15 + "forbid",
+        # the appended text is checked with an overlap of the longest keyword
+        "a" * 3 + "forbid" + "den" + "c" * 10,
+    ]
+    assert output_moderation.get_final_output() == "outputs flagged"
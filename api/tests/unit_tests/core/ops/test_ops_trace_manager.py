@@ -0,0 +1,144 @@
+import json
+import logging
+import queue
+from unittest.mock import MagicMock
+
+import pytest
+from flask import Flask
+
+from core.helper.lru_cache import TTLCache
+from core.ops.base_trace_instance import BaseTraceInstance
+from core.ops.entities.trace_entity import TraceTaskName
+from core.ops.ops_trace_manager import OpsTraceManager, TraceQueueManager, TraceTask
+from tasks.ops_trace_task import process_trace_batch_tasks
+
+
+@pytest.fixture
+def mock_redis(mocker):
+    versions: dict[str, int] = {}
+    redis = MagicMock()
+    redis.get.side_effect = lambda key: str(versions[key]).encode() if key in versions else None
+    redis.incr.side_effect = lambda key: versions.__setitem__(key, versions.get(key, 0) + 1)
+    mocker.patch("core.ops.ops_trace_manager.redis_client", new=redis)
+    mocker.patch.object(OpsTraceManager, "_trace_instance_cache", TTLCache(10))
+    return redis
+
+
+def test_ops_trace_instance_is_cached_until_invalidated(mocker, mock_redis):
+    create_ops_trace_instance = mocker.patch.object(
+        OpsTraceManager, "_create_ops_trace_instance", side_effect=lambda app_id: MagicMock()
+    )
+
+    trace_instance = OpsTraceManager.get_ops_trace_instance("app_id")
+    assert OpsTraceManager.get_ops_trace_instance("app_id") is trace_instance
+    assert create_ops_trace_instance.call_count == 1
+
+    # another process changed the tracing config of the app
+    mock_redis.incr("tracing_config_version:app_id:app_id")
+    new_trace_instance = OpsTraceManager.get_ops_trace_instance("app_id")
+    assert new_trace_instance is not trace_instance
+    assert OpsTraceManager.get_ops_trace_instance("app_id") is new_trace_instance
+
+    OpsTraceManager.invalidate_ops_trace_instance("app_id")
+    assert OpsTraceManager.get_ops_trace_instance("app_id") is not new_trace_instance
+    assert create_ops_trace_instance.call_count == 3
+
+
+def test_apps_without_tracing_are_cached(mocker, mock_redis):
+    create_ops_trace_instance = mocker.patch.object(OpsTraceManager, "_create_ops_trace_instance", return_value=None)
+
+    assert OpsTraceManager.get_ops_trace_instance("app_id") is None
+    assert OpsTraceManager.get_ops_trace_instance("app_id") is None
+    assert OpsTraceManager.get_ops_trace_instance(None) is None
+    create_ops_trace_instance.assert_called_once_with("app_id")
+
+
+@pytest.fixture
+def trace_queue_manager(mocker):
+    mocker.patch.multiple(
+        TraceQueueManager,
+        _enqueued=0,
+        _dropped=0,
+        _reported_dropped=0,
+        _failed=0,
+        _shipped=0,
+        _batches=0,
+        _total_latency=0.0,
+        _max_latency=0.0,
+    )
+    mocker.patch("core.ops.ops_trace_manager.trace_manager_queue", queue.Queue(maxsize=3))
+    mocker.patch("core.ops.ops_trace_manager.trace_manager_batch_size", 2)
+    mocker.patch.object(TraceQueueManager, "start_timer")
+    trace_queue_manager = TraceQueueManager.__new__(TraceQueueManager)
+    trace_queue_manager.app_id = "app_id"
+    trace_queue_manager.trace_instance = MagicMock()
+    trace_queue_manager.flask_app = Flask(__name__)
+    return trace_queue_manager
+
+
+def _trace_task(trace_info: dict) -> TraceTask:
+    trace_task = TraceTask(TraceTaskName.MESSAGE_TRACE)
+    trace_task.execute = MagicMock(return_value=MagicMock(model_dump=MagicMock(return_value=trace_info)))
+    return trace_task
+
+
+def test_trace_tasks_are_shipped_in_batches(mocker, caplog, trace_queue_manager):
+    storage = mocker.patch("core.ops.ops_trace_manager.storage")
+    process_trace_batch_tasks = mocker.patch("core.ops.ops_trace_manager.process_trace_batch_tasks")
+
+    failing_trace_task = _trace_task({})
+    failing_trace_task.execute.side_effect = ValueError("message not found")
+    for trace_task in [_trace_task({"index": 0}), failing_trace_task, _trace_task({"index": 2}), _trace_task({})]:
+        trace_queue_manager.add_trace_task(trace_task)
+    assert TraceQueueManager.metrics()["queue_depth"] == 3
+    assert TraceQueueManager.metrics()["dropped"] == 1
+
+    with caplog.at_level(logging.INFO):
+        trace_queue_manager.run()
+
+    # the queue holds two batches, both are shipped in one run
+    assert storage.save.call_count == process_trace_batch_tasks.delay.call_count == 2
+    batches = [json.loads(call.args[1]) for call in storage.save.call_args_list]
+    assert [[task_data["trace_info"] for task_data in batch] for batch in batches] == [[{"index": 0}], [{"index": 2}]]
+    assert all(task_data["app_id"] == "app_id" for batch in batches for task_data in batch)
+
+    metrics = TraceQueueManager.metrics()
+    assert metrics["queue_depth"] == 0
+    assert (metrics["enqueued"], metrics["dropped"], metrics["failed"]) == (3, 1, 1)
+    assert (metrics["shipped"], metrics["batches"]) == (2, 2)
+    assert metrics["max_latency"] >= metrics["avg_latency"] > 0
+    # each run logs the metrics of the queue
+    assert "Trace queue metrics: {'queue_depth': 0, 'enqueued': 3, 'dropped': 1" in caplog.text
+
+
+def test_trace_batch_is_traced_per_app(mocker):
+    batch = [
+        {"app_id": "app_1", "trace_info_type": "UnknownTraceInfo", "trace_info": {"index": 0}},
+        {"app_id": "app_2", "trace_info_type": "UnknownTraceInfo", "trace_info": {"index": 1}},
+        {"app_id": "app_1", "trace_info_type": "UnknownTraceInfo", "trace_info": {"index": 2}},
+    ]
+    storage = mocker.patch("tasks.ops_trace_task.storage")
+    storage.load.return_value = json.dumps(batch).encode()
+    redis = MagicMock()
+    mocker.patch("tasks.ops_trace_task.redis_client", new=redis)
+    mocker.patch("tasks.ops_trace_task.current_app", new=MagicMock())
+    trace_instances = {"app_1": MagicMock(), "app_2": MagicMock()}
+    trace_instances["app_1"].trace_batch.return_value = 0
+    trace_instances["app_2"].trace_batch.return_value = 1
+    mocker.patch.object(OpsTraceManager, "get_ops_trace_instance", side_effect=trace_instances.get)
+
+    process_trace_batch_tasks({"file_id": "file_id"})
+
+    trace_instances["app_1"].trace_batch.assert_called_once_with([{"index": 0}, {"index": 2}])
+    trace_instances["app_2"].trace_batch.assert_called_once_with([{"index": 1}])
+    redis.incrby.assert_called_once_with("FAILED_OPS_TRACE_app_2", 1)
+    storage.delete.assert_called_once_with("ops_trace/batch/file_id.json")
+
+
+def test_trace_batch_flushes_once():
+    trace_instance = MagicMock(spec=BaseTraceInstance)
+    trace_instance.trace.side_effect = [None, ValueError("invalid trace"), None]
+
+    assert BaseTraceInstance.trace_batch(trace_instance, [MagicMock(), MagicMock(), MagicMock()]) == 1
+    assert trace_instance.trace.call_count == 3
+    trace_instance.flush.assert_called_once()
@@ -0,0 +1,102 @@
+import uuid
+from unittest.mock import MagicMock
+
+import pytest
+from click.testing import CliRunner
+from flask import Flask
+from sqlalchemy import event
+
+from core.rag.datasource.keyword.jieba import jieba_inverted_index
+from core.rag.datasource.keyword.jieba.jieba_inverted_index import JiebaInvertedIndex
+from core.rag.models.document import Document
+from extensions.ext_database import db
+from models.dataset import Dataset, DatasetKeywordPosting
+from models.types import StringUUID
+
+
+@pytest.fixture
+def keyword_store(mocker):
+    # postings round-trip through an in-memory database, segments are not part of the posting store
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    db.init_app(app)
+    # ids are kept as strings like with postgres
+    mocker.patch.object(StringUUID, "process_bind_param", lambda self, value, dialect: value)
+    with app.app_context():
+        event.listen(
+            db.engine,
+            "connect",
+            lambda connection, _: connection.create_function("uuid_generate_v4", 0, lambda: str(uuid.uuid4())),
+        )
+        DatasetKeywordPosting.__table__.create(db.engine)
+
+        keyword_table_handler = mocker.patch.object(jieba_inverted_index, "JiebaKeywordTableHandler")
+        keyword_table_handler.return_value.extract_keywords.side_effect = lambda text, *args: set(text.split())
+        mocker.patch.object(JiebaInvertedIndex, "_update_segments_keywords")
+        mocker.patch.object(
+            JiebaInvertedIndex,
+            "_get_documents_by_index_node_ids",
+            side_effect=lambda ids: [Document(page_content="", metadata={"doc_id": id}) for id in ids],
+        )
+        yield JiebaInvertedIndex(Dataset(id=str(uuid.uuid4()), tenant_id=str(uuid.uuid4())))
+        db.session.remove()
+
+
+def _search(keyword_store: JiebaInvertedIndex, query: str, top_k: int = 4) -> list[str]:
+    return [document.metadata["doc_id"] for document in keyword_store.search(query, top_k=top_k)]
+
+
+def test_postings_round_trip(keyword_store):
+    keyword_store.add_texts(
+        [
+            Document(page_content="", metadata={"doc_id": "node_1"}),
+            Document(page_content="", metadata={"doc_id": "node_2"}),
+            Document(page_content="", metadata={"doc_id": "node_3"}),
+        ],
+        keywords_list=[["apple", "banana"], ["apple"], ["cherry", "a" * 256]],
+    )
+    # postings added again are ignored
+    keyword_store.create_segment_keywords("node_2", ["apple", "cherry"])
+
+    assert keyword_store.text_exists("node_1")
+    assert not keyword_store.text_exists("node_4")
+    # nodes matching more query keywords come first
+    assert _search(keyword_store, "apple banana cherry") == ["node_1", "node_2", "node_3"]
+    assert _search(keyword_store, "apple cherry", top_k=1) == ["node_2"]
+    assert _search(keyword_store, "a" * 256) == []
+
+    keyword_store.delete_by_ids(["node_1"])
+    assert not keyword_store.text_exists("node_1")
+    assert _search(keyword_store, "banana") == []
+    assert _search(keyword_store, "apple") == ["node_2"]
+
+    keyword_store.delete()
+    assert db.session.query(DatasetKeywordPosting).count() == 0
+
+
+def test_migrate_keyword_table(mocker, keyword_store):
+    import commands
+
+    dataset = keyword_store.dataset
+    keyword_table = MagicMock(
+        id="keyword_table_id",
+        dataset_id=dataset.id,
+        data_source_type="file",
+        keyword_table_dict={"__data__": {"table": {"apple": {"node_1", "node_2"}, "banana": {"node_1"}}}},
+    )
+    dataset_keyword_table = mocker.patch.object(commands, "DatasetKeywordTable")
+    dataset_keyword_table.id.__gt__ = MagicMock(return_value=True)
+    keyword_tables_query = dataset_keyword_table.query.order_by.return_value
+    keyword_tables_query.limit.return_value.all.return_value = [keyword_table]
+    keyword_tables_query.filter.return_value.limit.return_value.all.return_value = []
+    commands_db = mocker.patch.object(commands, "db")
+    commands_db.session.query.return_value.filter.return_value.first.return_value = dataset
+    storage = mocker.patch.object(commands, "storage")
+
+    result = CliRunner().invoke(commands.migrate_keyword_table, ["--delete-source"])
+
+    assert result.exit_code == 0, result.output
+    assert "Migrated 1 keyword tables" in result.output
+    assert _search(keyword_store, "apple banana") == ["node_1", "node_2"]
+    commands_db.session.delete.assert_called_once_with(keyword_table)
+    storage.delete.assert_called_once_with(f"keyword_files/{dataset.tenant_id}/{dataset.id}.txt")
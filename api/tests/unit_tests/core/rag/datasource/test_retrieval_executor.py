@@ -0,0 +1,87 @@
+import logging
+import threading
+import time
+
+import pytest
+
+from configs import dify_config
+from core.rag.datasource.retrieval_executor import RetrievalExecutor
+
+
+@pytest.fixture
+def retrieval_timeout(mocker):
+    mocker.patch.object(dify_config, "RETRIEVAL_TIMEOUT", 1)
+
+
+def test_map_returns_results_in_order():
+    executor = RetrievalExecutor("test", 2)
+
+    def search(i: int) -> int:
+        time.sleep(0.01 * (3 - i))
+        return i
+
+    assert executor.map([lambda i=i: search(i) for i in range(3)]) == [0, 1, 2]
+    assert executor.metrics()["finished"] == 3
+    assert executor.metrics()["queue_depth"] == 0
+
+
+def test_map_skips_branches_slower_than_deadline(retrieval_timeout, caplog):
+    executor = RetrievalExecutor("test", 1)
+    release = threading.Event()
+
+    def slow_search() -> str:
+        release.wait(5)
+        return "slow"
+
+    started_at = time.monotonic()
+    # the second branch is still queued behind the slow one at the deadline and is cancelled
+    assert executor.map([slow_search, lambda: "queued"]) == [None, None]
+    assert time.monotonic() - started_at < 3
+    assert executor.metrics()["cancelled"] == 1
+    assert "2 of 2 test retrieval branches timed out, 1 of them keep running" in caplog.text
+    release.set()
+
+
+def test_nested_map_shares_deadline_of_request(retrieval_timeout):
+    outer = RetrievalExecutor("outer", 2)
+    inner = RetrievalExecutor("inner", 2)
+    release = threading.Event()
+
+    def search_dataset() -> list:
+        return inner.map([lambda: release.wait(5) and "slow", lambda: "fast"])
+
+    started_at = time.monotonic()
+    assert outer.map([search_dataset]) == [[None, "fast"]]
+    # the inner branches are bound by the deadline of the outer retrieval
+    assert time.monotonic() - started_at < 3
+    release.set()
+
+
+def test_map_logs_branch_exception_and_keeps_other_results(caplog):
+    executor = RetrievalExecutor("test", 2)
+
+    def failing_search():
+        raise ValueError("search failed")
+
+    assert executor.map([failing_search, lambda: "ok"]) == [None, "ok"]
+    assert "test retrieval branch failed" in caplog.text
+    assert "search failed" in caplog.text
+
+
+def test_map_stops_waiting_once_results_are_enough(caplog):
+    executor = RetrievalExecutor("test", 1)
+    release = threading.Event()
+
+    def slow_search() -> str:
+        release.wait(5)
+        return "slow"
+
+    started_at = time.monotonic()
+    # the slow branch is queued behind the first one and is cancelled once its result is enough
+    with caplog.at_level(logging.INFO):
+        results = executor.map([lambda: "fast", slow_search], is_enough=lambda results: "fast" in results)
+    assert results == ["fast", None]
+    assert time.monotonic() - started_at < 3
+    assert executor.metrics()["cancelled"] == 1
+    assert "Enough results arrived, 1 of 2 test retrieval branches skipped" in caplog.text
+    release.set()
@@ -0,0 +1,101 @@
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from core.rag.datasource.retrieval_service import RetrievalService
+from core.rag.index_processor.constant.index_type import IndexType
+from core.rag.models.document import Document
+from models.dataset import ChildChunk, DocumentSegment
+
+
+def _query_result(rows: list) -> MagicMock:
+    query = MagicMock()
+    query.filter.return_value.all.return_value = rows
+    query.join.return_value.filter.return_value.all.return_value = rows
+    return query
+
+
+@pytest.fixture
+def mock_db(mocker):
+    db = MagicMock()
+    mocker.patch("core.rag.datasource.retrieval_service.db", new=db)
+    return db
+
+
+def _hit(document_id: str, doc_id: str, score: float) -> Document:
+    return Document(page_content="", metadata={"document_id": document_id, "doc_id": doc_id, "score": score})
+
+
+def test_format_retrieval_documents_loads_all_hits_in_batches(mock_db):
+    text_segment = DocumentSegment(id="segment-1", dataset_id="dataset-1", index_node_id="node-1")
+    parent_segment = DocumentSegment(id="segment-2", dataset_id="dataset-2", index_node_id="node-2")
+    child_chunks = [
+        ChildChunk(id=f"child-{i}", content=f"child {i}", position=i, segment_id="segment-2", index_node_id=f"c-{i}")
+        for i in range(2)
+    ]
+    mock_db.session.query.side_effect = [
+        _query_result(
+            [
+                SimpleNamespace(id="document-1", dataset_id="dataset-1", doc_form=IndexType.PARAGRAPH_INDEX),
+                SimpleNamespace(id="document-2", dataset_id="dataset-2", doc_form=IndexType.PARENT_CHILD_INDEX),
+            ]
+        ),
+        _query_result([text_segment]),
+        _query_result([(child_chunk, parent_segment) for child_chunk in child_chunks]),
+    ]
+
+    records = RetrievalService.format_retrieval_documents(
+        [
+            _hit("document-2", "c-0", 0.5),
+            _hit("document-1", "node-1", 0.7),
+            _hit("document-2", "c-1", 0.9),
+            _hit("document-1", "missing-node", 0.8),
+            _hit("missing-document", "node-3", 0.6),
+        ]
+    )
+
+    assert mock_db.session.query.call_count == 3
+    assert [record.segment for record in records] == [parent_segment, text_segment]
+    assert records[0].score == 0.9
+    assert [child_chunk.id for child_chunk in records[0].child_chunks] == ["child-0", "child-1"]
+    assert records[1].score == 0.7
+    assert records[1].child_chunks is None
+
+
+def test_format_retrieval_documents_skips_queries_without_hits(mock_db):
+    assert RetrievalService.format_retrieval_documents([]) == []
+    mock_db.session.query.assert_not_called()
+
+
+@pytest.fixture
+def mock_dataset(mock_db, mocker):
+    mocker.patch("core.rag.datasource.retrieval_service.current_app", new=MagicMock())
+    dataset = MagicMock(id="dataset_id", available_document_count=1, available_segment_count=1)
+    mock_db.session.query.return_value.filter.return_value.first.return_value = dataset
+    return dataset
+
+
+def test_retrieve_fails_fast_with_the_error_of_a_failed_search(mocker, mock_dataset):
+    release = threading.Event()
+    mocker.patch.object(RetrievalService, "embedding_search", side_effect=RuntimeError("vector store down"))
+    mocker.patch.object(RetrievalService, "full_text_index_search", side_effect=lambda **kwargs: release.wait(5))
+
+    started_at = time.monotonic()
+    with pytest.raises(ValueError, match="vector store down"):
+        RetrievalService.retrieve("hybrid_search", "dataset_id", "query", top_k=2)
+    # the slower search is not waited for
+    assert time.monotonic() - started_at < 3
+    release.set()
+
+
+def test_retrieve_reports_timeout_when_no_search_finished(mocker, mock_dataset):
+    mocker.patch(
+        "core.rag.datasource.retrieval_service.RetrievalExecutor.get",
+        return_value=MagicMock(map=MagicMock(return_value=[None])),
+    )
+
+    with pytest.raises(ValueError, match="Retrieval timed out"):
+        RetrievalService.retrieve("semantic_search", "dataset_id", "query", top_k=2)
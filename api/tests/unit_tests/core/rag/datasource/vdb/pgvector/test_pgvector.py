@@ -0,0 +1,137 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from core.rag.datasource.vdb.pgvector.pgvector import PGVector, PGVectorConfig
+from core.rag.datasource.vdb.vector_client_registry import VectorClientRegistry
+
+
+@pytest.fixture
+def mock_cursor(mocker):
+    pool = MagicMock()
+    cursor = pool.getconn.return_value.cursor.return_value
+    cursor.__iter__.return_value = iter([({"doc_id": "node-1"}, "text", 0.25)])
+    mocker.patch.object(VectorClientRegistry, "get_or_create", return_value=pool)
+    return cursor
+
+
+@pytest.fixture
+def mock_redis(mocker):
+    redis = MagicMock()
+    mocker.patch("core.rag.datasource.vdb.pgvector.pgvector.redis_client", new=redis)
+    return redis
+
+
+def _create_vector(hnsw_ef_search: int = 0) -> PGVector:
+    config = PGVectorConfig(
+        host="localhost",
+        port=5433,
+        user="postgres",
+        password="difyai123456",
+        database="dify",
+        min_connection=1,
+        max_connection=5,
+        hnsw_ef_search=hnsw_ef_search,
+    )
+    return PGVector("Vector_index_test_Node", config)
+
+
+def test_search_by_vector_pushes_down_threshold_and_filter(mock_cursor):
+    documents = _create_vector(hnsw_ef_search=100).search_by_vector(
+        [0.1, 0.2], top_k=3, score_threshold=0.5, filter={"document_id": ["document-1"]}
+    )
+
+    set_call, search_call = mock_cursor.execute.call_args_list
+    assert set_call.args == ("SET LOCAL hnsw.ef_search = %s", (100,))
+    sql, params = search_call.args
+    assert "meta->>%(filter_key_0)s = ANY(%(filter_values_0)s)" in sql
+    assert "embedding <=> %(query_vector)s::vector < %(max_distance)s" in sql
+    assert params["filter_key_0"] == "document_id"
+    assert params["filter_values_0"] == ["document-1"]
+    assert params["query_vector"] == "[0.1,0.2]"
+    assert params["max_distance"] == 0.5
+    assert params["top_k"] == 3
+    assert documents[0].metadata["score"] == 0.75
+
+
+def test_search_by_vector_ignores_group_filter_of_annotations(mock_cursor):
+    mock_cursor.__iter__.return_value = iter(
+        [({"annotation_id": "annotation-1", "app_id": "app-1", "doc_id": "node-1"}, "question", 0.1)]
+    )
+
+    documents = _create_vector().search_by_vector(
+        [0.1, 0.2], top_k=1, score_threshold=0.8, filter={"group_id": ["app-1"]}
+    )
+
+    sql, params = mock_cursor.execute.call_args.args
+    assert "meta->>" not in sql
+    assert not any(key.startswith("filter_") for key in params)
+    assert len(documents) == 1
+    assert documents[0].metadata["annotation_id"] == "annotation-1"
+    assert documents[0].metadata["score"] == 0.9
+
+
+@pytest.mark.parametrize(
+    ("cached", "expected_tsvector"),
+    [
+        (b"english", "text_tsv @@ plainto_tsquery(%(text_search_config)s::regconfig, %(query)s)"),
+        (b"", "to_tsvector(coalesce(text, '')) @@ plainto_tsquery(%(query)s)"),
+    ],
+)
+def test_search_by_full_text_uses_stored_tsvector_when_available(mock_cursor, mock_redis, cached, expected_tsvector):
+    mock_redis.get.return_value = cached
+
+    _create_vector().search_by_full_text("hello world", top_k=2)
+
+    sql, params = mock_cursor.execute.call_args.args
+    assert expected_tsvector in sql
+    assert params["query"] == "'hello world'"
+    assert params["top_k"] == 2
+
+
+def test_collections_are_created_with_text_search_config(mock_cursor, mock_redis):
+    mock_redis.get.return_value = None
+    vector = PGVector(
+        "Vector_index_test_Node",
+        PGVectorConfig(
+            host="localhost",
+            port=5433,
+            user="postgres",
+            password="difyai123456",
+            database="dify",
+            min_connection=1,
+            max_connection=5,
+            text_search_config="simple",
+        ),
+    )
+
+    mock_cursor.fetchone.return_value = None
+    vector._create_collection(3)
+
+    executed_sql = [call.args[0] for call in mock_cursor.execute.call_args_list]
+    assert any("to_tsvector('simple', coalesce(text, ''))" in sql for sql in executed_sql)
+
+
+def test_search_by_full_text_uses_text_search_config_of_stored_tsvector(mock_cursor, mock_redis):
+    mock_redis.get.return_value = None
+    # the collection was created while PGVECTOR_TEXT_SEARCH_CONFIG was "simple"
+    mock_cursor.fetchone.return_value = ("to_tsvector('simple'::regconfig, COALESCE(text, ''::text))",)
+
+    _create_vector().search_by_full_text("hello", top_k=2)
+
+    assert mock_cursor.execute.call_args.args[1]["text_search_config"] == "simple"
+    mock_redis.set.assert_called_once_with("vector_text_tsv_config_Vector_index_test_Node", "simple", ex=3600)
+
+
+def test_config_rejects_invalid_text_search_config():
+    with pytest.raises(ValueError, match="PGVECTOR_TEXT_SEARCH_CONFIG"):
+        PGVectorConfig(
+            host="localhost",
+            port=5433,
+            user="postgres",
+            password="difyai123456",
+            database="dify",
+            min_connection=1,
+            max_connection=5,
+            text_search_config="english'); DROP TABLE x; --",
+        )
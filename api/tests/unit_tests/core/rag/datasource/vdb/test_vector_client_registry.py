@@ -0,0 +1,108 @@
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+from pydantic import BaseModel
+
+from core.rag.datasource.vdb.vector_client_registry import BlockingConnectionPool, VectorClientRegistry
+
+
+class _Config(BaseModel):
+    host: str
+    port: int
+
+
+@pytest.fixture(autouse=True)
+def clear_registry():
+    VectorClientRegistry.clear()
+    yield
+    VectorClientRegistry.clear()
+
+
+def test_clients_are_shared_per_config():
+    factory = MagicMock(side_effect=lambda: object())
+
+    client = VectorClientRegistry.get_or_create("pgvector", _Config(host="localhost", port=5432), factory)
+
+    assert VectorClientRegistry.get_or_create("pgvector", _Config(host="localhost", port=5432), factory) is client
+    assert VectorClientRegistry.get_or_create("pgvector", _Config(host="localhost", port=5433), factory) is not client
+    assert VectorClientRegistry.get_or_create("qdrant", _Config(host="localhost", port=5432), factory) is not client
+    assert factory.call_count == 3
+
+
+def test_clients_are_recreated_after_fork(mocker):
+    config = _Config(host="localhost", port=5432)
+    client = VectorClientRegistry.get_or_create("pgvector", config, object)
+
+    mocker.patch("core.rag.datasource.vdb.vector_client_registry.os.getpid", return_value=-1)
+
+    assert VectorClientRegistry.get_or_create("pgvector", config, object) is not client
+    assert client in VectorClientRegistry._inherited_clients
+
+
+def test_slow_client_creation_only_blocks_its_config():
+    creating = threading.Event()
+    release = threading.Event()
+
+    def create_slow_client():
+        creating.set()
+        release.wait(5)
+        return object()
+
+    slow_factory = MagicMock(side_effect=create_slow_client)
+    slow_config = _Config(host="slow", port=5432)
+
+    clients = []
+    creators = [
+        threading.Thread(
+            target=lambda: clients.append(VectorClientRegistry.get_or_create("pgvector", slow_config, slow_factory))
+        )
+        for _ in range(2)
+    ]
+    for creator in creators:
+        creator.start()
+    assert creating.wait(1)
+
+    # another config is served while the slow client is being created
+    assert VectorClientRegistry.get_or_create("pgvector", _Config(host="fast", port=5432), object) is not None
+
+    release.set()
+    for creator in creators:
+        creator.join(timeout=5)
+    assert len(clients) == 2
+    assert clients[0] is clients[1]
+    slow_factory.assert_called_once()
+
+
+@pytest.fixture
+def mock_connect(mocker):
+    return mocker.patch("psycopg2.pool.psycopg2.connect", side_effect=lambda *args, **kwargs: MagicMock(closed=0))
+
+
+def test_blocking_connection_pool_waits_for_free_connection(mock_connect):
+    pool = BlockingConnectionPool(1, 2, host="localhost")
+    conn1 = pool.getconn()
+    conn2 = pool.getconn()
+
+    acquired = []
+    waiter = threading.Thread(target=lambda: acquired.append(pool.getconn()))
+    waiter.start()
+    waiter.join(timeout=0.1)
+    assert waiter.is_alive()
+
+    pool.putconn(conn1)
+    waiter.join(timeout=1)
+    assert acquired == [conn1]
+    pool.putconn(conn2)
+
+
+def test_blocking_connection_pool_replaces_closed_connection(mock_connect):
+    pool = BlockingConnectionPool(1, 1, host="localhost")
+    conn = pool.getconn()
+    conn.closed = 1
+    pool.putconn(conn)
+
+    new_conn = pool.getconn()
+
+    assert new_conn is not conn
+    conn.close.assert_called_once()
@@ -0,0 +1,93 @@
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+
+from core.helper.lru_cache import TTLCache
+from core.model_runtime.entities.model_entities import ModelPropertyKey
+from core.rag.embedding.cached_embedding import CacheEmbedding
+from libs import helper
+
+
+def _mock_model_instance(embeddings: list[list[float]]) -> MagicMock:
+    model_instance = MagicMock()
+    model_instance.model = "text-embedding"
+    model_instance.provider = "openai"
+    model_instance.model_type_instance.get_model_schema.return_value = None
+    model_instance.invoke_text_embedding.return_value = MagicMock(embeddings=embeddings)
+    return model_instance
+
+
+@patch.object(CacheEmbedding, "_save_cached_embeddings")
+@patch.object(CacheEmbedding, "_get_cached_embeddings")
+def test_embed_documents_uses_cache_and_deduplicates(mock_get_cached, mock_save_cached):
+    cached_hash = helper.generate_text_hash("cached")
+    mock_get_cached.return_value = {cached_hash: [1.0, 0.0]}
+    model_instance = _mock_model_instance([[0.0, 2.0]])
+
+    result = CacheEmbedding(model_instance).embed_documents(["cached", "new", "new"])
+
+    assert result == [[1.0, 0.0], [0.0, 1.0], [0.0, 1.0]]
+    mock_get_cached.assert_called_once_with({cached_hash, helper.generate_text_hash("new")})
+    model_instance.invoke_text_embedding.assert_called_once()
+    assert model_instance.invoke_text_embedding.call_args.kwargs["texts"] == ["new"]
+    mock_save_cached.assert_called_once_with({helper.generate_text_hash("new"): [0.0, 1.0]})
+
+
+@patch.object(CacheEmbedding, "_save_cached_embeddings")
+@patch.object(CacheEmbedding, "_get_cached_embeddings", return_value={})
+def test_embed_documents_skips_nan_embeddings(mock_get_cached, mock_save_cached):
+    model_instance = _mock_model_instance([[0.0, 0.0]])
+    model_instance.model_type_instance.get_model_schema.return_value = MagicMock(
+        model_properties={ModelPropertyKey.MAX_CHUNKS: 2}
+    )
+    model_instance.invoke_text_embedding.return_value = MagicMock(embeddings=[[0.0, 0.0], [3.0, 0.0]])
+
+    result = CacheEmbedding(model_instance).embed_documents(["nan", "ok"])
+
+    assert result == [None, [1.0, 0.0]]
+    mock_save_cached.assert_called_once_with({helper.generate_text_hash("ok"): [1.0, 0.0]})
+
+
+def test_embed_query_uses_redis_then_local_cache(mocker):
+    mock_redis = mocker.patch("core.rag.embedding.cached_embedding.redis_client", new=MagicMock())
+    model_instance = _mock_model_instance([])
+    model_instance.model = "query-cache-model"
+    pipe = mock_redis.pipeline.return_value.__enter__.return_value
+    pipe.execute.return_value = [np.array([0.5, 0.25], dtype=np.float32).tobytes(), True]
+
+    embedding = CacheEmbedding(model_instance)
+    assert embedding.embed_query("hello") == [0.5, 0.25]
+    assert embedding.embed_query("hello") == [0.5, 0.25]
+
+    pipe.execute.assert_called_once()
+    model_instance.invoke_text_embedding.assert_not_called()
+
+
+def test_embed_query_stores_float32_bytes(mocker):
+    mock_redis = mocker.patch("core.rag.embedding.cached_embedding.redis_client", new=MagicMock())
+    model_instance = _mock_model_instance([[3.0, 4.0]])
+    model_instance.model = "query-store-model"
+    mock_redis.pipeline.return_value.__enter__.return_value.execute.return_value = [None, False]
+
+    assert CacheEmbedding(model_instance).embed_query("hello") == [0.6, 0.8]
+
+    stored = mock_redis.setex.call_args.args[2]
+    assert np.frombuffer(stored, dtype=np.float32).tolist() == pytest.approx([0.6, 0.8])
+
+
+def test_embed_query_local_cache_expires(mocker):
+    mock_redis = mocker.patch("core.rag.embedding.cached_embedding.redis_client", new=MagicMock())
+    mocker.patch("core.rag.embedding.cached_embedding._local_query_embedding_cache", TTLCache(10, 600))
+    mock_monotonic = mocker.patch("core.helper.lru_cache.time.monotonic", return_value=1000.0)
+    model_instance = _mock_model_instance([])
+    model_instance.model = "query-expiry-model"
+    pipe = mock_redis.pipeline.return_value.__enter__.return_value
+    pipe.execute.return_value = [np.array([0.5, 0.25], dtype=np.float32).tobytes(), True]
+
+    embedding = CacheEmbedding(model_instance)
+    assert embedding.embed_query("hello") == [0.5, 0.25]
+    mock_monotonic.return_value = 1601.0
+    assert embedding.embed_query("hello") == [0.5, 0.25]
+
+    assert pipe.execute.call_count == 2
@@ -0,0 +1,90 @@
+import json
+from unittest.mock import MagicMock
+
+import pytest
+
+from configs import dify_config
+from core.rag.models.document import Document
+from core.rag.retrieval.retrieval_statistics import RetrievalStatistics
+
+
+@pytest.fixture
+def mock_redis(mocker):
+    redis = MagicMock()
+    mocker.patch("core.rag.retrieval.retrieval_statistics.redis_client", new=redis)
+    return redis
+
+
+@pytest.fixture
+def mock_db(mocker):
+    db = MagicMock()
+    mocker.patch("core.rag.retrieval.retrieval_statistics.db", new=db)
+    return db
+
+
+@pytest.fixture
+def buffer_enabled(mocker):
+    mocker.patch.object(dify_config, "RETRIEVAL_STATISTICS_BUFFER_ENABLED", True)
+
+
+def _hit(dataset_id: str, doc_id: str) -> Document:
+    return Document(page_content="", metadata={"dataset_id": dataset_id, "doc_id": doc_id})
+
+
+def test_buffered_statistics_do_not_touch_database(mock_redis, mock_db, buffer_enabled):
+    RetrievalStatistics.record_segment_hits([_hit("dataset-1", "node-1"), _hit("dataset-1", "node-1")])
+    RetrievalStatistics.record_queries(
+        query="query",
+        dataset_ids=["dataset-1", "dataset-2"],
+        source="app",
+        source_app_id="app-1",
+        created_by_role="end_user",
+        created_by="user-1",
+    )
+
+    mock_redis.pipeline.return_value.hincrby.assert_called_once_with(
+        RetrievalStatistics.HIT_COUNTS_KEY, "dataset-1:node-1", 2
+    )
+    key, *items = mock_redis.rpush.call_args.args
+    assert key == RetrievalStatistics.DATASET_QUERIES_KEY
+    assert [json.loads(item)["dataset_id"] for item in items] == ["dataset-1", "dataset-2"]
+    mock_db.session.execute.assert_not_called()
+
+
+def test_unbuffered_hits_are_aggregated_into_one_commit(mock_redis, mock_db):
+    RetrievalStatistics.record_segment_hits(
+        [_hit("dataset-1", "node-1"), _hit("dataset-1", "node-2"), _hit("dataset-1", "node-1")]
+    )
+
+    # node-1 is hit twice and node-2 once, one update statement for each count
+    assert mock_db.session.execute.call_count == 2
+    mock_db.session.commit.assert_called_once()
+    mock_redis.pipeline.assert_not_called()
+
+
+def test_flush_applies_buffered_statistics_in_bulk(mock_redis, mock_db):
+    mock_redis.exists.side_effect = lambda key: key == RetrievalStatistics.HIT_COUNTS_KEY
+    mock_redis.hgetall.return_value = {b"dataset-1:node-1": b"3", b"dataset-1:node-2": b"3", b"dataset-2:node-3": b"1"}
+    query = {
+        "dataset_id": "dataset-1",
+        "content": "query",
+        "source": "app",
+        "source_app_id": "app-1",
+        "created_by_role": "end_user",
+        "created_by": "user-1",
+        "created_at": "2024-12-01T00:00:00",
+    }
+    mock_redis.lrange.side_effect = [[json.dumps(query).encode()] * 2, []]
+
+    RetrievalStatistics.flush()
+
+    mock_redis.rename.assert_called_once_with(
+        RetrievalStatistics.HIT_COUNTS_KEY, RetrievalStatistics.FLUSHING_HIT_COUNTS_KEY
+    )
+    mock_redis.delete.assert_called_once_with(RetrievalStatistics.FLUSHING_HIT_COUNTS_KEY)
+    mock_redis.ltrim.assert_called_once_with(RetrievalStatistics.DATASET_QUERIES_KEY, 2, -1)
+    # two hit count updates and one bulk insert of the queries
+    assert mock_db.session.execute.call_count == 3
+    inserted_rows = mock_db.session.execute.call_args.args[1]
+    assert len(inserted_rows) == 2
+    assert inserted_rows[0]["created_at"].year == 2024
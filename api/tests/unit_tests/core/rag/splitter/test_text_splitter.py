@@ -0,0 +1,30 @@
+from unittest.mock import MagicMock
+
+from core.rag.splitter.fixed_text_splitter import FixedRecursiveCharacterTextSplitter
+
+
+def _word_count_model_instance() -> MagicMock:
+    model_instance = MagicMock()
+    model_instance.model = "text-embedding"
+    model_instance.get_text_embedding_num_tokens.side_effect = lambda texts: sum(len(t.split()) for t in texts)
+    return model_instance
+
+
+def test_token_counts_are_memoized():
+    model_instance = _word_count_model_instance()
+    splitter = FixedRecursiveCharacterTextSplitter.from_encoder(
+        embedding_model_instance=model_instance, chunk_size=4, chunk_overlap=2, fixed_separator="\n\n"
+    )
+    text = "\n\n".join(["a b c d e f g h"] * 3)
+
+    chunks = splitter.split_text(text)
+
+    assert chunks == ["a b c d", "c d e f", "e f g h"] * 3
+    measured = [call.kwargs["texts"][0] for call in model_instance.get_text_embedding_num_tokens.call_args_list]
+    assert len(measured) == len(set(measured))
+
+
+def test_merge_splits_keeps_overlap_with_cached_lengths():
+    splitter = FixedRecursiveCharacterTextSplitter(chunk_size=10, chunk_overlap=4, fixed_separator="")
+
+    assert splitter.split_text("aaa bbb ccc ddd") == ["aaa bbb", "bbb ccc", "ccc ddd"]
@@ -1,3 +1,4 @@
+from core.helper.lru_cache import TTLCache
 from core.workflow.graph_engine.entities.graph import Graph
 from core.workflow.graph_engine.entities.run_condition import RunCondition
 from core.workflow.utils.condition.entities import Condition
@@ -789,3 +790,34 @@ def test_parallels_graph6():
 
     for node_id in ["code1", "code2"]:
         assert graph.node_parallel_mapping[node_id] == child_parallel.id
+
+
+def test_init_cached(mocker):
+    mocker.patch.object(Graph, "_cache", TTLCache(10))
+    graph_config = {
+        "edges": [
+            {"id": "start-source-llm-target", "source": "start", "target": "llm"},
+            {"id": "llm-source-answer-target", "source": "llm", "target": "answer"},
+            {"id": "iteration-start-source-code-target", "source": "iteration-start", "target": "code"},
+        ],
+        "nodes": [
+            {"data": {"type": "start"}, "id": "start"},
+            {"data": {"type": "llm"}, "id": "llm"},
+            {"data": {"type": "answer", "title": "answer", "answer": "1"}, "id": "answer"},
+            {"data": {"type": "iteration-start"}, "id": "iteration-start"},
+            {"data": {"type": "code"}, "id": "code"},
+        ],
+    }
+    init = mocker.spy(Graph, "init")
+
+    graph = Graph.init_cached(graph_config=graph_config, graph_hash="hash")
+    assert graph.graph_hash == "hash"
+    assert Graph.init_cached(graph_config=graph_config, graph_hash="hash") is graph
+    assert init.call_count == 1
+
+    # graphs of another root node or another graph config are initialized separately
+    sub_graph = Graph.init_cached(graph_config=graph_config, graph_hash="hash", root_node_id="iteration-start")
+    assert sub_graph.node_ids == ["iteration-start", "code"]
+    assert Graph.init_cached(graph_config=graph_config, graph_hash="other_hash") is not graph
+    assert Graph.init_cached(graph_config=graph_config, graph_hash=None).graph_hash is None
+    assert init.call_count == 4
@@ -2,7 +2,9 @@ import time
 import uuid
 from unittest.mock import patch
 
+from configs import dify_config
 from core.app.entities.app_invoke_entities import InvokeFrom
+from core.helper.code_executor.code_executor import CodeExecutor
 from core.workflow.entities.node_entities import NodeRunResult
 from core.workflow.entities.variable_pool import VariablePool
 from core.workflow.enums import SystemVariableKey
@@ -858,3 +860,85 @@ def test_iteration_run_error_handle():
             assert item.run_result.status == WorkflowNodeExecutionStatus.SUCCEEDED
             assert item.run_result.outputs == {"output": []}
     assert count == 14
+
+
+def test_iteration_run_code_node_in_batches(mocker):
+    graph_config = {
+        "edges": [
+            {"id": "start-source-iteration-1-target", "source": "start", "target": "iteration-1"},
+            {"id": "iteration-start-source-code-target", "source": "iteration-start", "target": "code"},
+        ],
+        "nodes": [
+            {"data": {"title": "Start", "type": "start", "variables": []}, "id": "start"},
+            {
+                "data": {
+                    "iterator_selector": ["start", "items"],
+                    "output_selector": ["code", "result"],
+                    "output_type": "array[string]",
+                    "start_node_id": "iteration-start",
+                    "title": "iteration",
+                    "type": "iteration",
+                },
+                "id": "iteration-1",
+            },
+            {
+                "data": {"iteration_id": "iteration-1", "title": "iteration-start", "type": "iteration-start"},
+                "id": "iteration-start",
+            },
+            {
+                "data": {
+                    "iteration_id": "iteration-1",
+                    "code": "def main(item: str, index: int) -> dict:\n    return {'result': f'{index}:{item}'}",
+                    "code_language": "python3",
+                    "outputs": {"result": {"type": "string", "children": None}},
+                    "title": "code",
+                    "type": "code",
+                    "variables": [
+                        {"value_selector": ["iteration-1", "item"], "variable": "item"},
+                        {"value_selector": ["iteration-1", "index"], "variable": "index"},
+                    ],
+                },
+                "id": "code",
+            },
+        ],
+    }
+    graph = Graph.init(graph_config=graph_config)
+    init_params = GraphInitParams(
+        tenant_id="1",
+        app_id="1",
+        workflow_type=WorkflowType.WORKFLOW,
+        workflow_id="1",
+        graph_config=graph_config,
+        user_id="1",
+        user_from=UserFrom.ACCOUNT,
+        invoke_from=InvokeFrom.DEBUGGER,
+        call_depth=0,
+    )
+
+    mocker.patch.object(dify_config, "CODE_EXECUTION_BATCH_SIZE", 2)
+    execute_batch = mocker.patch.object(
+        CodeExecutor,
+        "execute_workflow_code_template_batch",
+        side_effect=lambda language, code, inputs_list: [
+            {"result": f"{inputs['index']}:{inputs['item']}"} for inputs in inputs_list
+        ],
+    )
+    execute_code = mocker.patch.object(CodeExecutor, "execute_code", side_effect=AssertionError("not prefetched"))
+
+    for is_parallel in (False, True):
+        pool = VariablePool(system_variables={}, user_inputs={}, environment_variables=[])
+        pool.add(["start", "items"], ["a", "b", "c"])
+        iteration_node = IterationNode(
+            id=str(uuid.uuid4()),
+            graph_init_params=init_params,
+            graph=graph,
+            graph_runtime_state=GraphRuntimeState(variable_pool=pool, start_at=time.perf_counter()),
+            config={"data": {**graph_config["nodes"][1]["data"], "is_parallel": is_parallel}, "id": "iteration-1"},
+        )
+
+        events = list(iteration_node._run())
+        assert isinstance(events[-1], RunCompletedEvent)
+        assert events[-1].run_result.outputs == {"output": ["0:a", "1:b", "2:c"]}
+
+    assert execute_batch.call_count == 4
+    execute_code.assert_not_called()
@@ -44,3 +44,30 @@ def test_use_long_selector(pool):
     result = pool.get(("node_1", "part_1", "part_2"))
     assert result is not None
     assert result.value == "test_value"
+
+
+def test_overlay_reads_through_and_isolates_writes(pool):
+    pool.add(("node_1", "shared"), StringSegment(value="parent"))
+    pool.add(("node_2", "removed"), StringSegment(value="parent"))
+
+    overlay = pool.create_overlay()
+    assert overlay.get(("node_1", "shared")).value == "parent"
+
+    overlay.add(("node_1", "shared"), StringSegment(value="overlay"))
+    overlay.add(("node_3", "local"), StringSegment(value="overlay"))
+    overlay.remove(("node_2",))
+
+    assert overlay.get(("node_1", "shared")).value == "overlay"
+    assert overlay.get(("node_3", "local")).value == "overlay"
+    assert overlay.get(("node_2", "removed")) is None
+
+    assert pool.get(("node_1", "shared")).value == "parent"
+    assert pool.get(("node_2", "removed")).value == "parent"
+    assert pool.get(("node_3", "local")) is None
+
+    overlay.add(("node_2", "removed"), StringSegment(value="again"))
+    assert overlay.get(("node_2", "removed")).value == "again"
+
+    overlay.remove(("node_1", "shared"))
+    assert overlay.get(("node_1", "shared")) is None
+    assert pool.get(("node_1", "shared")).value == "parent"
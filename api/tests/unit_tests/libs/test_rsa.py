@@ -1,7 +1,11 @@
+from unittest.mock import MagicMock
+
+import pytest
 import rsa as pyrsa
 from Crypto.PublicKey import RSA
 
-from libs import gmpy2_pkcs10aep_cipher
+from core.helper.lru_cache import TTLCache
+from libs import gmpy2_pkcs10aep_cipher, rsa
 
 
 def test_gmpy2_pkcs10aep_cipher() -> None:
@@ -27,3 +31,84 @@ def test_gmpy2_pkcs10aep_cipher() -> None:
     encrypted_by_private_key = private_cipher_rsa.encrypt(message=raw_text_bytes)
     decrypted_by_private_key = private_cipher_rsa.decrypt(encrypted_by_private_key)
     assert decrypted_by_private_key == raw_text_bytes
+
+
+@pytest.fixture
+def private_keys(mocker):
+    private_keys: dict[str, bytes] = {}
+    storage = mocker.patch.object(rsa, "storage")
+    storage.save.side_effect = private_keys.__setitem__
+    storage.load.side_effect = private_keys.__getitem__
+    redis = MagicMock()
+    redis.get.return_value = None
+    mocker.patch.object(rsa, "redis_client", new=redis)
+    mocker.patch.object(rsa, "_decoding_cache", TTLCache(10, 300))
+    mocker.patch.object(rsa, "_decoding_reloads", TTLCache(10, rsa.PRIVATE_KEY_RELOAD_INTERVAL))
+    return private_keys
+
+
+def _rotate_private_key(private_keys: dict[str, bytes]) -> bytes:
+    rotated_private_key = RSA.generate(2048)
+    private_keys["privkeys/tenant_id/private.pem"] = rotated_private_key.export_key()
+    return rotated_private_key.publickey().export_key()
+
+
+def test_decrypt_caches_private_key_until_rotated(private_keys) -> None:
+    public_key = rsa.generate_key_pair("tenant_id")
+    assert rsa.decrypt(rsa.encrypt("first", public_key), "tenant_id") == "first"
+    assert rsa.decrypt(rsa.encrypt("second", public_key), "tenant_id") == "second"
+    assert rsa.storage.load.call_count == 1
+
+    # key pairs rotated in another process are reloaded once decrypting with the cached key fails
+    rotated_public_key = _rotate_private_key(private_keys)
+    assert rsa.decrypt(rsa.encrypt("rotated", rotated_public_key), "tenant_id") == "rotated"
+    assert rsa.storage.load.call_count == 2
+
+    # key pairs rotated in this process are reloaded right away
+    public_key = rsa.generate_key_pair("tenant_id")
+    assert rsa.decrypt(rsa.encrypt("regenerated", public_key), "tenant_id") == "regenerated"
+    assert rsa.storage.load.call_count == 3
+
+
+def test_decrypt_with_decoding_reloads_rotated_private_key(private_keys) -> None:
+    rsa.generate_key_pair("tenant_id")
+    rsa_key, cipher_rsa = rsa.get_decrypt_decoding("tenant_id")
+    rotated_public_key = _rotate_private_key(private_keys)
+
+    # tokens decrypted with a decoding fetched before the rotation only reload the private key once
+    for text in ("first", "second"):
+        encrypted_text = rsa.encrypt(text, rotated_public_key)
+        assert rsa.decrypt_token_with_decoding(encrypted_text, rsa_key, cipher_rsa, "tenant_id") == text
+    assert rsa.storage.load.call_count == 2
+
+    # tokens not encrypted with the current key pair still fail
+    other_public_key = RSA.generate(2048).publickey().export_key()
+    with pytest.raises(ValueError):
+        rsa.decrypt_token_with_decoding(rsa.encrypt("other", other_public_key), rsa_key, cipher_rsa, "tenant_id")
+    with pytest.raises(ValueError):
+        rsa.decrypt_token_with_decoding(rsa.encrypt("other", other_public_key), rsa_key, cipher_rsa)
+
+
+def test_decrypt_failures_reload_private_key_sparingly(mocker, private_keys) -> None:
+    rsa.generate_key_pair("tenant_id")
+    rsa_key, cipher_rsa = rsa.get_decrypt_decoding("tenant_id")
+
+    # values that are not tokens never reload the private key
+    for encrypted_text in (b"", b"plaintext", rsa.prefix_hybrid + b"short"):
+        with pytest.raises(ValueError):
+            rsa.decrypt_token_with_decoding(encrypted_text, rsa_key, cipher_rsa, "tenant_id")
+    assert rsa.storage.load.call_count == 1
+
+    # tokens of another key pair reload the private key at most once per reload interval
+    monotonic = mocker.patch("core.helper.lru_cache.time.monotonic", return_value=100.0)
+    other_public_key = RSA.generate(2048).publickey().export_key()
+    for _ in range(3):
+        rsa_key, cipher_rsa = rsa.get_decrypt_decoding("tenant_id")
+        with pytest.raises(ValueError):
+            rsa.decrypt_token_with_decoding(rsa.encrypt("other", other_public_key), rsa_key, cipher_rsa, "tenant_id")
+    assert rsa.storage.load.call_count == 2
+
+    monotonic.return_value += rsa.PRIVATE_KEY_RELOAD_INTERVAL + 1
+    rotated_public_key = _rotate_private_key(private_keys)
+    assert rsa.decrypt(rsa.encrypt("rotated", rotated_public_key), "tenant_id") == "rotated"
+    assert rsa.storage.load.call_count == 3